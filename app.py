@@ -2,32 +2,14 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 import streamlit as st
-from src.apis.news_api import fetch_bitcoin_news
-from src.utils.text_to_speech import text_to_speech
-from src.utils.video_creator import create_video_synced
-from src.config import AUDIO_DIR, VIDEOS_DIR, IMAGES_DIR
+from src.apis.news_api import fetch_bitcoin_news, fetch_new_bitcoin_news, NewsIndex
+from src.pipeline import get_output_paths
+from src.config import RENDER_JOB_WORKERS, RENDER_JOB_POLL_SECONDS, ensure_data_dirs
 import os
 import re
 from datetime import datetime
 import random
-import nltk # Para o download de recursos
-
-# --- Configuração do NLTK ---
-def setup_nltk_resources():
-    resources = [("tokenizers/punkt", "punkt"), ("corpora/stopwords", "stopwords")]
-    downloaded_any = False
-    for resource_path, resource_id in resources:
-        try:
-            nltk.data.find(resource_path)
-        except LookupError:
-            st.info(f"Baixando recurso NLTK necessário: '{resource_id}'...")
-            nltk.download(resource_id, quiet=True)
-            st.success(f"Recurso '{resource_id}' baixado.")
-            downloaded_any = True
-    # if downloaded_any:
-    #     st.experimental_rerun() # Rerun se algo foi baixado para garantir que o app use
-setup_nltk_resources()
-# --- Fim Configuração NLTK ---
+# TTS, vídeo e NLTK são carregados só ao gerar um vídeo, para a listagem de notícias abrir rápido
 
 
 st.set_page_config(
@@ -39,15 +21,63 @@ st.set_page_config(
 st.title("🎥 CryptoCaster - Gerador de Vídeos Automáticos")
 st.markdown("Crie vídeos automáticos com base em notícias sobre Bitcoin, com imagens sincronizadas.")
 
+# Rótulos dos formatos extras de saída (ver OUTPUT_FORMATS em src/config.py)
+OUTPUT_LABELS = {"vertical": "Vídeo Vertical (9:16)", "thumbnail": "Miniatura"}
+
 def normalize_title_for_file(title):
     normalized = re.sub(r'[^\w\s-]', '', title).strip()
     normalized = re.sub(r'[-\s]+', '_', normalized)
     return normalized[:80] # Reduzido para nomes de arquivo mais curtos
 
+@st.cache_resource
+def get_worker_pool():
+    """Pool de workers compartilhado por todas as sessões do servidor (um por processo do Streamlit)."""
+    from src.utils.render_jobs import RenderWorkerPool
+    ensure_data_dirs()
+    return RenderWorkerPool(workers=RENDER_JOB_WORKERS).start() if RENDER_JOB_WORKERS else None
+
+def submit_job(kind, item, profile="final"):
+    """Enfileira a renderização (ou promoção) da notícia; o progresso aparece no painel de trabalhos."""
+    from src.utils.render_jobs import get_render_queue
+    ensure_data_dirs()
+    job_id = get_render_queue().submit(kind, {"item": item, "profile": profile, "lang": "en", "words_per_image": 8})
+    st.session_state.jobs.append(job_id)
+    st.toast("Vídeo enviado para a fila de renderização.")
+
+@st.fragment(run_every=RENDER_JOB_POLL_SECONDS * 2)
+def show_jobs():
+    """Painel com o progresso dos trabalhos desta sessão, atualizado periodicamente sem bloquear o app."""
+    from src.utils.render_jobs import get_render_queue, DONE, FAILED
+    queue = get_render_queue()
+    for job_id in list(st.session_state.jobs):
+        job = queue.get(job_id)
+        if job is None:
+            st.session_state.jobs.remove(job_id)
+            continue
+        title = job["params"]["item"].get("title", job_id)
+        label = "Prévia" if job["params"].get("profile") == "preview" and job["kind"] == "render" else "Vídeo"
+        if job["status"] == DONE:
+            st.session_state.jobs.remove(job_id)
+            st.session_state.current_video_path = job["result"]["video_file"]
+            st.session_state.current_outputs = job["result"].get("outputs") or {}
+            st.success(f"{label} pronto: {title}")
+            st.rerun(scope="app")
+        elif job["status"] == FAILED:
+            st.session_state.jobs.remove(job_id)
+            st.error(f"Falha ao gerar '{title}': {job['error']}. Verifique os logs.")
+        else:
+            st.progress(job["progress"], text=f"{label} — {title}: {job['message']}")
+
 if "news_data" not in st.session_state:
     st.session_state.news_data = []
 if "current_video_path" not in st.session_state:
     st.session_state.current_video_path = None
+if "current_outputs" not in st.session_state:
+    st.session_state.current_outputs = {}
+if "jobs" not in st.session_state:
+    st.session_state.jobs = []
+
+get_worker_pool()
 
 if st.button("Buscar Notícias de Bitcoin"):
     with st.spinner("Buscando notícias..."):
@@ -60,6 +90,17 @@ if st.button("Buscar Notícias de Bitcoin"):
             st.success(f"{len(news)} notícias encontradas!")
         st.session_state.current_video_path = None # Limpa vídeo anterior
 
+if st.button("Buscar Apenas Notícias Novas"):
+    with st.spinner("Buscando notícias novas..."):
+        news = fetch_new_bitcoin_news(NewsIndex())
+        if not news:
+            st.info("Nenhuma notícia nova desde a última geração de vídeos.")
+            st.session_state.news_data = []
+        else:
+            st.session_state.news_data = news
+            st.success(f"{len(news)} notícias novas encontradas!")
+        st.session_state.current_video_path = None
+
 if st.session_state.news_data:
     for index, item in enumerate(st.session_state.news_data):
         news_title = item.get('title', f"Noticia_{index}")
@@ -76,57 +117,18 @@ if st.session_state.news_data:
             body_preview = item.get('body', '')
             st.caption(f"Corpo: {body_preview[:300]}{'...' if len(body_preview) > 300 else ''}")
 
-            if st.button(f"🎬 Gerar Vídeo para '{news_title}'", key=button_key):
-                st.session_state.current_video_path = None 
-                
-                if not body_preview:
-                    st.warning("O corpo da notícia está vazio. O vídeo pode não ser muito informativo.")
-                
-                with st.spinner(f"Gerando vídeo para '{news_title}'... Isso pode levar alguns minutos."):
-                    progress_bar = st.progress(0, text="Iniciando...")
-                    try:
-                        normalized_title_for_file = normalize_title_for_file(news_title)
-                        base_filename = f"{normalized_title_for_file}_{news_id}"
-                        
-                        audio_file = os.path.join(AUDIO_DIR, f"{base_filename}.mp3")
-                        video_file = os.path.join(VIDEOS_DIR, f"{base_filename}.mp4")
-
-                        os.makedirs(AUDIO_DIR, exist_ok=True)
-                        os.makedirs(VIDEOS_DIR, exist_ok=True)
-                        os.makedirs(IMAGES_DIR, exist_ok=True)
-
-                        full_text_for_video = news_title + ". " + body_preview
-                        
-                        progress_bar.progress(10, text="Passo 1/3: Gerando áudio...")
-                        text_to_speech(full_text_for_video, audio_file, lang='en') # Assumindo inglês
-                        if not os.path.exists(audio_file) or os.path.getsize(audio_file) == 0:
-                            st.error(f"Falha ao gerar áudio ou arquivo de áudio vazio: {audio_file}")
-                            raise Exception("Geração de áudio falhou")
-                        logging.info(f"Áudio gerado em: {audio_file}")
-                        progress_bar.progress(33, text="Áudio gerado. Passo 2/3: Preparando imagens...")
-                        
-                        create_video_synced(
-                            full_text_for_video, 
-                            audio_file, 
-                            video_file, 
-                            news_title=news_title, # Passando o título da notícia
-                            words_per_image=8
-                        )
-                        progress_bar.progress(90, text="Passo 3/3: Renderizando vídeo final...")
-                        
-                        if not os.path.exists(video_file) or os.path.getsize(video_file) == 0:
-                            st.error("Falha na criação do vídeo ou arquivo de vídeo vazio.")
-                            raise Exception("Criação de vídeo falhou")
-
-                        logging.info(f"Vídeo finalizado: {video_file}")
-                        progress_bar.progress(100, text="Vídeo gerado com sucesso!")
-                        st.success("Vídeo gerado com sucesso!")
-                        st.session_state.current_video_path = video_file
-                    
-                    except Exception as e:
-                        logging.error(f"Erro crítico durante a geração do vídeo para '{news_title}': {e}", exc_info=True)
-                        st.error(f"Ocorreu um erro: {e}. Verifique os logs.")
-                        if 'progress_bar' in locals(): progress_bar.empty()
+            _, _, preview_file = get_output_paths(item, "preview")
+
+            if not body_preview:
+                st.warning("O corpo da notícia está vazio. O vídeo pode não ser muito informativo.")
+
+            col_preview, col_final, col_promote = st.columns(3)
+            if col_preview.button("⚡ Gerar Prévia Rápida", key=f"preview_{button_key}"):
+                submit_job("render", item, profile="preview")
+            if col_final.button(f"🎬 Gerar Vídeo para '{news_title}'", key=button_key):
+                submit_job("render", item, profile="final")
+            if os.path.exists(preview_file) and col_promote.button("⬆️ Promover Prévia para Qualidade Final", key=f"promote_{button_key}"):
+                submit_job("promote", item)
     
     if st.session_state.current_video_path and os.path.exists(st.session_state.current_video_path):
         st.video(st.session_state.current_video_path)
@@ -138,5 +140,37 @@ if st.session_state.news_data:
                 mime="video/mp4",
                 key=f"download_{os.path.basename(st.session_state.current_video_path)}"
             )
+        # Formatos extras gerados na mesma passada (vídeo vertical, miniatura)
+        extra_outputs = {name: path for name, path in st.session_state.current_outputs.items()
+                         if path != st.session_state.current_video_path and os.path.exists(path)}
+        if "thumbnail" in extra_outputs:
+            st.image(extra_outputs["thumbnail"], caption="Miniatura", width=320)
+        for name, path in extra_outputs.items():
+            with open(path, "rb") as file_content:
+                st.download_button(
+                    label=f"Baixar {OUTPUT_LABELS.get(name, name)}",
+                    data=file_content,
+                    file_name=os.path.basename(path),
+                    mime="image/jpeg" if path.endswith(".jpg") else "video/mp4",
+                    key=f"download_{os.path.basename(path)}"
+                )
     elif st.session_state.current_video_path:
-        st.warning(f"Arquivo de vídeo '{st.session_state.current_video_path}' não encontrado. Por favor, gere novamente.")
\ No newline at end of file
+        st.warning(f"Arquivo de vídeo '{st.session_state.current_video_path}' não encontrado. Por favor, gere novamente.")
+
+if st.session_state.jobs:
+    st.subheader("Renderizações em andamento")
+    show_jobs()
+
+with st.expander("📊 Métricas de renderização"):
+    from src.utils.tracing import load_metrics, summarize_metrics
+    recent_metrics = load_metrics(limit=50)
+    if recent_metrics:
+        st.caption(f"Tempo por etapa nas últimas {len(recent_metrics)} renderizações (mais lentas primeiro).")
+        st.dataframe([{"etapa": stage, **stats} for stage, stats in summarize_metrics(recent_metrics).items()])
+    else:
+        st.caption("Nenhuma renderização registrada ainda.")
+    from src.apis.search_cache import get_search_cache
+    search_cache_stats = get_search_cache().stats()
+    if search_cache_stats:
+        st.caption("Cache de buscas de imagens (acertos e erros acumulados por provedor).")
+        st.dataframe([{"provedor": provider, **stats} for provider, stats in search_cache_stats.items()])
@@ -0,0 +1,53 @@
+"""
+Benchmark do tempo de importação (partida a frio): importa cada módulo em um processo Python novo,
+mede o tempo e lista quais dependências pesadas (mídia/NLP) foram carregadas junto.
+Os pontos de entrada (`src.main`, `src.pipeline`) não devem carregar nenhuma delas.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_import_time [--repeat 5] [módulo ...]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+DEFAULT_MODULES = ('src.config', 'src.apis.news_api', 'src.pipeline', 'src.main', 'src.utils.video_creator')
+HEAVY_MODULES = ('moviepy', 'vidgear', 'cv2', 'nltk', 'PIL', 'numpy', 'gtts', 'googleapiclient')
+
+_PROBE = """
+import json, sys, time
+started_at = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started_at
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat=5):
+    """Retorna {"seconds": melhor tempo de importação, "heavy": dependências pesadas carregadas}."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def run(modules=DEFAULT_MODULES, repeat=5):
+    return {module: measure(module, repeat) for module in modules}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Tempo de importação a frio (melhor de {args.repeat}):")
+    for module, result in run(args.modules, args.repeat).items():
+        heavy = ", ".join(result["heavy"]) or "-"
+        print(f"  {module:<26} {result['seconds'] * 1000:8.1f} ms  pesados: {heavy}")
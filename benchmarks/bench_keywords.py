@@ -0,0 +1,76 @@
+"""
+Benchmark da extração de queries de imagem: compara a chamada por trecho
+(`extract_entities_and_keywords_for_search`, o caminho original) com a versão em lote
+(`extract_search_queries_for_article`) em artigos longos sintéticos.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_keywords [--words 5000] [--words-per-image 8] [--repeat 3]
+
+Sai com erro se as duas versões gerarem alguma query diferente.
+"""
+import argparse
+import logging
+import random
+import time
+
+from src.utils.image_processing import extract_entities_and_keywords_for_search, extract_search_queries_for_article
+
+VOCABULARY = (
+    "the bitcoin price rose sharply after the market opened and traders said that "
+    "institutional demand for the cryptocurrency remains strong while regulators in "
+    "the United States are still reviewing new rules for exchanges. Analysts at Goldman Sachs "
+    "expect volatility to stay high, but miners keep adding hash rate to the network."
+).split()
+
+TITLE = "Bitcoin Price Surges As Institutional Demand Grows"
+
+
+def synthetic_article(n_words, seed=0):
+    """Artigo sintético com vocabulário de notícias de cripto, nomes próprios e pontuação."""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(n_words))
+
+
+def run(n_words=5000, words_per_image=8, repeat=3):
+    """Retorna {"per_chunk": segundos, "batch": segundos, "chunks": n, "mismatches": n} (melhor de `repeat`)."""
+    text = synthetic_article(n_words)
+    words = text.split()
+    chunks = [" ".join(words[i:i + words_per_image]) for i in range(0, len(words), words_per_image)]
+
+    def per_chunk():
+        return [extract_entities_and_keywords_for_search(chunk, TITLE) for chunk in chunks]
+
+    def batch():
+        return extract_search_queries_for_article(text, TITLE, words_per_image=words_per_image)
+
+    results = {"chunks": len(chunks)}
+    outputs = {}
+    for name, fn in (("per_chunk", per_chunk), ("batch", batch)):
+        best = float("inf")
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            outputs[name] = fn()
+            best = min(best, time.perf_counter() - started_at)
+        results[name] = best
+    # A versão em lote tem de produzir exatamente as mesmas queries, na mesma ordem
+    results["mismatches"] = (sum(a != b for a, b in zip(outputs["per_chunk"], outputs["batch"]))
+                             + abs(len(outputs["per_chunk"]) - len(outputs["batch"])))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--words-per-image", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Os logs por trecho dominariam o tempo medido
+    logging.disable(logging.INFO)
+    results = run(args.words, args.words_per_image, args.repeat)
+    print(f"Extração de queries, {args.words} palavras ({results['chunks']} trechos):")
+    print(f"  por trecho {results['per_chunk'] * 1000:8.1f} ms")
+    print(f"  em lote    {results['batch'] * 1000:8.1f} ms  ({results['per_chunk'] / results['batch']:4.1f}x)")
+    print(f"  queries diferentes: {results['mismatches']}")
+    if results["mismatches"]:
+        raise SystemExit("ERRO: a versão em lote gerou queries diferentes da versão por trecho.")
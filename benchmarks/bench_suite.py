@@ -0,0 +1,233 @@
+"""
+Suíte de benchmarks offline dos caminhos quentes de mídia, com fixtures locais (JPEGs sintéticos, MP3 com
+tom senoidal e um servidor HTTP local no lugar dos provedores de imagens):
+
+  - resize_image_to_16_9 e resize_and_crop_image (ms por imagem 4000x3000);
+  - ken_burns_effect (quadros/s em 1920x1080);
+  - extract_entities_and_keywords_for_search (trechos/s);
+  - create_video de ponta a ponta (segundos de processamento por segundo de vídeo, com cache de imagens frio).
+
+Cada métrica é a mediana de várias execuções, gravada com o intervalo interquartil (IQR) como medida de ruído.
+Os resultados podem ser gravados como baseline (benchmarks/baseline.json) e comparados com ela depois;
+o comando sai com código 1 se alguma métrica piorar mais que a tolerância e mais que o ruído medido, ou se
+algum benchmark não puder rodar (nesse caso --save-baseline também se recusa a gravar).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_suite [--save-baseline] [--tolerance 0.25] [--only ken_burns_effect ...]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def _timings(repeat, fn):
+    """Tempos (s) de `repeat` execuções de `fn()`."""
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started_at)
+    return samples
+
+
+def _result(samples, unit, higher_is_better):
+    """Mediana e intervalo interquartil (IQR) das amostras; a mediana é o valor comparado com a baseline."""
+    if len(samples) > 1:
+        q1, median, q3 = statistics.quantiles(samples, n=4, method="inclusive")
+    else:
+        q1 = median = q3 = samples[0]
+    return {"value": median, "iqr": q3 - q1, "samples": len(samples), "unit": unit,
+            "higher_is_better": higher_is_better}
+
+
+def bench_resize_16_9(workdir, repeat):
+    from benchmarks.fixtures import write_jpegs
+    from src.utils.video_creator import resize_image_to_16_9
+    source = write_jpegs(os.path.join(workdir, "fixtures"), 1)[0]
+    output = os.path.join(workdir, "resized_16_9.jpg")
+    samples = _timings(repeat, lambda: resize_image_to_16_9(source, output))
+    return _result([t * 1000 for t in samples], "ms/imagem", higher_is_better=False)
+
+
+def bench_resize_and_crop(workdir, repeat):
+    from benchmarks.fixtures import write_jpegs
+    from src.utils.image_processing import resize_and_crop_image
+    source = write_jpegs(os.path.join(workdir, "fixtures"), 1)[0]
+    samples = _timings(repeat, lambda: resize_and_crop_image(source))
+    return _result([t * 1000 for t in samples], "ms/imagem", higher_is_better=False)
+
+
+def bench_ken_burns(workdir, repeat, seconds=2.0, fps=24):
+    import numpy as np
+    from moviepy.editor import ImageClip
+    from benchmarks.fixtures import synthetic_image
+    from src.utils.image_processing import ken_burns_effect
+    clip = ImageClip(np.asarray(synthetic_image(1920, 1080))).set_duration(seconds)
+    effect = ken_burns_effect(clip, R_start=1.0, R_end=1.2, pos_end=('left', 'top'), fps=fps)
+    n_frames = int(seconds * fps)
+
+    def render():
+        for i in range(n_frames):
+            effect.get_frame(i / fps)
+    return _result([n_frames / t for t in _timings(repeat, render)], "quadros/s", higher_is_better=True)
+
+
+def bench_keywords(workdir, repeat, n_words=2000, words_per_image=8):
+    from benchmarks.bench_keywords import synthetic_article, TITLE
+    from src.utils.helpers import setup_nltk_resources
+    from src.utils.image_processing import extract_entities_and_keywords_for_search
+    setup_nltk_resources()
+    words = synthetic_article(n_words).split()
+    chunks = [" ".join(words[i:i + words_per_image]) for i in range(0, len(words), words_per_image)]
+    samples = _timings(repeat, lambda: [extract_entities_and_keywords_for_search(chunk, TITLE) for chunk in chunks])
+    return _result([len(chunks) / t for t in samples], "trechos/s", higher_is_better=True)
+
+
+def bench_create_video(workdir, repeat, seconds=12, images=3):
+    from benchmarks.fixtures import write_jpegs, write_tone_mp3, LocalImageServer
+    from src.config import IMAGE_CACHE_DIR, ensure_data_dirs
+    from src.utils.video_creator import create_video
+    fixtures_dir = os.path.join(workdir, "fixtures")
+    names = [os.path.basename(path) for path in write_jpegs(fixtures_dir, images)]
+    audio_file = write_tone_mp3(os.path.join(workdir, "tone.mp3"), seconds)
+    output_file = os.path.join(workdir, "video.mp4")
+    ensure_data_dirs()
+
+    with LocalImageServer(fixtures_dir) as server:
+        urls = [server.url(name) for name in names]
+
+        def render():
+            # Cache frio: cada execução baixa e redimensiona as imagens de novo
+            shutil.rmtree(IMAGE_CACHE_DIR, ignore_errors=True)
+            os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+            create_video(audio_file, urls, output_file)
+        samples = _timings(repeat, render)
+    return _result([t / seconds for t in samples], "s/s de vídeo", higher_is_better=False)
+
+
+# Nome -> (função(workdir, repeat) -> {"value", "iqr", "samples", "unit", "higher_is_better"}, repetições padrão)
+BENCHMARKS = {
+    "resize_image_to_16_9": (bench_resize_16_9, 9),
+    "resize_and_crop_image": (bench_resize_and_crop, 9),
+    "ken_burns_effect": (bench_ken_burns, 7),
+    "extract_keywords": (bench_keywords, 7),
+    "create_video": (bench_create_video, 5),
+}
+
+
+def run(names=None, repeat=None, workdir=None):
+    """
+    Roda os benchmarks em um diretório de trabalho isolado (os dados de `src.config` ficam em `<workdir>/data`,
+    nada é gravado no projeto) e retorna ({nome: resultado}, {nome: erro}).
+    Um benchmark que falhar (ex: recursos do NLTK ausentes e sem rede) vai para os erros; os demais rodam.
+    """
+    names = names or list(BENCHMARKS)
+    owns_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="cryptocaster_bench_")
+    cwd = os.getcwd()
+    # src.config calcula DATA_DIR a partir do diretório atual na importação
+    os.chdir(workdir)
+    try:
+        results = {}
+        failures = {}
+        for name in names:
+            fn, default_repeat = BENCHMARKS[name]
+            try:
+                results[name] = fn(workdir, repeat or default_repeat)
+            except Exception as e:
+                reason = (str(e).strip(" \n*").splitlines() or [""])[0]
+                failures[name] = f"{type(e).__name__}: {reason}"
+                print(f"  {name:<24} FALHOU: {failures[name]}", flush=True)
+                continue
+            result = results[name]
+            print(f"  {name:<24} {result['value']:10.2f} {result['unit']} (IQR {result['iqr']:.2f}, "
+                  f"{result['samples']} execuções)", flush=True)
+        return results, failures
+    finally:
+        os.chdir(cwd)
+        if owns_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "system": platform.system(), "cpus": os.cpu_count()}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Retorna [(nome, atual, baseline, variação)] das métricas que pioraram mais que `tolerance` (ex: 0.25 = 25%)
+    e cuja diferença para a baseline é maior que o ruído (soma dos IQRs das duas medições).
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference or not reference["value"]:
+            continue
+        change = result["value"] / reference["value"] - 1
+        worse = -change if result["higher_is_better"] else change
+        noise = result.get("iqr", 0.0) + reference.get("iqr", 0.0)
+        if worse > tolerance and abs(result["value"] - reference["value"]) > noise:
+            regressions.append((name, result["value"], reference["value"], change))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), help="Roda só estes benchmarks")
+    parser.add_argument("--repeat", type=int, default=None, help="Repetições (mediana e IQR); padrão por benchmark")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como a nova baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Piora relativa aceita antes de acusar regressão")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING) # Os logs das funções medidas dominariam o tempo e a saída
+    print("Benchmarks offline:")
+    results, failures = run(args.only, args.repeat)
+    if failures:
+        print(f"{len(failures)} benchmark(s) falharam: {', '.join(failures)}.")
+        if args.save_baseline:
+            print("Baseline NÃO gravada: uma baseline incompleta esconderia essas métricas nas próximas comparações.")
+        sys.exit(1)
+
+    if args.save_baseline:
+        baseline = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(), "results": results}
+        if args.only and os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+            baseline["results"] = {**previous.get("results", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Baseline gravada em {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"Sem baseline em {args.baseline}; rode com --save-baseline para criar uma.")
+        sys.exit(0)
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != environment():
+        print(f"Atenção: baseline gravada em outro ambiente ({baseline.get('environment')}).")
+    print(f"Comparação com a baseline de {baseline.get('created_at')}:")
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference:
+            change = result["value"] / reference["value"] - 1 if reference["value"] else 0.0
+            print(f"  {name:<24} {reference['value']:10.2f} -> {result['value']:10.2f} {result['unit']} ({change:+.0%})")
+    regressions = compare(results, baseline, args.tolerance)
+    for name, value, reference, change in regressions:
+        print(f"REGRESSÃO: {name} {reference:.2f} -> {value:.2f} ({change:+.0%})")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,55 @@
+"""
+Verificação offline do upload resumível (`upload_video`) contra o servidor local `LocalYouTubeServer`:
+um bloco recebe 503 no meio do upload e o cliente deve consultar o progresso e retomar do último byte
+confirmado, sem reenviar o que o servidor já tem. Sai com erro se o vídeo não chegar íntegro.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.check_youtube_upload [--chunks 4] [--fail 1 2]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+CHUNK_BYTES = 256 * 1024 # Menor bloco aceito pelo protocolo
+
+
+def run(chunks=4, fail_requests=(1,)):
+    """Envia um arquivo de `chunks` blocos e retorna {"ok", "requests", "bytes"} (ver LocalYouTubeServer)."""
+    from google.auth.credentials import AnonymousCredentials
+    from benchmarks.fixtures import LocalYouTubeServer
+    from src.apis.youtube_api import get_authenticated_service, upload_video
+
+    payload = os.urandom(chunks * CHUNK_BYTES - 1000) # Último bloco incompleto, como num vídeo real
+    with tempfile.TemporaryDirectory(prefix="cryptocaster_upload_") as workdir:
+        video_file = os.path.join(workdir, "video.mp4")
+        with open(video_file, "wb") as f:
+            f.write(payload)
+        with LocalYouTubeServer(fail_requests=fail_requests) as server:
+            service = get_authenticated_service(server.endpoint, credentials=AnonymousCredentials())
+            response = upload_video(video_file, "Teste", "Upload local", service=service,
+                                    api_endpoint=server.endpoint, chunk_size=CHUNK_BYTES,
+                                    max_retries=len(fail_requests) + 1)
+            uploaded = server.uploaded()
+    # Cada PUT com falha é seguido de uma consulta ("bytes */total") e da retomada no byte confirmado
+    resumed_from_zero = any(r.startswith("bytes 0-") for r in server.requests[1:])
+    ok = (response.get("id") == "local-video" and uploaded == [payload]
+          and sum("*/" in r for r in server.requests) >= len(fail_requests) and not resumed_from_zero)
+    return {"ok": ok, "requests": server.requests, "bytes": len(payload)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=4)
+    parser.add_argument("--fail", type=int, nargs="*", default=[1], help="Índices dos PUTs que recebem 503")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s - %(message)s")
+    result = run(args.chunks, args.fail)
+    print(f"Upload de {result['bytes']} bytes em {len(result['requests'])} requisições:")
+    for content_range in result["requests"]:
+        print(f"  PUT Content-Range: {content_range}")
+    if not result["ok"]:
+        sys.exit("ERRO: o upload não foi retomado do último byte confirmado ou chegou incompleto.")
+    print("OK: upload retomado do último byte confirmado.")
@@ -0,0 +1,172 @@
+"""
+Fixtures locais para os benchmarks: imagens JPEG sintéticas, um MP3 com tom senoidal, um servidor HTTP
+local que faz o papel dos provedores de imagens e outro que faz o papel do upload resumível do YouTube.
+Nada depende de chaves de API nem de rede externa.
+"""
+import functools
+import json
+import os
+import re
+import subprocess
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import numpy as np
+from PIL import Image
+
+
+def synthetic_image(width, height, seed=0):
+    """Imagem RGB sintética com gradientes, detalhes finos e ruído (comprime como uma foto, não como uma cor lisa)."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    phase = seed * 0.7
+    r = xx * 255.0 / width
+    g = yy * 255.0 / height
+    b = 127.5 + 127.5 * np.sin(xx / 7.0 + phase) * np.cos(yy / 11.0 - phase)
+    pixels = np.stack([r, g, b], axis=-1) + rng.normal(0, 8, (height, width, 3))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def write_jpegs(directory, count, size=(4000, 3000), quality=90):
+    """Grava `count` JPEGs sintéticos (image_0.jpg, ...) em `directory` e retorna os caminhos."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"image_{i}.jpg")
+        if not os.path.exists(path):
+            synthetic_image(*size, seed=i).save(path, quality=quality)
+        paths.append(path)
+    return paths
+
+
+def write_tone_mp3(path, seconds, frequency=440):
+    """Grava um MP3 de `seconds` segundos com um tom senoidal (frequency=0 gera silêncio), usando o FFmpeg do MoviePy."""
+    from src.utils.helpers import get_ffmpeg_binary
+    source = f"sine=frequency={frequency}:duration={seconds}" if frequency else f"anullsrc=r=44100:cl=mono:d={seconds}"
+    subprocess.run(
+        [get_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", source,
+         "-ac", "1", "-ar", "44100", "-c:a", "libmp3lame", "-b:a", "64k", path],
+        check=True,
+    )
+    return path
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalImageServer:
+    """
+    Servidor HTTP local (em uma thread) que serve os arquivos de `directory`, com Content-Length e
+    Last-Modified, no lugar das CDNs dos provedores:
+
+        with LocalImageServer(fixtures_dir) as server:
+            urls = [server.url("image_0.jpg")]
+    """
+
+    def __init__(self, directory):
+        handler = functools.partial(_QuietHandler, directory=directory)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench_http", daemon=True)
+
+    def url(self, name):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/{name}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _YouTubeUploadHandler(BaseHTTPRequestHandler):
+    # Protocolo de upload resumível do googleapiclient: POST abre a sessão (Location), cada PUT envia um bloco
+    # com "Content-Range: bytes a-b/total" (308 + Range até o fim do vídeo) e "bytes */total" consulta o progresso
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, headers=(), body=b""):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        stand_in = self.server.stand_in
+        session_id = uuid.uuid4().hex
+        with stand_in.lock:
+            stand_in.sessions[session_id] = bytearray()
+        host, port = self.server.server_address
+        self._reply(200, [("Location", f"http://{host}:{port}/upload/session/{session_id}")])
+
+    def do_PUT(self):
+        stand_in = self.server.stand_in
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        received = stand_in.sessions[self.path.rsplit("/", 1)[-1]]
+        content_range = self.headers.get("Content-Range", "")
+        match = re.match(r"bytes (\d+)-(\d+)/(\d+)", content_range)
+        with stand_in.lock:
+            stand_in.requests.append(content_range)
+            fail = match is not None and stand_in.failures and stand_in.failures[0] == len(stand_in.requests) - 1
+            if fail:
+                stand_in.failures.pop(0)
+            elif match and int(match.group(1)) == len(received):
+                received.extend(body)
+            total = int(content_range.rsplit("/", 1)[-1])
+            done = len(received) == total
+        if fail:
+            self._reply(503)
+        elif done:
+            self._reply(200, [("Content-Type", "application/json")],
+                        json.dumps({"kind": "youtube#video", "id": "local-video"}).encode())
+        elif received:
+            self._reply(308, [("Range", f"bytes=0-{len(received) - 1}")])
+        else:
+            self._reply(308)
+
+
+class LocalYouTubeServer:
+    """
+    Servidor HTTP local (em uma thread) no lugar da API de upload do YouTube (YOUTUBE_API_ENDPOINT).
+    `fail_requests` lista as posições (0, 1, ...) na sequência de PUTs que recebem 503 sem guardar os bytes
+    (só PUTs com bloco falham, não as consultas de progresso); `requests` registra o Content-Range de cada
+    PUT, para conferir de onde o cliente retomou:
+
+        with LocalYouTubeServer(fail_requests=[1]) as server:
+            upload_video(..., api_endpoint=server.endpoint)
+    """
+
+    def __init__(self, fail_requests=()):
+        self.failures = sorted(fail_requests)
+        self.requests = []
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _YouTubeUploadHandler)
+        self._server.stand_in = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench_youtube", daemon=True)
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    def uploaded(self):
+        """Bytes recebidos em cada sessão de upload."""
+        with self.lock:
+            return [bytes(data) for data in self.sessions.values()]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,14 +1,17 @@
 import requests
+from src.apis.http_client import http_get, RateLimitExceeded
+from src.apis.image_search import ImageCandidate
+from src.apis.search_cache import SearchCache, cached_search
 from src.config import GOOGLE_API_KEY, GOOGLE_CSE_ID
 import logging
 
 # Configuração do logging para este módulo, se necessário, ou confie no logging global
 # logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def search_google_images(query: str, num_images: int = 1):
+def search_google_image_candidates(query: str, num_images: int = 1):
     """
     Busca imagens no Google usando a Custom Search JSON API.
-    Retorna uma lista de URLs de imagens.
+    Retorna uma lista de ImageCandidate (URL da imagem e a miniatura `thumbnailLink`).
     """
     if not GOOGLE_API_KEY or not GOOGLE_CSE_ID:
         logging.error("Google API Key ou CSE ID não configurados.")
@@ -25,22 +28,29 @@ def search_google_images(query: str, num_images: int = 1):
         'safe': 'medium' # ou 'high'
     }
 
-    try:
-        response = requests.get(search_url, params=params, timeout=10)
+    def fetch():
+        response = http_get("google", search_url, params=params)
         response.raise_for_status()
         results = response.json()
         
         image_urls = []
         if "items" in results:
             for item in results.get("items", []):
-                image_urls.append(item.get("link"))
+                image_urls.append([item.get("link"), item.get("image", {}).get("thumbnailLink")])
+        return image_urls
+
+    try:
+        results = cached_search("google", SearchCache.make_key(query, num=num_images, fields="link,thumbnail"), fetch)
+        candidates = [ImageCandidate(url, thumbnail, "google") for url, thumbnail in results[:num_images]]
         
-        if not image_urls:
+        if not candidates:
             logging.warning(f"Nenhuma imagem encontrada no Google para: '{query}'")
         else:
-            logging.info(f"Google Images encontrou para '{query}': {image_urls[:num_images]}")
-        return image_urls[:num_images]
+            logging.info(f"Google Images encontrou para '{query}': {[c.url for c in candidates]}")
+        return candidates
 
+    except RateLimitExceeded:
+        raise # Tratado pela busca em paralelo (image_search), que pula o provedor
     except requests.exceptions.RequestException as e:
         logging.error(f"Erro ao buscar imagens no Google para '{query}': {e}")
         return []
@@ -48,6 +58,10 @@ def search_google_images(query: str, num_images: int = 1):
         logging.error(f"Erro inesperado ao processar busca no Google para '{query}': {e}")
         return []
 
+def search_google_images(query: str, num_images: int = 1):
+    """Como `search_google_image_candidates`, mas retorna apenas as URLs das imagens."""
+    return [candidate.url for candidate in search_google_image_candidates(query, num_images)]
+
 if __name__ == '__main__':
     # Teste rápido
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,218 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.config import RATE_LIMIT_STATE_FILE
+from src.utils.helpers import file_lock, write_json_atomic
+from src.utils.tracing import add_bytes
+
+logger = logging.getLogger(__name__)
+
+# Configuração por provedor: timeout (connect, read) em segundos e cota aproximada.
+# `rate` é a taxa sustentada em requisições por segundo e `burst` o tamanho do balde de tokens;
+# rate=None desativa o limite (ex: download de imagens em CDNs).
+PROVIDER_SETTINGS = {
+    "pexels": {"timeout": (5, 10), "rate": 200 / 3600, "burst": 50},         # 200 req/hora
+    "unsplash": {"timeout": (5, 10), "rate": 50 / 3600, "burst": 20},        # 50 req/hora (modo demo)
+    "google": {"timeout": (5, 10), "rate": 100 / 60, "burst": 10},           # 100 consultas/minuto
+    "cryptocompare": {"timeout": (5, 15), "rate": 50, "burst": 50},
+    "images": {"timeout": (5, 10), "rate": None, "burst": None},
+}
+DEFAULT_SETTINGS = {"timeout": (5, 10), "rate": None, "burst": None}
+
+# Retentativas com backoff exponencial para limites de taxa (429) e erros de servidor (5xx)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+# Espera máxima (s) aceita para um Retry-After de 429; acima disso a resposta é devolvida ao chamador
+RETRY_AFTER_MAX = 60
+
+# Conexões keep-alive mantidas por host em cada sessão
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 16
+
+
+class RateLimitExceeded(Exception):
+    """A cota do provedor não libera uma requisição dentro da espera máxima permitida (ver `rate_limit_wait`)."""
+
+
+# Espera máxima (s) por um token do limitador nas requisições feitas neste contexto; None = sem limite
+_max_rate_wait = contextvars.ContextVar("max_rate_wait", default=None)
+
+
+@contextlib.contextmanager
+def rate_limit_wait(seconds):
+    """
+    Limita a `seconds` a espera pela cota nas chamadas a `http_get` dentro do bloco (0 = não espera).
+    Se a cota não liberar a tempo, `http_get` levanta RateLimitExceeded em vez de dormir. Usado por quem
+    tem prazo (ex: a busca de imagens) para pular um provedor sem cota em vez de ficar bloqueado nele.
+    """
+    token = _max_rate_wait.set(max(0.0, seconds))
+    try:
+        yield
+    finally:
+        _max_rate_wait.reset(token)
+
+
+class TokenBucket:
+    """
+    Limitador de taxa simples (token bucket), seguro para uso entre threads.
+    Com `state_file`, o saldo de tokens fica nesse JSON (chave `name`) e é lido-atualizado-gravado sob
+    `file_lock`, de modo que todos os processos que usam o mesmo arquivo dividem uma única cota.
+    """
+
+    def __init__(self, rate, capacity, state_file=None, name="default"):
+        self.rate = rate
+        self.capacity = capacity
+        self.state_file = state_file
+        self.name = name
+        self.tokens = capacity
+        self.updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def _refill_and_take(self, tokens, updated_at, now):
+        # Retorna (saldo restante, espera em s até o próximo token; 0 se um token foi consumido)
+        tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        return tokens, (1 - tokens) / self.rate
+
+    def _try_take(self):
+        with self._lock:
+            now = time.time()
+            if self.state_file is None:
+                self.tokens, wait_time = self._refill_and_take(self.tokens, self.updated_at, now)
+                self.updated_at = now
+                return wait_time
+            with file_lock(self.state_file):
+                try:
+                    with open(self.state_file, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {}
+                entry = state.get(self.name) or {}
+                tokens, wait_time = self._refill_and_take(
+                    entry.get("tokens", self.capacity), entry.get("updated_at", now), now
+                )
+                state[self.name] = {"tokens": tokens, "updated_at": now}
+                write_json_atomic(self.state_file, state)
+                return wait_time
+
+    def acquire(self, timeout=None):
+        """
+        Bloqueia até que haja um token disponível e o consome. Com `timeout` (s), desiste sem consumir
+        nada e retorna False se o token não sair a tempo (timeout=0 não espera); senão retorna True.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_time = self._try_take()
+            if wait_time <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait_time > deadline:
+                return False
+            logger.info(f"Limite de taxa atingido. Aguardando {wait_time:.1f}s...")
+            time.sleep(wait_time)
+
+
+_sessions = {}
+_buckets = {}
+_owner_pid = None
+_registry_lock = threading.Lock()
+
+
+def _settings(provider):
+    return PROVIDER_SETTINGS.get(provider, DEFAULT_SETTINGS)
+
+
+def _reset_if_forked():
+    # Sockets não devem ser compartilhados entre processos (ex: ProcessPoolExecutor com fork).
+    # Os buckets podem ser recriados: o saldo da cota fica em RATE_LIMIT_STATE_FILE, comum a todos
+    global _owner_pid
+    if _owner_pid != os.getpid():
+        _sessions.clear()
+        _buckets.clear()
+        _owner_pid = os.getpid()
+
+
+def get_session(provider):
+    """Retorna a sessão HTTP compartilhada (com pool keep-alive e retentativas) do provedor."""
+    with _registry_lock:
+        _reset_if_forked()
+        session = _sessions.get(provider)
+        if session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUS_CODES,
+                allowed_methods=frozenset(["GET", "HEAD"]),
+                respect_retry_after_header=False,  # Retry-After é tratado em http_get, respeitando o prazo
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+        return session
+
+
+def _get_bucket(provider):
+    settings = _settings(provider)
+    if not settings.get("rate"):
+        return None
+    with _registry_lock:
+        _reset_if_forked()
+        bucket = _buckets.get(provider)
+        if bucket is None:
+            bucket = TokenBucket(settings["rate"], settings["burst"], state_file=RATE_LIMIT_STATE_FILE, name=provider)
+            _buckets[provider] = bucket
+        return bucket
+
+
+def http_get(provider, url, **kwargs):
+    """
+    Executa um GET pela sessão compartilhada do provedor, respeitando a cota (token bucket)
+    e aplicando o timeout padrão do provedor quando nenhum for informado.
+    Dentro de `rate_limit_wait`, levanta RateLimitExceeded se a cota não liberar a requisição a tempo
+    ou se o servidor responder 429 pedindo (Retry-After) uma espera maior que a permitida.
+    """
+    bucket = _get_bucket(provider)
+    if bucket is not None:
+        max_wait = _max_rate_wait.get()
+        if not bucket.acquire(timeout=max_wait):
+            raise RateLimitExceeded(f"Cota de '{provider}' esgotada por mais de {max_wait:.1f}s.")
+    kwargs.setdefault("timeout", _settings(provider)["timeout"])
+    response = get_session(provider).get(url, **kwargs)
+    retry_after = _retry_after_seconds(response)
+    if retry_after is not None:
+        max_wait = _max_rate_wait.get()
+        if max_wait is not None and retry_after > max_wait:
+            raise RateLimitExceeded(f"'{provider}' pediu {retry_after:.1f}s de espera (máximo {max_wait:.1f}s).")
+        if retry_after <= RETRY_AFTER_MAX:
+            logger.info(f"'{provider}' respondeu 429. Aguardando {retry_after:.1f}s (Retry-After)...")
+            response.close()
+            time.sleep(retry_after)
+            response = get_session(provider).get(url, **kwargs)
+    if not kwargs.get("stream"):
+        # Respostas em streaming contam os bytes conforme são lidas (ver ImageCache._download)
+        add_bytes(len(response.content))
+    return response
+
+
+def _retry_after_seconds(response):
+    # Segundos pedidos pelo cabeçalho Retry-After de uma resposta 429 (None se não houver ou for inválido)
+    value = response.headers.get("Retry-After") if response.status_code == 429 else None
+    if not value:
+        return None
+    try:
+        return Retry.DEFAULT.parse_retry_after(value)
+    except Exception:
+        return None
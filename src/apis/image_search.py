@@ -0,0 +1,239 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.config import (
+    PEXELS_API_KEY, UNSPLASH_ACCESS_KEY, GOOGLE_API_KEY, GOOGLE_CSE_ID,
+    IMAGE_SEARCH_PROVIDERS, IMAGE_SEARCH_TIMEOUT, IMAGE_SEARCH_WORKERS, IMAGE_SEARCH_PER_QUERY,
+    IMAGE_SEARCH_MAX_PER_PROVIDER,
+)
+from src.apis.http_client import RateLimitExceeded, rate_limit_wait
+
+from src.utils.tracing import span, in_current_span
+
+logger = logging.getLogger(__name__)
+
+# Imagem candidata: URL em resolução cheia, miniatura (usada para o hash perceptual), provedor
+# e dHash da miniatura (preenchido pela triagem, ver `image_hash.hash_candidates`)
+ImageCandidate = namedtuple("ImageCandidate", ["url", "thumbnail_url", "provider", "dhash"], defaults=(None, None, None))
+
+
+def _search_pexels(query, count):
+    from src.apis.pexels_api import search_pexels_candidates
+    return search_pexels_candidates(query, per_page=count)
+
+
+def _search_unsplash(query, count):
+    from src.apis.unsplash_api import UnsplashAPI
+    return UnsplashAPI(UNSPLASH_ACCESS_KEY).search_photo_candidates(query, count=count)
+
+
+def _search_google(query, count):
+    from src.apis.google_images_api import search_google_image_candidates
+    # A Custom Search API aceita no máximo 10 resultados por chamada
+    return search_google_image_candidates(query, num_images=min(count, 10))
+
+
+# Provedor -> (função de busca (query, quantidade) -> ImageCandidate, função que diz se as chaves estão configuradas)
+PROVIDERS = {
+    "pexels": (_search_pexels, lambda: bool(PEXELS_API_KEY)),
+    "unsplash": (_search_unsplash, lambda: bool(UNSPLASH_ACCESS_KEY)),
+    "google": (_search_google, lambda: bool(GOOGLE_API_KEY and GOOGLE_CSE_ID)),
+}
+
+
+def configured_providers(names=IMAGE_SEARCH_PROVIDERS):
+    """Provedores habilitados em IMAGE_SEARCH_PROVIDERS que têm chave de API configurada, na ordem da config."""
+    return [name for name in names if name in PROVIDERS and PROVIDERS[name][1]()]
+
+
+class LatencyStats:
+    """Latência das buscas por provedor (sucessos, erros e tempos), acumulada durante o processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._errors = {}
+
+    def record(self, provider, seconds, ok=True):
+        with self._lock:
+            self._samples.setdefault(provider, []).append(seconds)
+            if not ok:
+                self._errors[provider] = self._errors.get(provider, 0) + 1
+
+    def summary(self):
+        """Retorna {provedor: {"count", "errors", "mean", "p50", "p95"}} com os tempos em segundos."""
+        with self._lock:
+            result = {}
+            for provider, samples in self._samples.items():
+                ordered = sorted(samples)
+                result[provider] = {
+                    "count": len(ordered),
+                    "errors": self._errors.get(provider, 0),
+                    "mean": sum(ordered) / len(ordered),
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                }
+            return result
+
+
+latency_stats = LatencyStats()
+
+
+def _timed_search(provider, query, count, accept=None, screen=False, deadline=None):
+    with span(f"search.{provider}", query=query):
+        return _screened_search(provider, query, count, accept, screen, deadline)
+
+
+def _screened_search(provider, query, count, accept, screen, deadline=None):
+    search = PROVIDERS[provider][0]
+    started_at = time.perf_counter()
+    try:
+        if deadline is None:
+            candidates = search(query, count) or []
+        else:
+            # Sem cota até o prazo da busca: pula o provedor em vez de dormir no limitador além do prazo
+            with rate_limit_wait(deadline - time.monotonic()):
+                candidates = search(query, count) or []
+    except RateLimitExceeded as e:
+        logger.info(f"Busca de imagens em '{provider}' pulada para '{query}': {e}")
+        return []
+    except Exception as e:
+        latency_stats.record(provider, time.perf_counter() - started_at, ok=False)
+        logger.warning(f"Busca de imagens em '{provider}' falhou para '{query}': {e}")
+        return []
+    latency_stats.record(provider, time.perf_counter() - started_at)
+    candidates = [c for c in candidates if c.url and (accept is None or accept(c.url))]
+    if screen:
+        # A triagem pelas miniaturas roda aqui, ainda no worker, em paralelo com as outras buscas
+        from src.utils.image_hash import hash_candidates
+        candidates = hash_candidates(candidates)
+    return candidates
+
+
+def _assign(queries, providers, max_per_provider=IMAGE_SEARCH_MAX_PER_PROVIDER):
+    """
+    Pares (índice da query, provedor) a buscar. Cada query vai ao seu provedor no rodízio (para que
+    toda query seja buscada) e aos demais enquanto eles tiverem recebido menos de `max_per_provider`
+    queries, para não esgotar de uma vez a cota dos provedores mais restritos.
+    """
+    sent = dict.fromkeys(providers, 0)
+    pairs = []
+    for index in range(len(queries)):
+        primary = providers[index % len(providers)]
+        for provider in providers:
+            if provider == primary or sent[provider] < max_per_provider:
+                sent[provider] += 1
+                pairs.append((index, provider))
+    return pairs
+
+
+def _race(queries, providers, per_query, timeout, on_candidates, accept=None, screen=False):
+    """
+    Dispara as combinações (query, provedor) de `_assign` em paralelo e entrega os candidatos relevantes
+    (`accept(url)`) a `on_candidates(indice_da_query, provedor, candidatos)` na ordem em que chegam.
+    Com `screen`, os candidatos chegam com o dHash das miniaturas já calculado.
+    Quando `on_candidates` retorna True (ou o prazo acaba) as buscas ainda na fila são canceladas e a
+    função retorna sem esperar as que já estão em andamento — os resultados atrasados são descartados.
+    Nenhuma busca espera pela cota do provedor além do prazo, então as threads terminam logo depois dele.
+    """
+    providers = configured_providers() if providers is None else providers
+    if not providers or not queries:
+        return
+    deadline = time.monotonic() + timeout
+    executor = ThreadPoolExecutor(max_workers=IMAGE_SEARCH_WORKERS, thread_name_prefix="image_search")
+    futures = {
+        executor.submit(in_current_span(_timed_search), provider, queries[index], per_query, accept, screen,
+                        deadline): (index, provider)
+        for index, provider in _assign(queries, providers)
+    }
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Prazo de {timeout}s da busca de imagens esgotado com {len(pending)} buscas pendentes.")
+                return
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, provider = futures[future]
+                if on_candidates(index, provider, future.result()):
+                    return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _Selection:
+    """Candidatos já escolhidos: rejeita URLs repetidas e, com `hash_index`, imagens quase iguais."""
+
+    def __init__(self, hash_index=None, exclude=(), exclude_hashes=()):
+        self.hash_index = hash_index
+        self.urls = set(exclude)
+        self.hashes = list(exclude_hashes)
+
+    def add(self, candidate):
+        if candidate.url in self.urls:
+            return False
+        if self.hash_index is not None and self.hash_index.is_duplicate(candidate.dhash, self.hashes):
+            logger.info(f"Imagem descartada por ser quase igual a outra já usada: {candidate.url}")
+            return False
+        self.urls.add(candidate.url)
+        if candidate.dhash is not None:
+            self.hashes.append(candidate.dhash)
+        return True
+
+
+def search_images_all_providers(queries, wanted=10, providers=None, per_query=IMAGE_SEARCH_PER_QUERY,
+                                timeout=IMAGE_SEARCH_TIMEOUT, accept=None, hash_index=None):
+    """
+    Busca todas as `queries` em todos os provedores configurados ao mesmo tempo e retorna até `wanted`
+    ImageCandidate sem repetição, na ordem de chegada. Retorna assim que tiver `wanted` candidatos aceitos
+    (`accept(url)`, se informado, filtra as irrelevantes), sem esperar os provedores mais lentos.
+    Com `hash_index` (image_hash.PerceptualHashIndex), quase duplicatas entre provedores e de vídeos
+    recentes são descartadas pelas miniaturas, antes do download em resolução cheia.
+    """
+    selected = []
+    selection = _Selection(hash_index)
+
+    def on_candidates(index, provider, candidates):
+        for candidate in candidates:
+            if selection.add(candidate):
+                selected.append(candidate)
+        return len(selected) >= wanted
+
+    _race(list(queries), providers, per_query, timeout, on_candidates, accept=accept, screen=hash_index is not None)
+    return selected[:wanted]
+
+
+def search_image_per_query(queries, providers=None, per_query=IMAGE_SEARCH_PER_QUERY,
+                           timeout=IMAGE_SEARCH_TIMEOUT, exclude=(), accept=None, hash_index=None,
+                           exclude_hashes=()):
+    """
+    Busca uma imagem para cada query (todas as queries e provedores em paralelo) e retorna uma lista
+    alinhada com `queries`, com o ImageCandidate escolhido ou None. Para cada query vale o primeiro
+    candidato aceito que chegar e que ainda não foi usado por outra query (nem está em `exclude`);
+    com `hash_index`, também não pode ser quase igual a uma imagem já escolhida, de vídeos recentes ou
+    de `exclude_hashes` (ex: as imagens já mantidas no vídeo).
+    """
+    queries = list(queries)
+    chosen = [None] * len(queries)
+    selection = _Selection(hash_index, exclude, exclude_hashes)
+    remaining = len(queries)
+
+    def on_candidates(index, provider, candidates):
+        nonlocal remaining
+        if chosen[index] is None:
+            for candidate in candidates:
+                if selection.add(candidate):
+                    chosen[index] = candidate
+                    remaining -= 1
+                    break
+        return remaining == 0
+
+    _race(queries, providers, per_query, timeout, on_candidates, accept=accept, screen=hash_index is not None)
+    missing = sum(1 for candidate in chosen if candidate is None)
+    if missing:
+        logger.warning(f"{missing} de {len(queries)} queries ficaram sem imagem.")
+    return chosen
@@ -1,9 +1,19 @@
-import requests
+import os
+import json
+import logging
+import threading
 from datetime import datetime
+from src.apis.http_client import http_get
+from src.config import NEWS_INDEX_FILE
+from src.utils.helpers import file_lock, write_json_atomic
+
+# Janela de notícias consideradas recentes (e de retenção dos IDs no índice)
+RECENT_NEWS_WINDOW_SECONDS = 7 * 24 * 60 * 60
 
 def fetch_bitcoin_news():
     try:
-        response = requests.get(
+        response = http_get(
+            "cryptocompare",
             "https://min-api.cryptocompare.com/data/v2/news/",
             params={"lang": "EN", "categories": "BTC,Bitcoin,Crypto,Blockchain"}
         )
@@ -11,7 +21,7 @@ def fetch_bitcoin_news():
         data = response.json().get("Data", [])
         
         # Filtrar notícias recentes (últimos 7 dias)
-        one_week_ago = datetime.now().timestamp() - (7 * 24 * 60 * 60)
+        one_week_ago = datetime.now().timestamp() - RECENT_NEWS_WINDOW_SECONDS
         recent_news = [
             item for item in data
             if item.get("published_on", 0) > one_week_ago
@@ -21,4 +31,64 @@ def fetch_bitcoin_news():
         return recent_news
     except Exception as e:
         print(f"Erro ao buscar notícias: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+class NewsIndex:
+    """
+    Índice persistente das notícias já vistas: ID -> published_on.
+    Permite que o polling devolva apenas as notícias novas desde a última execução.
+    Várias instâncias (threads dos workers de renderização, o polling e o app) podem gravar ao mesmo
+    tempo: cada gravação relê o arquivo e mescla as entradas sob uma trava entre processos.
+    """
+
+    def __init__(self, index_file=NEWS_INDEX_FILE):
+        self.index_file = index_file
+        self.seen = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def _read(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {str(news_id): ts for news_id, ts in data.get("seen", {}).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning(f"Índice de notícias ilegível ({self.index_file}): {e}. Começando do zero.")
+            return {}
+
+    def load(self):
+        seen = self._read()
+        with self._lock:
+            self.seen = seen
+
+    def save(self, new_entries=None):
+        """Mescla `new_entries` (ID -> published_on) e as entradas em memória com as do arquivo e grava."""
+        with file_lock(self.index_file):
+            with self._lock:
+                seen = {**self._read(), **self.seen, **(new_entries or {})}
+                # IDs fora da janela de notícias recentes não voltam mais no feed: podem sair do índice
+                cutoff = datetime.now().timestamp() - RECENT_NEWS_WINDOW_SECONDS
+                self.seen = {news_id: ts for news_id, ts in seen.items() if ts > cutoff}
+                write_json_atomic(self.index_file, {"seen": self.seen})
+
+    def is_new(self, item):
+        return str(item.get("id")) not in self.seen
+
+    def mark_seen(self, items):
+        """Registra as notícias como processadas e persiste o índice."""
+        self.save({str(item.get("id")): item.get("published_on", 0) for item in items})
+
+
+def fetch_new_bitcoin_news(index):
+    """
+    Busca o feed e retorna apenas as notícias que ainda não estão no `index`, da mais antiga para a mais nova.
+    O índice NÃO é atualizado aqui: quem processa as notícias chama `index.mark_seen` depois do sucesso,
+    para que falhas voltem a aparecer no próximo polling.
+    """
+    new_items = [item for item in fetch_bitcoin_news() if index.is_new(item)]
+    new_items.sort(key=lambda item: item.get("published_on", 0))
+    logging.info(f"Notícias novas desde a última verificação: {len(new_items)}")
+    return new_items
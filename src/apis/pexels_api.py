@@ -1,10 +1,50 @@
-import requests
+import re
+from src.apis.http_client import http_get
+from src.apis.image_search import ImageCandidate
+from src.apis.search_cache import SearchCache, cached_search
 from src.config import PEXELS_API_KEY
 
+def search_pexels_candidates(query, per_page=15, page=1):
+    """
+    Executa uma única busca na API do Pexels e retorna ImageCandidate com a URL "large" e a
+    miniatura "tiny" de cada foto. Os resultados ficam no cache de buscas, então consultas
+    repetidas não gastam a cota da API.
+    """
+    def fetch():
+        response = http_get(
+            "pexels",
+            "https://api.pexels.com/v1/search",
+            headers={"Authorization": PEXELS_API_KEY},
+            params={"query": query, "per_page": per_page, "page": page}
+        )
+        if response.status_code != 200:
+            return []
+        photos = response.json().get("photos", [])
+        return [[photo["src"]["large"], photo["src"].get("tiny")] for photo in photos]
+
+    key = SearchCache.make_key(query, per_page=per_page, page=page, fields="large,tiny")
+    return [ImageCandidate(url, thumbnail, "pexels") for url, thumbnail in cached_search("pexels", key, fetch)]
+
+def search_pexels_query(query, per_page=15, page=1):
+    """Como `search_pexels_candidates`, mas retorna apenas as URLs "large"."""
+    return [candidate.url for candidate in search_pexels_candidates(query, per_page=per_page, page=page)]
+
+# Lista expandida de termos irrelevantes para filtragem
+IRRELEVANT_KEYWORDS = [
+    "bikini", "beach", "model", "fashion", "wedding", "party", "celebration",
+    "vacation", "swimsuit", "woman", "man", "portrait", "people", "person",
+    "dance", "dancer", "dancing", "girl", "boy", "kid", "child", "baby", 
+    "animal", "pet", "dog", "cat", "food", "meal", "restaurant", "cooking",
+    "kitchen", "bedroom", "bathroom", "travel", "holiday", "tourist", "selfie",
+    "makeup", "beauty", "cosmetic", "sport", "game", "play", "athlete",
+    "concert", "music", "band", "singer", "actor", "actress", "movie", "cinema",
+    "drink", "alcohol", "bar", "club", "pub", "flower", "plant", "landscape",
+    "mountain", "lake", "ocean", "sea", "river", "forest", "tree", "garden",
+    "park", "farm", "farmer", "countryside", "castle", "landmark", "building"
+]
+IRRELEVANT_KEYWORDS_RE = re.compile("|".join(re.escape(keyword) for keyword in IRRELEVANT_KEYWORDS))
+
 def search_images(title, tags):
-    headers = {"Authorization": PEXELS_API_KEY}
-    all_images = []
-    
     # Lista específica de termos relacionados a criptomoedas para enriquecer a busca
     crypto_terms = [
         "cryptocurrency", "bitcoin", "blockchain", "crypto", "fintech", 
@@ -55,60 +95,18 @@ def search_images(title, tags):
     
     print(f"Termos de busca: {search_terms}")  # Log para depuração
     
-    # Buscar imagens com termos combinados primeiro
+    # Termos combinados primeiro, depois cada termo individual; todas as buscas (em todos os
+    # provedores configurados) rodam em paralelo e param quando houver imagens relevantes suficientes
+    # Quase duplicatas (mesma foto em outro provedor ou já usada em vídeos recentes) são descartadas
+    # pelo hash perceptual das miniaturas, antes de qualquer download em resolução cheia
+    from src.apis.image_search import search_images_all_providers
+    from src.utils.image_hash import PerceptualHashIndex
     combined_query = " ".join(search_terms[:2])  # Combinar os primeiros dois termos
-    try:
-        response = requests.get(
-            "https://api.pexels.com/v1/search",
-            headers=headers,
-            params={"query": combined_query, "per_page": 25, "page": 1}
-        )
-        if response.status_code == 200:
-            photos = response.json().get("photos", [])
-            image_urls = [photo["src"]["large"] for photo in photos]
-            all_images.extend(image_urls)
-    except Exception as e:
-        print(f"Erro na busca combinada: {e}")
-    
-    # Buscar por cada termo individual
-    for term in search_terms:
-        if len(all_images) >= 50:
-            break  # Já temos imagens suficientes
-            
-        try:
-            response = requests.get(
-                "https://api.pexels.com/v1/search",
-                headers=headers,
-                params={"query": term, "per_page": 15, "page": 1}
-            )
-            if response.status_code == 200:
-                photos = response.json().get("photos", [])
-                image_urls = [photo["src"]["large"] for photo in photos]
-                all_images.extend(image_urls)
-        except Exception as e:
-            print(f"Erro ao buscar imagens para '{term}': {e}")
-            continue
-    
-    # Lista expandida de termos irrelevantes para filtragem
-    irrelevant_keywords = [
-        "bikini", "beach", "model", "fashion", "wedding", "party", "celebration",
-        "vacation", "swimsuit", "woman", "man", "portrait", "people", "person",
-        "dance", "dancer", "dancing", "girl", "boy", "kid", "child", "baby", 
-        "animal", "pet", "dog", "cat", "food", "meal", "restaurant", "cooking",
-        "kitchen", "bedroom", "bathroom", "travel", "holiday", "tourist", "selfie",
-        "makeup", "beauty", "cosmetic", "sport", "game", "play", "athlete",
-        "concert", "music", "band", "singer", "actor", "actress", "movie", "cinema",
-        "drink", "alcohol", "bar", "club", "pub", "flower", "plant", "landscape",
-        "mountain", "lake", "ocean", "sea", "river", "forest", "tree", "garden",
-        "park", "farm", "farmer", "countryside", "castle", "landmark", "building"
-    ]
-    
-    # Filtrar imagens irrelevantes
-    filtered_images = []
-    for url in all_images:
-        url_lower = url.lower()
-        if not any(keyword in url_lower for keyword in irrelevant_keywords):
-            filtered_images.append(url)
+    candidates = search_images_all_providers(
+        [combined_query] + search_terms, wanted=10, per_query=15, accept=is_relevant_image,
+        hash_index=PerceptualHashIndex()
+    )
+    filtered_images = [candidate.url for candidate in candidates]
     
     # Se ficamos sem imagens após a filtragem, adicionar alguns fallbacks específicos
     if not filtered_images:
@@ -124,7 +122,6 @@ def search_images(title, tags):
 
 def is_relevant_image(image_url):
     """
-    Este método está sendo mantido para compatibilidade, mas não é mais usado.
-    A filtragem é feita diretamente na função search_images.
+    Retorna False se a URL contiver algum termo de IRRELEVANT_KEYWORDS (pessoas, lazer, natureza etc.).
     """
-    return True
\ No newline at end of file
+    return IRRELEVANT_KEYWORDS_RE.search(image_url.lower()) is None
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from src.config import SEARCH_CACHE_DB, SEARCH_CACHE_PURGE_SECONDS, SEARCH_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class SearchCache:
+    """
+    Cache persistente (SQLite) de resultados de busca de imagens: (provedor, consulta) -> lista de URLs.
+    Cada provedor tem seu próprio TTL e os acertos/erros ficam registrados por provedor na tabela `stats`.
+    As entradas expiradas são removidas no máximo a cada `purge_seconds` (ver `_maybe_purge`).
+    """
+
+    def __init__(self, db_path=SEARCH_CACHE_DB, ttl=None, purge_seconds=SEARCH_CACHE_PURGE_SECONDS):
+        self.db_path = db_path
+        self.ttl = dict(SEARCH_CACHE_TTL, **(ttl or {}))
+        self.purge_seconds = purge_seconds
+        self._next_purge_check = 0.0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " provider TEXT NOT NULL, query TEXT NOT NULL, urls TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (provider, query))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stats ("
+                " provider TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+        self._maybe_purge()
+
+    def _connect(self):
+        # Conexões SQLite não podem ser compartilhadas entre threads: uma por thread (e por processo)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def make_key(query, **params):
+        """Normaliza a consulta (e parâmetros que alteram o resultado) em uma chave estável."""
+        key = " ".join(query.lower().split())
+        if params:
+            key += "|" + json.dumps(params, sort_keys=True)
+        return key
+
+    def _record(self, conn, provider, column):
+        conn.execute("INSERT OR IGNORE INTO stats (provider) VALUES (?)", (provider,))
+        conn.execute(f"UPDATE stats SET {column} = {column} + 1 WHERE provider = ?", (provider,))
+
+    def get(self, provider, key):
+        """Retorna a lista de URLs em cache, ou None se não houver entrada válida (dentro do TTL)."""
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                "SELECT urls, created_at FROM results WHERE provider = ? AND query = ?", (provider, key)
+            ).fetchone()
+            ttl = self.ttl.get(provider, self.ttl.get("default", 0))
+            if row and time.time() - row[1] < ttl:
+                self._record(conn, provider, "hits")
+                logger.info(f"Busca '{key}' ({provider}) encontrada no cache.")
+                return json.loads(row[0])
+            self._record(conn, provider, "misses")
+        return None
+
+    def set(self, provider, key, urls):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (provider, query, urls, created_at) VALUES (?, ?, ?, ?)",
+                (provider, key, json.dumps(urls), time.time()),
+            )
+        self._maybe_purge()
+
+    def stats(self):
+        """Retorna {provedor: {"hits": n, "misses": n}}."""
+        rows = self._connect().execute("SELECT provider, hits, misses FROM stats").fetchall()
+        return {provider: {"hits": hits, "misses": misses} for provider, hits, misses in rows}
+
+    def purge_expired(self):
+        """Remove as entradas cujo TTL já expirou. Retorna quantas foram removidas."""
+        conn = self._connect()
+        now = time.time()
+        removed = 0
+        with conn:
+            for (provider,) in conn.execute("SELECT DISTINCT provider FROM results").fetchall():
+                ttl = self.ttl.get(provider, self.ttl.get("default", 0))
+                removed += conn.execute(
+                    "DELETE FROM results WHERE provider = ? AND created_at < ?", (provider, now - ttl)
+                ).rowcount
+        return removed
+
+    def _maybe_purge(self):
+        # Limpa as entradas expiradas se a última limpeza (de qualquer processo, ver tabela `meta`) tiver
+        # mais de `purge_seconds`; entre uma verificação e outra não consulta o banco
+        now = time.time()
+        if now < self._next_purge_check:
+            return
+        conn = self._connect()
+        with conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'last_purge'").fetchone()
+            if row and now - row[0] < self.purge_seconds:
+                self._next_purge_check = row[0] + self.purge_seconds
+                return
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_purge', ?)", (now,))
+        self._next_purge_check = now + self.purge_seconds
+        removed = self.purge_expired()
+        if removed:
+            logger.info(f"Cache de buscas: {removed} entradas expiradas removidas.")
+
+
+_default_cache = None
+
+
+def get_search_cache():
+    """Retorna a instância compartilhada do cache de buscas."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SearchCache()
+    return _default_cache
+
+
+def cached_search(provider, key, fetch):
+    """
+    Retorna o resultado em cache para (provider, key) ou executa `fetch()` e guarda o resultado.
+    Resultados vazios não são guardados, para que falhas temporárias não fiquem presas no cache.
+    """
+    cache = get_search_cache()
+    urls = cache.get(provider, key)
+    if urls is not None:
+        return urls
+    urls = fetch()
+    if urls:
+        cache.set(provider, key, urls)
+    return urls
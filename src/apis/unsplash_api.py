@@ -1,5 +1,8 @@
 import requests
 import os
+from src.apis.http_client import http_get
+from src.apis.image_search import ImageCandidate
+from src.apis.search_cache import SearchCache, cached_search
 from src.config import UNSPLASH_ACCESS_KEY
 
 class UnsplashAPI:
@@ -7,18 +10,27 @@ class UnsplashAPI:
         self.access_key = access_key
         self.api_url = "https://api.unsplash.com/"
 
-    def search_photos(self, query, orientation="landscape", count=10):
+    def search_photo_candidates(self, query, orientation="landscape", count=10):
+        """Busca fotos e retorna ImageCandidate com a URL "regular" e a miniatura "thumb" de cada uma."""
         endpoint = f"{self.api_url}search/photos"
         headers = {"Authorization": f"Client-ID {self.access_key}"}
         params = {"query": query, "orientation": orientation, "per_page": count}
-        try:
-            response = requests.get(endpoint, headers=headers, params=params)
+        def fetch():
+            response = http_get("unsplash", endpoint, headers=headers, params=params)
             response.raise_for_status()
             data = response.json()
-            return [photo["urls"]["regular"] for photo in data["results"]]
+            return [[photo["urls"]["regular"], photo["urls"].get("thumb")] for photo in data["results"]]
+
+        key = SearchCache.make_key(query, orientation=orientation, count=count, fields="regular,thumb")
+        try:
+            results = cached_search("unsplash", key, fetch)
         except requests.exceptions.RequestException as e:
             print(f"Unsplash API request failed: {e}")
             return []
+        return [ImageCandidate(url, thumbnail, "unsplash") for url, thumbnail in results]
+
+    def search_photos(self, query, orientation="landscape", count=10):
+        return [candidate.url for candidate in self.search_photo_candidates(query, orientation, count)]
 
 if __name__ == '__main__':
     # Example Usage (replace with your actual access key)
@@ -1,18 +1,50 @@
+import http.client
+import logging
 import os
 import pickle
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
+from src.config import (
+    YOUTUBE_CLIENT_SECRETS_FILE, YOUTUBE_TOKEN_FILE, YOUTUBE_API_ENDPOINT, YOUTUBE_PRIVACY_STATUS,
+    YOUTUBE_UPLOAD_CHUNK_BYTES, YOUTUBE_UPLOAD_MAX_RETRIES, YOUTUBE_UPLOAD_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
 # Escopo necessário para upload de vídeos no YouTube
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
 
-def get_authenticated_service():
+# Falhas transitórias do upload: o bloco é reenviado a partir do último byte confirmado pelo servidor
+RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+RETRIABLE_EXCEPTIONS = (
+    httplib2.HttpLib2Error, IOError, http.client.NotConnected, http.client.IncompleteRead,
+    http.client.ImproperConnectionState, http.client.CannotSendRequest, http.client.CannotSendHeader,
+    http.client.ResponseNotReady, http.client.BadStatusLine,
+)
+MAX_BACKOFF_SECONDS = 60
+
+_credentials = None
+_credentials_lock = threading.Lock()
+# Um cliente da API por thread: o httplib2 por baixo dele não é thread-safe
+_local = threading.local()
+
+
+def load_credentials(token_file=YOUTUBE_TOKEN_FILE, client_secrets_file=YOUTUBE_CLIENT_SECRETS_FILE):
     creds = None
     # O arquivo token.pickle armazena o acesso do usuário e atualiza tokens
-    if os.path.exists("token.pickle"):
-        with open("token.pickle", "rb") as token:
+    if os.path.exists(token_file):
+        with open(token_file, "rb") as token:
             creds = pickle.load(token)
     # Se não houver credenciais válidas, faça o login
     if not creds or not creds.valid:
@@ -20,32 +52,154 @@ def get_authenticated_service():
             creds.refresh(Request())
         else:
             # Certifique-se de que o arquivo client_secrets.json existe
-            if not os.path.exists("client_secrets.json"):
-                raise FileNotFoundError("Arquivo 'client_secrets.json' não encontrado. Baixe as credenciais OAuth2 no Google Cloud Console.")
-            
+            if not os.path.exists(client_secrets_file):
+                raise FileNotFoundError(f"Arquivo '{client_secrets_file}' não encontrado. Baixe as credenciais OAuth2 no Google Cloud Console.")
+
             flow = InstalledAppFlow.from_client_secrets_file(
-                "client_secrets.json", SCOPES
+                client_secrets_file, SCOPES
             )
             creds = flow.run_local_server(port=0)
         # Salve as credenciais para a próxima execução
-        with open("token.pickle", "wb") as token:
+        with open(token_file, "wb") as token:
             pickle.dump(creds, token)
-    return build("youtube", "v3", credentials=creds)
+    return creds
 
-def upload_to_youtube(video_file, title, description):
-    youtube = get_authenticated_service()
+
+def get_credentials():
+    """
+    Credenciais OAuth carregadas uma única vez por processo e compartilhadas entre as threads.
+    Depois disso o token de acesso é renovado automaticamente pelo cliente quando expira.
+    """
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials = load_credentials()
+        return _credentials
+
+
+def get_authenticated_service(api_endpoint=YOUTUBE_API_ENDPOINT, credentials=None):
+    """
+    Cliente da API do YouTube, construído uma vez por thread e reaproveitado nos uploads seguintes.
+    `api_endpoint` troca o servidor da API (ex: um servidor local de testes, YOUTUBE_API_ENDPOINT).
+    Com `credentials` explícitas (ex: `google.auth.credentials.AnonymousCredentials()` para o servidor
+    local) um cliente novo é construído, fora do cache.
+    """
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+    if credentials is None and api_endpoint in services:
+        return services[api_endpoint]
+
+    client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+    # Documento de descoberta embutido na biblioteca: nenhuma requisição extra ao construir o cliente
+    service = build("youtube", "v3", credentials=credentials or get_credentials(),
+                    client_options=client_options, cache_discovery=False)
+    if credentials is None:
+        services[api_endpoint] = service
+    return service
+
+
+def _upload_uri(uri, api_endpoint):
+    """
+    URL de upload apontada para `api_endpoint`. A biblioteca só troca o host da URL de upload pelo do endpoint
+    e mantém o https, o que não funciona com um servidor local em http.
+    """
+    endpoint = urllib.parse.urlparse(api_endpoint)
+    return urllib.parse.urlunparse(urllib.parse.urlparse(uri)._replace(scheme=endpoint.scheme, netloc=endpoint.netloc))
+
+
+def upload_video(video_file, title, description, tags=("Bitcoin", "Notícias"), category_id="25",
+                 privacy_status=YOUTUBE_PRIVACY_STATUS, progress_callback=None, service=None,
+                 api_endpoint=YOUTUBE_API_ENDPOINT, chunk_size=YOUTUBE_UPLOAD_CHUNK_BYTES,
+                 max_retries=YOUTUBE_UPLOAD_MAX_RETRIES):
+    """
+    Envia o vídeo com um upload resumível, em blocos de `chunk_size` bytes (múltiplo de 256 KB).
+    Se um bloco falhar por erro de rede ou 5xx, o upload continua do último byte confirmado pelo
+    servidor (com backoff exponencial), em vez de recomeçar do zero; `max_retries` falhas seguidas
+    no mesmo ponto desistem do upload.
+    `progress_callback(percentual, mensagem)`, se informado, recebe o progresso de 0 a 100.
+    `service` (de `get_authenticated_service`) deve ter sido construído com o mesmo `api_endpoint`.
+    Retorna a resposta da API (o ID do vídeo fica em `response["id"]`).
+    """
+    youtube = service or get_authenticated_service(api_endpoint)
+    report = progress_callback or (lambda percent, message: None)
     request = youtube.videos().insert(
         part="snippet,status",
         body={
             "snippet": {
                 "title": title,
                 "description": description,
-                "tags": ["Bitcoin", "Notícias"],
-                "categoryId": "25"  # Categoria Notícias
+                "tags": list(tags),
+                "categoryId": category_id  # 25 = Notícias
             },
-            "status": {"privacyStatus": "public"}
+            "status": {"privacyStatus": privacy_status}
         },
-        media_body=MediaFileUpload(video_file)
+        media_body=MediaFileUpload(video_file, mimetype="video/mp4", chunksize=chunk_size, resumable=True)
     )
-    response = request.execute()
-    return response
\ No newline at end of file
+    if api_endpoint:
+        request.uri = _upload_uri(request.uri, api_endpoint)
+
+    logger.info(f"Enviando '{video_file}' ao YouTube ({os.path.getsize(video_file)} bytes)...")
+    report(0, "Enviando vídeo ao YouTube...")
+    response = None
+    failures = 0
+    while response is None:
+        try:
+            status, response = request.next_chunk()
+        except HttpError as e:
+            if e.resp.status not in RETRIABLE_STATUS_CODES:
+                raise
+            error = e
+        except RETRIABLE_EXCEPTIONS as e:
+            error = e
+        else:
+            failures = 0
+            if status is not None:
+                report(int(status.progress() * 100),
+                       f"Enviando vídeo ao YouTube... {status.resumable_progress}/{status.total_size} bytes")
+            continue
+
+        failures += 1
+        if failures > max_retries:
+            raise RuntimeError(f"Upload de '{video_file}' abandonado após {max_retries} tentativas: {error}") from error
+        delay = min(MAX_BACKOFF_SECONDS, 2 ** failures) * random.uniform(0.5, 1.0)
+        logger.warning(f"Falha no upload de '{video_file}' ({error}). Retomando em {delay:.1f}s "
+                       f"(tentativa {failures}/{max_retries}).")
+        time.sleep(delay)
+
+    if "id" not in response:
+        raise RuntimeError(f"Upload concluído sem ID de vídeo na resposta: {response}")
+    report(100, "Vídeo enviado ao YouTube.")
+    logger.info(f"Vídeo enviado ao YouTube: {video_file} -> {response['id']}")
+    return response
+
+
+def upload_to_youtube(video_file, title, description):
+    return upload_video(video_file, title, description)
+
+
+class UploadQueue:
+    """
+    Fila de uploads com no máximo `workers` envios simultâneos. Cada thread do pool reaproveita o seu
+    cliente da API entre os uploads.
+
+        with UploadQueue() as uploads:
+            future = uploads.submit(video_file, title, description)
+        video_id = future.result()["id"]
+    """
+
+    def __init__(self, workers=YOUTUBE_UPLOAD_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="youtube_upload")
+
+    def submit(self, video_file, title, description, **kwargs):
+        """Enfileira um upload (argumentos de `upload_video`) e retorna um Future com a resposta da API."""
+        return self._executor.submit(upload_video, video_file, title, description, **kwargs)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
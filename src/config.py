@@ -10,6 +10,17 @@ YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
 YOUTUBE_CLIENT_ID = os.getenv('YOUTUBE_CLIENT_ID')
 YOUTUBE_CLIENT_SECRET = os.getenv('YOUTUBE_CLIENT_SECRET')
 
+# Upload para o YouTube: arquivos de credenciais OAuth, servidor alternativo da API (ex: um servidor local de testes;
+# vazio usa o do Google), privacidade dos vídeos, blocos do upload resumível (múltiplo de 256 KB),
+# tentativas seguidas por bloco e uploads simultâneos
+YOUTUBE_CLIENT_SECRETS_FILE = os.getenv('YOUTUBE_CLIENT_SECRETS_FILE', 'client_secrets.json')
+YOUTUBE_TOKEN_FILE = os.getenv('YOUTUBE_TOKEN_FILE', 'token.pickle')
+YOUTUBE_API_ENDPOINT = os.getenv('YOUTUBE_API_ENDPOINT') or None
+YOUTUBE_PRIVACY_STATUS = os.getenv('YOUTUBE_PRIVACY_STATUS', 'public')
+YOUTUBE_UPLOAD_CHUNK_BYTES = int(os.getenv('YOUTUBE_UPLOAD_CHUNK_MB', '8')) * 1024 * 1024
+YOUTUBE_UPLOAD_MAX_RETRIES = int(os.getenv('YOUTUBE_UPLOAD_MAX_RETRIES', '8'))
+YOUTUBE_UPLOAD_WORKERS = int(os.getenv('YOUTUBE_UPLOAD_WORKERS', '2'))
+
 UNSPLASH_APPLICATION_ID = os.getenv('UNSPLASH_APPLICATION_ID')
 UNSPLASH_ACCESS_KEY = os.getenv('UNSPLASH_ACCESS_KEY')
 UNSPLASH_SECRET_KEY = os.getenv('UNSPLASH_SECRET_KEY')
@@ -20,11 +31,136 @@ AUDIO_DIR = os.path.join(DATA_DIR, 'audio')
 IMAGES_DIR = os.path.join(DATA_DIR, 'images')
 VIDEOS_DIR = os.path.join(DATA_DIR, 'videos')
 
-# Criar diretórios se não existirem
-os.makedirs(AUDIO_DIR, exist_ok=True)
-os.makedirs(IMAGES_DIR, exist_ok=True)
-os.makedirs(VIDEOS_DIR, exist_ok=True)
+# Cache de imagens baixadas (já redimensionadas), endereçado pelo hash da URL
+IMAGE_CACHE_DIR = os.path.join(IMAGES_DIR, 'cache')
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_MB', '1024')) * 1024 * 1024
+# Após esse intervalo a entrada é revalidada com ETag/Last-Modified
+IMAGE_CACHE_REVALIDATE_SECONDS = int(os.getenv('IMAGE_CACHE_REVALIDATE_SECONDS', str(24 * 60 * 60)))
+# Downloads de imagens em resolução cheia são gravados no disco em blocos, com um tamanho máximo por imagem
+IMAGE_DOWNLOAD_CHUNK_BYTES = 64 * 1024
+IMAGE_DOWNLOAD_MAX_BYTES = int(os.getenv('IMAGE_DOWNLOAD_MAX_MB', '25')) * 1024 * 1024
+# Número de downloads/redimensionamentos simultâneos no pré-carregamento de imagens
+IMAGE_PREFETCH_WORKERS = int(os.getenv('IMAGE_PREFETCH_WORKERS', '8'))
+
+# Texto para fala: motor ('gtts' online ou 'pyttsx3' offline), síntese por frases em paralelo
+# (TTS_CHUNKED=1) e número de frases sintetizadas ao mesmo tempo
+TTS_ENGINE = os.getenv('TTS_ENGINE', 'gtts')
+TTS_CHUNKED = os.getenv('TTS_CHUNKED', '1') == '1'
+TTS_WORKERS = int(os.getenv('TTS_WORKERS', '4'))
+# Cache de áudios sintetizados (frases e áudio completo), por hash de texto, idioma e motor
+TTS_CACHE_DIR = os.path.join(AUDIO_DIR, 'cache')
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# Codificação do vídeo final: backend ('writegear' = pipe direto para o FFmpeg, 'moviepy' = write_videofile)
+# e parâmetros do x264. VIDEO_THREADS=0 deixa o FFmpeg decidir; VIDEO_TUNE vazio não aplica -tune.
+VIDEO_ENCODER = os.getenv('VIDEO_ENCODER', 'writegear')
+VIDEO_PRESET = os.getenv('VIDEO_PRESET', 'medium')
+VIDEO_CRF = int(os.getenv('VIDEO_CRF', '23'))
+VIDEO_THREADS = int(os.getenv('VIDEO_THREADS', '0'))
+VIDEO_TUNE = os.getenv('VIDEO_TUNE', '')
+
+# Caminho rápido para vídeos de imagens estáticas: codifica direto com o FFmpeg (concat + -tune stillimage)
+STILL_FAST_PATH = os.getenv('STILL_FAST_PATH', '1') == '1'
+STILL_ENCODER_PRESET = os.getenv('STILL_ENCODER_PRESET', 'veryfast')
+STILL_ENCODER_CRF = int(os.getenv('STILL_ENCODER_CRF', '23'))
+
+# Perfis de renderização: 'final' (qualidade de publicação) e 'preview' (prévia rápida para o app).
+# 'formats' são os formatos gerados quando o chamador não pede outros: só o vídeo 16:9, porque cada formato
+# extra tem o seu próprio encode (ex: OUTPUT_FORMATS=landscape,vertical,thumbnail ou --formats no modo batch)
+# preset/crf None usam os padrões do encoder (STILL_ENCODER_* no caminho rápido, VIDEO_* no MoviePy/WriteGear)
+RENDER_PROFILES = {
+    'final': {
+        'size': (1920, 1080), 'fps': 24, 'preset': None, 'crf': None,
+        'formats': [f.strip() for f in os.getenv('OUTPUT_FORMATS', 'landscape').split(',') if f.strip()],
+    },
+    'preview': {
+        'size': (int(os.getenv('PREVIEW_WIDTH', '640')), int(os.getenv('PREVIEW_HEIGHT', '360'))),
+        'fps': int(os.getenv('PREVIEW_FPS', '12')),
+        'preset': 'ultrafast',
+        'crf': int(os.getenv('PREVIEW_CRF', '30')),
+        'formats': ['landscape'],
+    },
+}
+
+# Formatos gerados de uma vez a partir da mesma linha do tempo (lista 'formats' de cada perfil): cada um recorta
+# a sua proporção do centro de cada imagem decodificada, antes da redução e do zoom, com o tamanho dado para a
+# altura de 1080 (o perfil 'preview' reduz na mesma proporção) e salvo como <vídeo><sufixo>. Com formatos além do
+# 'landscape' as imagens baixadas não são recortadas em 16:9. 'thumbnail' é uma imagem JPEG de um quadro escolhido.
+OUTPUT_FORMATS = {
+    'landscape': {'size': (1920, 1080), 'suffix': '.mp4', 'kind': 'video'},
+    'vertical': {'size': (1080, 1920), 'suffix': '_vertical.mp4', 'kind': 'video'},
+    'thumbnail': {'size': (1280, 720), 'suffix': '_thumb.jpg', 'kind': 'image'},
+}
+
+# Fila de renderizações do app (arquivos JSON em RENDER_JOBS_DIR). RENDER_JOB_WORKERS workers rodam dentro do
+# processo do Streamlit; 0 deixa o trabalho só para workers externos (python -m src.utils.render_jobs --workers N)
+RENDER_JOBS_DIR = os.path.join(DATA_DIR, 'jobs')
+RENDER_JOB_WORKERS = int(os.getenv('RENDER_JOB_WORKERS', '2'))
+RENDER_JOB_POLL_SECONDS = float(os.getenv('RENDER_JOB_POLL_SECONDS', '1'))
+# Trabalho em execução cujo worker parou (processo morto, ou sem sinal de vida há RENDER_JOB_STALE_SECONDS)
+# volta para a fila. Trabalhos concluídos ou com falha vão para RENDER_JOBS_DIR/finished e são apagados
+# depois de RENDER_JOB_RETENTION_SECONDS
+RENDER_JOB_STALE_SECONDS = float(os.getenv('RENDER_JOB_STALE_SECONDS', '300'))
+RENDER_JOB_RETENTION_SECONDS = float(os.getenv('RENDER_JOB_RETENTION_SECONDS', str(24 * 60 * 60)))
+
+# Memoização das etapas da renderização: saídas pequenas (queries, imagens escolhidas) em BUILD_CACHE_DIR,
+# endereçadas pelo hash das entradas; áudio e vídeo ganham um carimbo <arquivo>.build.json ao lado
+BUILD_CACHE_ENABLED = os.getenv('BUILD_CACHE_ENABLED', '1') == '1'
+BUILD_CACHE_DIR = os.path.join(DATA_DIR, 'build_cache')
+BUILD_CACHE_MAX_BYTES = int(os.getenv('BUILD_CACHE_MAX_MB', '64')) * 1024 * 1024
+
+# Rastreamento por etapas: um trace JSON por vídeo em TRACES_DIR e uma linha de resumo por vídeo em METRICS_FILE
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', '1') == '1'
+TRACES_DIR = os.path.join(DATA_DIR, 'traces')
+METRICS_FILE = os.path.join(DATA_DIR, 'render_metrics.jsonl')
+# Intervalo (s) da amostragem de memória (RSS) enquanto há spans ativos
+TRACE_RSS_SAMPLE_SECONDS = float(os.getenv('TRACE_RSS_SAMPLE_SECONDS', '0.05'))
+
+# Qualidade da reamostragem do efeito Ken Burns: 'fast', 'bilinear' ou 'lanczos'
+KEN_BURNS_QUALITY = os.getenv('KEN_BURNS_QUALITY', 'bilinear')
+
+# Índice persistente das notícias já vistas (usado pelo modo polling)
+NEWS_INDEX_FILE = os.path.join(DATA_DIR, 'news_index.json')
+
+# Número de processos usados no modo batch (python -m src.main --batch)
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', str(os.cpu_count() or 2)))
+
+# Estado compartilhado dos limitadores de taxa (token buckets) entre todos os processos da máquina,
+# para que N workers do modo batch dividam a mesma cota de cada provedor em vez de multiplicá-la
+RATE_LIMIT_STATE_FILE = os.path.join(DATA_DIR, 'rate_limits.json')
+
+# Cache de resultados de busca de imagens (consulta -> URLs), com TTL em segundos por provedor
+SEARCH_CACHE_DB = os.path.join(DATA_DIR, 'search_cache.sqlite3')
+SEARCH_CACHE_TTL = {
+    'pexels': int(os.getenv('SEARCH_CACHE_TTL_PEXELS', str(7 * 24 * 60 * 60))),
+    'unsplash': int(os.getenv('SEARCH_CACHE_TTL_UNSPLASH', str(7 * 24 * 60 * 60))),
+    'google': int(os.getenv('SEARCH_CACHE_TTL_GOOGLE', str(24 * 60 * 60))),
+    'default': int(os.getenv('SEARCH_CACHE_TTL_DEFAULT', str(24 * 60 * 60))),
+}
+# Intervalo mínimo (s) entre limpezas das entradas expiradas (feitas ao abrir o cache e a cada gravação)
+SEARCH_CACHE_PURGE_SECONDS = int(os.getenv('SEARCH_CACHE_PURGE_SECONDS', str(6 * 60 * 60)))
+
+# Busca de imagens em vários provedores ao mesmo tempo: provedores habilitados (os sem chave são ignorados),
+# prazo total em segundos, buscas simultâneas e resultados pedidos por query a cada provedor
+IMAGE_SEARCH_PROVIDERS = [p.strip() for p in os.getenv('IMAGE_SEARCH_PROVIDERS', 'pexels,unsplash,google').split(',') if p.strip()]
+IMAGE_SEARCH_TIMEOUT = float(os.getenv('IMAGE_SEARCH_TIMEOUT', '15'))
+IMAGE_SEARCH_WORKERS = int(os.getenv('IMAGE_SEARCH_WORKERS', '8'))
+IMAGE_SEARCH_PER_QUERY = int(os.getenv('IMAGE_SEARCH_PER_QUERY', '5'))
+# Máximo de queries enviadas a cada provedor por busca (além da sua parte no rodízio, que garante uma busca por query)
+IMAGE_SEARCH_MAX_PER_PROVIDER = int(os.getenv('IMAGE_SEARCH_MAX_PER_PROVIDER', '6'))
+
+# Índice de hashes perceptuais (dHash das miniaturas) das imagens usadas nos vídeos recentes:
+# candidatas a até IMAGE_HASH_MAX_DISTANCE bits (de 64) de uma imagem já usada são descartadas
+IMAGE_HASH_INDEX_FILE = os.path.join(DATA_DIR, 'image_hash_index.json')
+IMAGE_HASH_MAX_DISTANCE = int(os.getenv('IMAGE_HASH_MAX_DISTANCE', '6'))
+IMAGE_HASH_HISTORY_SECONDS = int(os.getenv('IMAGE_HASH_HISTORY_DAYS', '7')) * 24 * 60 * 60
 
 
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-GOOGLE_CSE_ID = os.getenv('GOOGLE_CSE_ID')
\ No newline at end of file
+GOOGLE_CSE_ID = os.getenv('GOOGLE_CSE_ID')
+
+
+def ensure_data_dirs():
+    """Cria os diretórios de dados, se não existirem. Chamado ao iniciar uma renderização, não na importação."""
+    for directory in (AUDIO_DIR, IMAGES_DIR, VIDEOS_DIR, IMAGE_CACHE_DIR, TTS_CACHE_DIR, BUILD_CACHE_DIR):
+        os.makedirs(directory, exist_ok=True)
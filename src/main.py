@@ -1,35 +1,19 @@
 import os
-import re
+import json
+import time
+import argparse
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from src.apis.news_api import fetch_bitcoin_news
-from src.utils.text_to_speech import text_to_speech
-from src.utils.video_creator import create_video_synced
-from src.config import AUDIO_DIR, VIDEOS_DIR, IMAGES_DIR
-import random
-import nltk # Para o download de recursos
+from src.apis.news_api import fetch_bitcoin_news, fetch_new_bitcoin_news, NewsIndex
+from src.apis.search_cache import get_search_cache
+from src.pipeline import render_news_item
+from src.config import VIDEOS_DIR, BATCH_WORKERS, OUTPUT_FORMATS, ensure_data_dirs
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# --- Configuração do NLTK ---
-def setup_nltk_resources_cli():
-    resources = [("tokenizers/punkt", "punkt"), ("corpora/stopwords", "stopwords")]
-    for resource_path, resource_id in resources:
-        try:
-            nltk.data.find(resource_path)
-        except LookupError:
-            logging.info(f"Baixando recurso NLTK necessário: '{resource_id}'...")
-            nltk.download(resource_id, quiet=True)
-            logging.info(f"Recurso '{resource_id}' baixado.")
-setup_nltk_resources_cli()
-# --- Fim Configuração NLTK ---
+# Os recursos do NLTK e os módulos de mídia são carregados por `render_news_item`, só quando há o que renderizar
 
 
-def normalize_title_for_file_cli(title):
-    normalized = re.sub(r'[^\w\s-]', '', title).strip()
-    normalized = re.sub(r'[-\s]+', '_', normalized)
-    return normalized[:80]
-
 def main_cli():
     logging.info("Iniciando CryptoCaster CLI...")
     news_items = fetch_bitcoin_news()
@@ -37,58 +21,191 @@ def main_cli():
         logging.info("Nenhuma notícia encontrada. Encerrando.")
         return
 
-    os.makedirs(AUDIO_DIR, exist_ok=True)
-    os.makedirs(VIDEOS_DIR, exist_ok=True)
-    os.makedirs(IMAGES_DIR, exist_ok=True)
-
     # Processar apenas as X primeiras para teste CLI, ou todas
     num_news_to_process = min(len(news_items), 2) # Processa até 2 notícias
     logging.info(f"Processando {num_news_to_process} notícias...")
 
     for item in news_items[:num_news_to_process]:
-        news_title = item.get('title', "NoticiaDesconhecida")
-        news_id = str(item.get('id', f"cli_id_{random.randint(1000,9999)}"))
-        news_body = item.get("body", "")
-
-        try:
-            logging.info(f"Processando notícia: {news_title}")
-            
-            if not news_body:
-                 logging.warning(f"Notícia '{news_title}' não possui corpo. O vídeo pode ser menos informativo.")
-
-            full_text_for_video = news_title + ". " + news_body
+        render_news_item(item, lang='en', words_per_image=8) # Assumindo inglês
 
-            normalized_title = normalize_title_for_file_cli(news_title)
-            base_filename = f"{normalized_title}_{news_id}"
+    logging.info("Processo CLI CryptoCaster concluído.")
 
-            audio_file = os.path.join(AUDIO_DIR, f"{base_filename}.mp3")
-            video_output_file = os.path.join(VIDEOS_DIR, f"{base_filename}.mp4")
 
-            logging.info(f"Gerando áudio para '{news_title}' em {audio_file}...")
-            text_to_speech(full_text_for_video, audio_file, lang='en') # Assumindo inglês
-            if not os.path.exists(audio_file) or os.path.getsize(audio_file) == 0:
-                logging.error(f"Falha ao gerar áudio ou áudio vazio: {audio_file}")
+def batch_stage_summary(results):
+    """Tempo por etapa (média, p95, bytes e quadros) das renderizações deste batch, a partir de METRICS_FILE."""
+    from src.utils.tracing import load_metrics, summarize_metrics
+    trace_files = {r.get("trace_file") for r in results if r["status"] != "skipped" and r.get("trace_file")}
+    if not trace_files:
+        return {}
+    records = [record for record in load_metrics() if record.get("trace_file") in trace_files]
+    return summarize_metrics(records)
+
+
+def upload_record_path(video_file):
+    """Registro do upload ao lado do vídeo (ex: noticia.mp4 -> noticia.mp4.youtube.json)."""
+    return video_file + ".youtube.json"
+
+
+def read_upload_record(video_file):
+    """
+    Registro do upload do vídeo ({"status": "pending" | "failed" | "uploaded", ...}) ou None se este pipeline
+    nunca tentou enviá-lo. Registros antigos, só com "youtube_id", contam como enviados.
+    """
+    try:
+        with open(upload_record_path(video_file), "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if "status" not in record and record.get("youtube_id"):
+        record["status"] = "uploaded"
+    return record
+
+
+def write_upload_record(video_file, status, **fields):
+    from src.utils.helpers import write_json_atomic
+    write_json_atomic(upload_record_path(video_file),
+                      {"status": status, "updated_at": datetime.now().isoformat(timespec="seconds"), **fields})
+
+
+def upload_rendered(results, news_items):
+    """
+    Envia ao YouTube, em paralelo (YOUTUBE_UPLOAD_WORKERS por vez), os vídeos renderizados com sucesso e
+    os vídeos já existentes ("skipped") cujo upload este pipeline já tentou sem sucesso (registro "pending"
+    ou "failed"). Vídeos existentes sem registro nunca foram enfileirados para upload e não são enviados.
+    Grava em cada resultado o ID do vídeo ("youtube_id") ou o erro do upload ("upload_error") e mantém o
+    registro em `upload_record_path(vídeo)`: "pending" antes do envio, depois "uploaded" ou "failed".
+    """
+    from src.apis.youtube_api import UploadQueue
+    items_by_id = {str(item.get("id")): item for item in news_items}
+    with UploadQueue() as uploads:
+        futures = {}
+        for result in results:
+            if result["status"] == "skipped":
+                record = read_upload_record(result["video_file"])
+                if record is None or record["status"] == "uploaded":
+                    continue
+            elif result["status"] != "ok":
                 continue
-            logging.info(f"Áudio gerado: {audio_file}")
-
-            logging.info(f"Gerando vídeo para '{news_title}' em {video_output_file}...")
-            create_video_synced(
-                full_text=full_text_for_video,
-                audio_file=audio_file,
-                output_video_file=video_output_file,
-                news_title=news_title, # Passando o título da notícia
-                words_per_image=8
-            )
-            if not os.path.exists(video_output_file) or os.path.getsize(video_output_file) == 0:
-                 logging.error(f"Falha na criação do vídeo ou arquivo de vídeo vazio: {video_output_file}")
-                 continue
-            logging.info(f"Vídeo gerado com sucesso: {video_output_file}")
-
+            item = items_by_id.get(str(result["id"]), {})
+            description = f"{item.get('body', '')[:4000]}\n\n{item.get('url', '')}".strip()
+            # Gravado antes do envio: se o processo morrer no meio, o próximo batch ainda retenta o upload
+            write_upload_record(result["video_file"], "pending")
+            futures[uploads.submit(result["video_file"], result["title"][:100], description)] = result
+    for future, result in futures.items():
+        try:
+            result["youtube_id"] = future.result()["id"]
+            logging.info(f"[upload] {result['title']} -> {result['youtube_id']}")
         except Exception as e:
-            logging.error(f"Erro ao processar notícia ID {news_id} - Título: {news_title}: {e}", exc_info=True)
-            continue 
+            logging.error(f"Falha no upload de '{result['video_file']}': {e}", exc_info=True)
+            result["upload_error"] = str(e)
+            write_upload_record(result["video_file"], "failed", error=str(e))
+            continue
+        write_upload_record(result["video_file"], "uploaded", youtube_id=result["youtube_id"],
+                            uploaded_at=datetime.now().isoformat(timespec="seconds"))
+
+
+def main_batch(workers=BATCH_WORKERS, summary_file=None, skip_existing=True, news_items=None, upload=False,
+               formats=None):
+    """
+    Processa todas as notícias recentes do feed (ou `news_items`, se informado) em um pool de processos,
+    pulando as que já têm vídeo, e grava um resumo JSON com os tempos e falhas de cada notícia.
+    Com `upload`, os vídeos renderizados nesta execução (e os já existentes cujo upload falhou antes) são
+    enviados ao YouTube ao final. `formats` pede formatos de saída além do vídeo 16:9 (ver `render_news_item`).
+    """
+    logging.info(f"Iniciando CryptoCaster em modo batch com {workers} workers...")
+    started_on = datetime.now()
+    started_at = time.perf_counter()
+    if news_items is None:
+        news_items = fetch_bitcoin_news()
+    fetch_seconds = time.perf_counter() - started_at
+    if not news_items:
+        logging.info("Nenhuma notícia encontrada. Encerrando.")
+        return None
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(render_news_item, item, lang='en', words_per_image=8, skip_existing=skip_existing,
+                            formats=formats): item
+            for item in news_items
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e: # Ex: worker encerrado abruptamente
+                item = futures[future]
+                logging.error(f"Worker falhou para a notícia ID {item.get('id')}: {e}", exc_info=True)
+                result = {"id": item.get('id'), "title": item.get('title'), "status": "failed",
+                          "timings": {}, "error": str(e)}
+            logging.info(f"[{result['status']}] {result['title']}")
+            results.append(result)
+
+    if upload:
+        upload_rendered(results, news_items)
+
+    summary = {
+        "started_at": started_on.isoformat(timespec="seconds"),
+        "workers": workers,
+        "total_seconds": time.perf_counter() - started_at,
+        "fetch_seconds": fetch_seconds,
+        "stages": batch_stage_summary(results),
+        "search_cache": get_search_cache().stats(),
+        "counts": {status: sum(1 for r in results if r["status"] == status) for status in ("ok", "skipped", "failed")},
+        "items": results,
+    }
+    ensure_data_dirs()
+    if summary_file is None:
+        summary_file = os.path.join(VIDEOS_DIR, f"batch_summary_{started_on.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    logging.info(f"Batch concluído em {summary['total_seconds']:.1f}s: {summary['counts']}. Resumo em {summary_file}")
+    for stage, stats in summary["stages"].items():
+        logging.info(f"  {stage:<20} {stats['runs']:4d}x  média {stats['mean_seconds']:7.2f}s  p95 {stats['p95_seconds']:7.2f}s")
+    for provider, stats in summary["search_cache"].items():
+        logging.info(f"  cache de buscas {provider:<12} {stats['hits']:5d} acertos  {stats['misses']:5d} erros (acumulado)")
+    return summary
+
+
+def main_poll(interval, workers=BATCH_WORKERS, upload=False, formats=None):
+    """
+    Verifica o feed a cada `interval` segundos e renderiza apenas as notícias que ainda não estão
+    no índice de notícias vistas. Notícias que falharem continuam fora do índice e são tentadas de novo;
+    com `upload`, isso vale também para falhas no upload (o vídeo já renderizado é reaproveitado e só o
+    upload é refeito).
+    """
+    index = NewsIndex()
+    logging.info(f"Iniciando CryptoCaster em modo polling (intervalo de {interval}s)...")
+    while True:
+        new_items = fetch_new_bitcoin_news(index)
+        if new_items:
+            summary = main_batch(workers=workers, news_items=new_items, upload=upload, formats=formats)
+            done_ids = {str(r["id"]) for r in summary["items"]
+                        if r["status"] in ("ok", "skipped") and not (upload and "upload_error" in r)}
+            index.mark_seen([item for item in new_items if str(item.get("id")) in done_ids])
+        time.sleep(interval)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CryptoCaster - gerador de vídeos a partir de notícias de Bitcoin")
+    parser.add_argument("--batch", action="store_true", help="Processa todo o feed recente em paralelo")
+    parser.add_argument("--poll", type=int, metavar="SEGUNDOS", default=None,
+                        help="Verifica o feed periodicamente e renderiza apenas as notícias novas")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Número de processos nos modos batch/polling")
+    parser.add_argument("--summary", default=None, help="Caminho do resumo JSON do modo batch")
+    parser.add_argument("--no-skip-existing", action="store_true", help="Regera vídeos que já existem")
+    parser.add_argument("--upload", action="store_true", help="Envia ao YouTube os vídeos renderizados nos modos batch/polling")
+    parser.add_argument("--formats", nargs="+", choices=list(OUTPUT_FORMATS), default=None,
+                        help="Formatos de saída (ex: landscape vertical thumbnail); padrão: OUTPUT_FORMATS")
+    return parser.parse_args(argv)
 
-    logging.info("Processo CLI CryptoCaster concluído.")
 
 if __name__ == "__main__":
-    main_cli()
\ No newline at end of file
+    args = parse_args()
+    if args.poll:
+        main_poll(args.poll, workers=args.workers, upload=args.upload, formats=args.formats)
+    elif args.batch:
+        main_batch(workers=args.workers, summary_file=args.summary, skip_existing=not args.no_skip_existing,
+                   upload=args.upload, formats=args.formats)
+    else:
+        main_cli()
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import re
+import time
+import random
+import logging
+
+from src.config import AUDIO_DIR, VIDEOS_DIR, TRACES_DIR, TTS_CHUNKED, ensure_data_dirs
+from src.utils.tracing import trace, span
+
+
+def normalize_title_for_file(title):
+    normalized = re.sub(r'[^\w\s-]', '', title).strip()
+    normalized = re.sub(r'[-\s]+', '_', normalized)
+    return normalized[:80]
+
+
+def get_output_paths(item, profile="final"):
+    """
+    Retorna (base_filename, audio_file, video_file) de uma notícia, no formato
+    `{titulo_normalizado}_{news_id}`. Prévias (`profile="preview"`) vão para `{base}_preview.mp4`.
+    """
+    news_title = item.get('title', "NoticiaDesconhecida")
+    news_id = str(item.get('id', f"cli_id_{random.randint(1000,9999)}"))
+    base_filename = f"{normalize_title_for_file(news_title)}_{news_id}"
+    audio_file = os.path.join(AUDIO_DIR, f"{base_filename}.mp3")
+    suffix = "_preview" if profile == "preview" else ""
+    video_file = os.path.join(VIDEOS_DIR, f"{base_filename}{suffix}.mp4")
+    return base_filename, audio_file, video_file
+
+
+def render_news_item(item, lang='en', words_per_image=8, skip_existing=False, profile="final", progress_callback=None,
+                     formats=None):
+    """
+    Gera áudio e vídeo para uma notícia do feed.
+
+    Nunca levanta exceção: retorna um dicionário com o status ("ok", "skipped" ou "failed"),
+    os arquivos gerados, os tempos de cada etapa em segundos e a mensagem de erro, se houver.
+    Por isso pode ser usada diretamente como tarefa de um pool de processos.
+    `progress_callback(percentual, mensagem)`, se informado, recebe o progresso de 0 a 100.
+    `formats` (ex: ["landscape", "vertical", "thumbnail"]) pede formatos de saída além dos do perfil.
+    """
+    started_at = time.perf_counter()
+    news_title = item.get('title', "NoticiaDesconhecida")
+    news_body = item.get("body", "")
+    base_filename, audio_file, video_output_file = get_output_paths(item, profile)
+    report = progress_callback or (lambda percent, message: None)
+    result = {
+        "id": item.get('id'),
+        "title": news_title,
+        "video_file": video_output_file,
+        "status": "ok",
+        "timings": {},
+        "error": None,
+    }
+
+    if skip_existing and os.path.exists(video_output_file) and os.path.getsize(video_output_file) > 0:
+        logging.info(f"Vídeo já existe, pulando: {video_output_file}")
+        result["status"] = "skipped"
+        return result
+
+    # Trace por vídeo em TRACES_DIR (etapas, bytes, quadros, memória) e resumo em METRICS_FILE
+    trace_file = os.path.join(TRACES_DIR, f"{os.path.splitext(os.path.basename(video_output_file))[0]}.trace.json")
+    result["trace_file"] = trace_file
+    with trace("render", trace_file=trace_file, news_id=result["id"], title=news_title, profile=profile) as root:
+        try:
+            logging.info(f"Processando notícia: {news_title}")
+            if not news_body:
+                logging.warning(f"Notícia '{news_title}' não possui corpo. O vídeo pode ser menos informativo.")
+
+            # Módulos de mídia e NLP carregados só quando uma renderização começa
+            from src.utils.helpers import setup_nltk_resources
+            from src.utils.audio_alignment import word_index_path
+            from src.utils.build_cache import get_build_cache
+            from src.utils.text_to_speech import text_to_speech, get_tts_engine
+            from src.utils.video_creator import create_video_synced
+
+            ensure_data_dirs()
+            setup_nltk_resources()
+
+            full_text_for_video = news_title + ". " + news_body
+
+            stage_started_at = time.perf_counter()
+            report(5, "Passo 1/3: Gerando áudio...")
+            logging.info(f"Gerando áudio para '{news_title}' em {audio_file}...")
+            # O áudio (e o índice de palavras ao lado dele) só é regerado se o texto, o idioma ou o motor mudaram
+            build_cache = get_build_cache()
+            tts_inputs = {"text": full_text_for_video, "lang": lang, "engine": get_tts_engine().settings(),
+                          "chunked": TTS_CHUNKED}
+            with span("tts") as current:
+                if build_cache.is_built(audio_file, "tts", tts_inputs) and os.path.exists(word_index_path(audio_file)):
+                    logging.info(f"Áudio já gerado para este texto; reaproveitando: {audio_file}")
+                    if current is not None:
+                        current.attrs["cached"] = True
+                else:
+                    build_cache.invalidate(audio_file)
+                    text_to_speech(full_text_for_video, audio_file, lang=lang)
+                    build_cache.mark_built(audio_file, "tts", tts_inputs)
+            result["timings"]["audio"] = time.perf_counter() - stage_started_at
+            if not os.path.exists(audio_file) or os.path.getsize(audio_file) == 0:
+                raise RuntimeError(f"Falha ao gerar áudio ou áudio vazio: {audio_file}")
+            logging.info(f"Áudio gerado: {audio_file}")
+
+            stage_started_at = time.perf_counter()
+            logging.info(f"Gerando vídeo para '{news_title}' em {video_output_file}...")
+            report(30, "Áudio gerado. Passo 2/3: Preparando imagens...")
+            result["outputs"] = create_video_synced(
+                full_text=full_text_for_video,
+                audio_file=audio_file,
+                output_video_file=video_output_file,
+                news_title=news_title,
+                words_per_image=words_per_image,
+                profile=profile,
+                formats=formats,
+                # O vídeo ocupa de 30% a 100% do progresso total
+                progress_callback=lambda percent, message: report(30 + percent * 70 // 100, message)
+            )
+            result["timings"]["video"] = time.perf_counter() - stage_started_at
+            if not os.path.exists(video_output_file) or os.path.getsize(video_output_file) == 0:
+                raise RuntimeError(f"Falha na criação do vídeo ou arquivo de vídeo vazio: {video_output_file}")
+            logging.info(f"Vídeo gerado com sucesso: {video_output_file}")
+        except Exception as e:
+            logging.error(f"Erro ao processar notícia ID {result['id']} - Título: {news_title}: {e}", exc_info=True)
+            result["status"] = "failed"
+            result["error"] = str(e)
+            if root is not None:
+                root.error = str(e)
+
+    result["timings"]["total"] = time.perf_counter() - started_at
+    return result
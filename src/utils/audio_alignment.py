@@ -0,0 +1,93 @@
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WORD_INDEX_SUFFIX = ".words.npy"
+
+
+def word_index_path(audio_file):
+    """Caminho do índice de palavras guardado ao lado do áudio (ex: noticia.mp3 -> noticia.words.npy)."""
+    return os.path.splitext(audio_file)[0] + WORD_INDEX_SUFFIX
+
+
+def _distribute(words, start, duration):
+    # Dentro de um trecho, o tempo de cada palavra é proporcional ao seu número de caracteres
+    weights = np.array([len(word) + 1 for word in words], dtype=np.float64)
+    bounds = start + duration * np.concatenate([[0.0], np.cumsum(weights) / weights.sum()])
+    return np.stack([bounds[:-1], bounds[1:]], axis=1)
+
+
+def build_word_index(chunks):
+    """
+    Monta o índice de tempos por palavra a partir dos trechos do TTS (TTSChunk: texto e duração).
+    Retorna um array float32 (n_palavras, 2) com início e fim de cada palavra em segundos,
+    na mesma ordem de `" ".join(texto).split()`.
+    """
+    rows = []
+    start = 0.0
+    for chunk in chunks:
+        words = chunk.text.split()
+        if words:
+            rows.append(_distribute(words, start, chunk.duration))
+        start += chunk.duration
+    if not rows:
+        return np.zeros((0, 2), dtype=np.float32)
+    return np.concatenate(rows).astype(np.float32)
+
+
+def save_word_index(audio_file, index):
+    path = word_index_path(audio_file)
+    np.save(path, index)
+    return path
+
+
+def load_word_index(audio_file, expected_words=None):
+    """
+    Carrega o índice de palavras do áudio. Retorna None se ele não existir, estiver desatualizado
+    (mais antigo que o áudio) ou não tiver `expected_words` palavras.
+    """
+    path = word_index_path(audio_file)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(audio_file):
+            return None
+        index = np.load(path)
+    except (OSError, ValueError):
+        return None
+    if expected_words is not None and len(index) != expected_words:
+        logger.warning(f"Índice de palavras com {len(index)} palavras, esperado {expected_words}. Ignorando.")
+        return None
+    return index
+
+
+def estimate_word_index(words, duration):
+    """Índice aproximado quando não há tempos do TTS: distribui a duração total do áudio pelas palavras."""
+    if not words:
+        return np.zeros((0, 2), dtype=np.float32)
+    return _distribute(words, 0.0, duration).astype(np.float32)
+
+
+def rescale_word_index(index, duration):
+    """
+    Ajusta o índice à duração real do áudio: as durações do TTS somadas por trecho podem diferir do MP3
+    final (silêncio do codificador, arredondamento de quadros), e as imagens devem cobrir o áudio inteiro.
+    """
+    if len(index) == 0 or index[-1, 1] <= 0:
+        return index
+    return (index * (duration / float(index[-1, 1]))).astype(np.float32)
+
+
+def image_slots(index, words_per_image, total_duration=None):
+    """
+    Divide a linha do tempo em janelas de `words_per_image` palavras.
+    Retorna uma lista de (início, duração): a primeira começa em 0 e a última vai até `total_duration`
+    (por padrão, o fim da última palavra).
+    """
+    if len(index) == 0:
+        return [(0.0, float(total_duration or 0))]
+    total_duration = float(total_duration if total_duration is not None else index[-1, 1])
+    starts = [0.0] + [float(index[i, 0]) for i in range(words_per_image, len(index), words_per_image)]
+    ends = starts[1:] + [total_duration]
+    return [(start, end - start) for start, end in zip(starts, ends)]
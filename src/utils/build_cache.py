@@ -0,0 +1,135 @@
+"""
+Memoização das etapas da renderização (um grafo de build simples): a saída de cada etapa é guardada
+sob o hash da etapa e de todas as suas entradas (texto, idioma, words_per_image, resolução, fps...).
+Como as entradas de uma etapa incluem as saídas das anteriores, uma mudança invalida só as etapas
+que dependem dela:
+
+    texto -> áudio -> queries -> imagens escolhidas -> imagens baixadas -> vídeo
+
+Saídas pequenas (queries, candidatos escolhidos) ficam em BUILD_CACHE_DIR como JSON, com limite de
+tamanho por LRU. Arquivos grandes (áudio, vídeo) ficam onde já são gravados, com um carimbo
+`<arquivo>.build.json` ao lado (ex: noticia.mp4.build.json) registrando o hash das entradas que os geraram.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from src.config import BUILD_CACHE_ENABLED, BUILD_CACHE_DIR, BUILD_CACHE_MAX_BYTES
+from src.utils.helpers import evict_lru
+
+logger = logging.getLogger(__name__)
+
+STAMP_SUFFIX = ".build.json"
+
+
+def file_digest(path, block_size=1024 * 1024):
+    """SHA-256 do conteúdo do arquivo. O mtime não serve: os caches atualizam o mtime a cada acesso (LRU)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(stage, inputs):
+    """Hash da etapa e de suas entradas (qualquer estrutura serializável em JSON)."""
+    payload = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def stamp_path(output_file):
+    """Carimbo guardado ao lado do arquivo gerado (ex: noticia.mp4 -> noticia.mp4.build.json)."""
+    return output_file + STAMP_SUFFIX
+
+
+class BuildCache:
+    """Cache das saídas das etapas, endereçado por `make_key(etapa, entradas)`."""
+
+    def __init__(self, cache_dir=BUILD_CACHE_DIR, max_bytes=BUILD_CACHE_MAX_BYTES, enabled=BUILD_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        if enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}_{key}.json")
+
+    def get(self, stage, inputs):
+        """Saída guardada da etapa para estas entradas, ou None."""
+        if not self.enabled:
+            return None
+        path = self._path(stage, make_key(stage, inputs))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)["value"]
+            os.utime(path, None)
+        except (OSError, ValueError, KeyError):
+            return None
+        return value
+
+    def put(self, stage, inputs, value):
+        if not self.enabled:
+            return
+        path = self._path(stage, make_key(stage, inputs))
+        tmp_path = f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stage": stage, "value": value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            for removed in evict_lru(self.cache_dir, self.max_bytes, extensions=(".json",)):
+                logger.info(f"Artefato removido do cache de build (LRU): {removed}")
+
+    def memoize(self, stage, inputs, compute):
+        """
+        Retorna a saída guardada da etapa ou calcula `compute()` e a guarda. A saída precisa ser
+        serializável em JSON (tuplas voltam como listas) e não pode ser None.
+        """
+        value = self.get(stage, inputs)
+        if value is not None:
+            logger.info(f"Etapa '{stage}' reaproveitada do cache de build.")
+            return value
+        value = compute()
+        self.put(stage, inputs, value)
+        return value
+
+    def is_built(self, output_file, stage, inputs):
+        """True se `output_file` existe e foi gerado pela etapa com exatamente estas entradas."""
+        if not self.enabled or not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+            return False
+        try:
+            with open(stamp_path(output_file), "r", encoding="utf-8") as f:
+                return json.load(f).get("key") == make_key(stage, inputs)
+        except (OSError, ValueError):
+            return False
+
+    def invalidate(self, output_file):
+        """Remove o carimbo antes de regerar o arquivo, para que uma geração interrompida não pareça válida."""
+        try:
+            os.remove(stamp_path(output_file))
+        except FileNotFoundError:
+            pass
+
+    def mark_built(self, output_file, stage, inputs):
+        """Grava o carimbo de `output_file` depois que a etapa o gerou."""
+        if not self.enabled:
+            return
+        path = stamp_path(output_file)
+        tmp_path = f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stage": stage, "key": make_key(stage, inputs)}, f)
+        os.replace(tmp_path, path)
+
+
+_default_cache = None
+
+
+def get_build_cache():
+    """Retorna a instância compartilhada do cache de build."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = BuildCache()
+    return _default_cache
@@ -0,0 +1,217 @@
+import logging
+import operator
+import os
+
+from src.config import VIDEO_ENCODER, VIDEO_PRESET, VIDEO_CRF, VIDEO_THREADS, VIDEO_TUNE
+from src.utils.helpers import get_ffmpeg_binary
+from src.utils.tracing import add_frames, run_process, watch_process
+
+logger = logging.getLogger(__name__)
+
+
+def mux_audio(video_file, audio_file, output_file):
+    """Junta a faixa de vídeo (copiada, sem recodificar) com o áudio, cortando no mais curto dos dois."""
+    cmd = [
+        get_ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-i", video_file, "-i", audio_file,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
+        "-shortest", "-movflags", "+faststart",
+        output_file,
+    ]
+    run_process(cmd)
+
+
+def _ffmpeg_children():
+    """PIDs dos processos FFmpeg filhos deste processo (o WriteGear não expõe o seu publicamente)."""
+    import psutil
+    pids = set()
+    for child in psutil.Process().children():
+        try:
+            if "ffmpeg" in child.name().lower():
+                pids.add(child.pid)
+        except psutil.Error: # Terminou enquanto era inspecionado
+            continue
+    return pids
+
+
+def _watch_new_ffmpeg(known_pids):
+    """
+    Amostra no span atual a memória dos FFmpeg iniciados desde `known_pids` (o WriteGear só inicia o seu
+    no primeiro quadro). Retorna os PIDs atuais, para a próxima chamada.
+    """
+    pids = _ffmpeg_children()
+    for pid in pids - known_pids:
+        watch_process(pid)
+    return pids
+
+
+class MoviePyEncoder:
+    """Codificação pelo `write_videofile` do MoviePy (comportamento original, usado como fallback)."""
+
+    name = "moviepy"
+
+    def __init__(self, preset=VIDEO_PRESET, crf=VIDEO_CRF, threads=VIDEO_THREADS, tune=VIDEO_TUNE):
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.tune = tune
+
+    def encode(self, clip, output_file, fps=24, audio_file=None):
+        if audio_file and clip.audio is None:
+            from moviepy.editor import AudioFileClip
+            clip = clip.set_audio(AudioFileClip(audio_file))
+        ffmpeg_params = ["-crf", str(self.crf)]
+        if self.tune:
+            ffmpeg_params += ["-tune", self.tune]
+        clip.write_videofile(
+            output_file,
+            fps=fps,
+            codec="libx264",
+            preset=self.preset,
+            threads=self.threads or None,
+            ffmpeg_params=ffmpeg_params,
+        )
+        add_frames(int(clip.duration * fps))
+
+
+class WriteGearEncoder:
+    """
+    Envia os quadros RGB da linha do tempo direto para um pipe do FFmpeg via `vidgear.WriteGear`,
+    com preset/CRF/threads/tune do x264 configuráveis. O áudio é multiplexado depois, sem recodificar o vídeo.
+    """
+
+    name = "writegear"
+
+    def __init__(self, preset=VIDEO_PRESET, crf=VIDEO_CRF, threads=VIDEO_THREADS, tune=VIDEO_TUNE):
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.tune = tune
+
+    def output_params(self, fps):
+        params = {
+            "-input_framerate": fps,
+            "-vcodec": "libx264",
+            "-preset": self.preset,
+            "-crf": self.crf,
+            "-pix_fmt": "yuv420p",
+        }
+        if self.threads:
+            params["-threads"] = self.threads
+        if self.tune:
+            params["-tune"] = self.tune
+        return params
+
+    def open_writer(self, output_file, fps):
+        from vidgear.gears import WriteGear
+        return WriteGear(output=output_file, compression_mode=True, custom_ffmpeg=get_ffmpeg_binary(),
+                         logging=False, **self.output_params(fps))
+
+    def encode_frames(self, frames, output_file, fps=24, audio_file=None):
+        """Codifica um iterável de quadros RGB (uint8, HxWx3)."""
+        video_file = f"{os.path.splitext(output_file)[0]}.video.mp4" if audio_file else output_file
+        known_pids = _ffmpeg_children()
+        try:
+            writer = self.open_writer(video_file, fps)
+            try:
+                for index, frame in enumerate(frames):
+                    writer.write(frame, rgb_mode=True)
+                    if index == 0:
+                        _watch_new_ffmpeg(known_pids)
+                    add_frames()
+            finally:
+                writer.close()
+            if audio_file:
+                mux_audio(video_file, audio_file, output_file)
+        finally:
+            # A faixa temporária sem áudio não sobrevive nem a sucesso nem a erro
+            if audio_file and os.path.exists(video_file):
+                os.remove(video_file)
+
+    def encode(self, clip, output_file, fps=24, audio_file=None):
+        frames = clip.iter_frames(fps=fps, dtype="uint8", logger=None)
+        self.encode_frames(frames, output_file, fps=fps, audio_file=audio_file)
+
+    def encode_frames_multi(self, frames, outputs, fps=24, audio_file=None):
+        """
+        Codifica o mesmo fluxo de quadros em vários arquivos de uma vez, um WriteGear por saída:
+        cada quadro é gerado uma única vez e `transform(quadro)` extrai dele o quadro de cada saída (ex: o
+        item de cada formato, quando o fluxo traz uma tupla de quadros por instante).
+        `outputs` é uma lista de (arquivo, transform).
+        """
+        video_files = [f"{os.path.splitext(output_file)[0]}.video.mp4" if audio_file else output_file
+                       for output_file, _ in outputs]
+        known_pids = _ffmpeg_children()
+        try:
+            writers = []
+            try:
+                for video_file in video_files:
+                    writers.append(self.open_writer(video_file, fps))
+                for index, frame in enumerate(frames):
+                    for writer, (_, transform) in zip(writers, outputs):
+                        writer.write(transform(frame), rgb_mode=True)
+                        add_frames()
+                    if index == 0:
+                        _watch_new_ffmpeg(known_pids)
+            finally:
+                for writer in writers:
+                    writer.close()
+            if audio_file:
+                for video_file, (output_file, _) in zip(video_files, outputs):
+                    mux_audio(video_file, audio_file, output_file)
+        finally:
+            if audio_file:
+                for video_file in video_files:
+                    if os.path.exists(video_file):
+                        os.remove(video_file)
+
+
+ENCODERS = {
+    MoviePyEncoder.name: MoviePyEncoder,
+    WriteGearEncoder.name: WriteGearEncoder,
+}
+
+
+def get_encoder(name=VIDEO_ENCODER, **settings):
+    """Instancia o backend de codificação pelo nome ('writegear' ou 'moviepy')."""
+    try:
+        return ENCODERS[name](**settings)
+    except KeyError:
+        raise ValueError(f"Encoder desconhecido: {name}. Opções: {', '.join(ENCODERS)}") from None
+
+
+def encode_clip(clip, output_file, fps=24, audio_file=None, backend=VIDEO_ENCODER, **settings):
+    """
+    Codifica `clip` com o backend escolhido. Se o backend de streaming falhar,
+    cai para o `write_videofile` do MoviePy.
+    """
+    encoder = get_encoder(backend, **settings)
+    if encoder.name == MoviePyEncoder.name:
+        encoder.encode(clip, output_file, fps=fps, audio_file=audio_file)
+        return
+    try:
+        encoder.encode(clip, output_file, fps=fps, audio_file=audio_file)
+    except Exception as e:
+        logger.warning(f"Encoder '{encoder.name}' falhou ({e}). Usando o MoviePy.", exc_info=True)
+        MoviePyEncoder(**settings).encode(clip, output_file, fps=fps, audio_file=audio_file)
+
+
+def encode_clip_multi(outputs, fps=24, audio_file=None, backend=VIDEO_ENCODER, **settings):
+    """
+    Codifica vários clipes de mesma duração (`outputs` = [(arquivo, clip)], ex: os formatos de uma mesma
+    `Timeline`). Com o WriteGear os clipes são percorridos juntos, quadro a quadro, e alimentam todos os
+    encoders de uma vez; com o MoviePy (ou se o WriteGear falhar) cada saída é codificada separadamente.
+    """
+    encoder = get_encoder(backend, **settings)
+    if encoder.name != MoviePyEncoder.name:
+        try:
+            frames = zip(*(clip.iter_frames(fps=fps, dtype="uint8", logger=None) for _, clip in outputs))
+            encoder.encode_frames_multi(frames, [(output_file, operator.itemgetter(i))
+                                                 for i, (output_file, _) in enumerate(outputs)],
+                                        fps=fps, audio_file=audio_file)
+            return
+        except Exception as e:
+            logger.warning(f"Encoder '{encoder.name}' falhou ({e}). Usando o MoviePy.", exc_info=True)
+    for output_file, clip in outputs:
+        MoviePyEncoder(**settings).encode(clip, output_file, fps=fps, audio_file=audio_file)
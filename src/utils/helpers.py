@@ -0,0 +1,114 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+# Recursos do NLTK usados na extração de palavras-chave: (caminho no nltk.data, id para download)
+# (o `word_tokenize` do NLTK 3.9 usa o punkt em tabelas, `punkt_tab`, e não mais o pickle `punkt`)
+NLTK_RESOURCES = [("tokenizers/punkt_tab/english/", "punkt_tab"), ("corpora/stopwords", "stopwords")]
+
+
+def get_ffmpeg_binary():
+    """Mesmo binário do FFmpeg usado pelo MoviePy (variável FFMPEG_BINARY ou imageio-ffmpeg)."""
+    from moviepy.config import get_setting
+    return get_setting("FFMPEG_BINARY")
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Trava exclusiva entre processos e threads sobre `path` (usa o arquivo auxiliar `<path>.lock`).
+    Serve para ler-mesclar-gravar arquivos de estado compartilhados (ex: índices em JSON) sem perder
+    as atualizações feitas ao mesmo tempo por outros workers.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_json_atomic(path, data):
+    """Grava `data` em `path` via arquivo temporário exclusivo deste processo e thread + os.replace."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def evict_lru(directory, max_bytes, extensions, sidecar_extensions=()):
+    """
+    Política LRU simples para caches em disco: enquanto o tamanho total das entradas (arquivos com
+    extensão em `extensions`) passar de `max_bytes`, remove a entrada de mtime mais antigo junto com
+    seus arquivos auxiliares (mesmo nome com extensão em `sidecar_extensions`).
+    Os caches atualizam o mtime (os.utime) a cada acerto. Retorna a lista de entradas removidas.
+    """
+    entries = []
+    total_size = 0
+    for name in os.listdir(directory):
+        stem, ext = os.path.splitext(name)
+        if ext not in extensions or ".tmp" in name:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total_size += stat.st_size
+
+    removed = []
+    if total_size <= max_bytes:
+        return removed
+
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= max_bytes:
+            break
+        stem = os.path.splitext(path)[0]
+        for stale_path in [path] + [stem + ext for ext in sidecar_extensions]:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+        total_size -= size
+        removed.append(path)
+    return removed
+
+
+def setup_nltk_resources(notify=logging.info):
+    """
+    Baixa os recursos do NLTK que ainda não estiverem instalados. O NLTK só é importado aqui,
+    então isso deve ser chamado ao iniciar uma renderização, não na importação dos módulos.
+    `notify` recebe as mensagens de progresso (ex: `st.info` no app).
+    Levanta LookupError se um recurso faltar e o download falhar (ex: sem rede), em vez de deixar o erro
+    aparecer só na primeira tokenização.
+    """
+    import nltk
+    for resource_path, resource_id in NLTK_RESOURCES:
+        try:
+            nltk.data.find(resource_path)
+        except LookupError:
+            notify(f"Baixando recurso NLTK necessário: '{resource_id}'...")
+            if not nltk.download(resource_id, quiet=True):
+                raise LookupError(f"Recurso '{resource_id}' do NLTK ausente e o download falhou "
+                                  f"(instale-o com: python -m nltk.downloader {resource_id}).")
+            notify(f"Recurso '{resource_id}' baixado.")
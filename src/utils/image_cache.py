@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+
+from src.apis.http_client import http_get
+from src.utils.helpers import evict_lru
+from src.utils.tracing import span, add_bytes
+from src.config import (
+    IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_REVALIDATE_SECONDS,
+    IMAGE_DOWNLOAD_CHUNK_BYTES, IMAGE_DOWNLOAD_MAX_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """
+    Cache persistente em disco para imagens baixadas.
+
+    Cada entrada é endereçada pelo hash SHA-256 da URL (mais uma "variante", ex: "1920x1080")
+    e guarda a imagem JÁ processada, de modo que um acerto evita tanto o download quanto o
+    redimensionamento. Ao lado de cada imagem fica um .json com ETag/Last-Modified da origem,
+    usados para revalidação condicional. O tamanho total é limitado por uma política LRU
+    (o mtime do arquivo é atualizado a cada acesso).
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES,
+                 revalidate_after=IMAGE_CACHE_REVALIDATE_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _paths(self, url, variant):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        if variant:
+            key = f"{key}_{variant}"
+        return os.path.join(self.cache_dir, f"{key}.jpg"), os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def _load_meta(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_meta(meta_path, meta):
+        tmp_path = f"{meta_path}.{os.getpid()}_{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _touch(image_path):
+        try:
+            os.utime(image_path, None)
+        except OSError:
+            pass
+
+    def get(self, url, transform, variant="1920x1080"):
+        """
+        Retorna o caminho local da imagem processada para `url`, ou None se ela não puder ser obtida.
+        `transform(src_path, dst_path)` é chamado apenas quando a imagem precisa ser (re)baixada.
+        """
+        with span("download.image", url=url) as current:
+            path = self._get(url, transform, variant)
+            if current is not None:
+                current.attrs["cached"] = current.bytes == 0 and path is not None
+            return path
+
+    def _get(self, url, transform, variant):
+        image_path, meta_path = self._paths(url, variant)
+        meta = self._load_meta(meta_path) if os.path.exists(image_path) else None
+
+        if meta and time.time() - meta.get("validated_at", 0) < self.revalidate_after:
+            logger.info(f"Imagem encontrada no cache: {url}")
+            self._touch(image_path)
+            return image_path
+
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            # stream=True: o corpo é lido aos poucos e gravado direto no disco, sem ficar inteiro na memória
+            response = http_get("images", url, headers=headers, stream=True)
+        except requests.exceptions.RequestException as e:
+            if meta:
+                logger.warning(f"Falha ao revalidar {url} ({e}). Usando a cópia em cache.")
+                self._touch(image_path)
+                return image_path
+            logger.warning(f"Falha ao baixar a imagem {url}: {e}")
+            return None
+
+        with response:
+            if response.status_code == 304 and meta:
+                logger.info(f"Imagem em cache revalidada (304): {url}")
+                meta["validated_at"] = time.time()
+                self._save_meta(meta_path, meta)
+                self._touch(image_path)
+                return image_path
+
+            if response.status_code != 200:
+                logger.warning(f"Falha ao baixar a imagem. Status code: {response.status_code} ({url})")
+                return None
+
+            content_length = int(response.headers.get("Content-Length") or 0)
+            if content_length > IMAGE_DOWNLOAD_MAX_BYTES:
+                logger.warning(f"Imagem grande demais ({content_length} bytes), ignorando: {url}")
+                return None
+
+            # Grava em arquivos temporários e só depois move para o lugar definitivo,
+            # para que leitores concorrentes nunca vejam uma imagem pela metade.
+            tmp_suffix = f"{os.getpid()}_{threading.get_ident()}"
+            tmp_raw_path = f"{image_path}.{tmp_suffix}.raw"
+            tmp_out_path = f"{image_path[:-len('.jpg')]}.{tmp_suffix}.tmp.jpg"
+            try:
+                self._download(response, tmp_raw_path)
+                with span("resize"):
+                    transform(tmp_raw_path, tmp_out_path)
+                os.replace(tmp_out_path, image_path)
+            except Exception as e:
+                logger.error(f"Erro ao processar a imagem {url}: {e}", exc_info=True)
+                return None
+            finally:
+                for path in (tmp_raw_path, tmp_out_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+        self._save_meta(meta_path, {
+            "url": url,
+            "variant": variant,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "validated_at": time.time(),
+        })
+        self._evict()
+        return image_path
+
+    @staticmethod
+    def _download(response, path):
+        """Grava o corpo da resposta em `path` em blocos de IMAGE_DOWNLOAD_CHUNK_BYTES, com limite de tamanho."""
+        written = 0
+        with open(path, "wb") as img_file:
+            for chunk in response.iter_content(chunk_size=IMAGE_DOWNLOAD_CHUNK_BYTES):
+                written += len(chunk)
+                add_bytes(len(chunk))
+                if written > IMAGE_DOWNLOAD_MAX_BYTES:
+                    raise ValueError(f"download passou de {IMAGE_DOWNLOAD_MAX_BYTES} bytes")
+                img_file.write(chunk)
+        if not written:
+            raise ValueError("resposta vazia")
+
+    def _evict(self):
+        """Remove as entradas menos recentemente usadas até o cache caber em `max_bytes`."""
+        with self._lock:
+            for path in evict_lru(self.cache_dir, self.max_bytes, extensions=(".jpg",), sidecar_extensions=(".json",)):
+                logger.info(f"Imagem removida do cache (LRU): {path}")
+
+
+_default_cache = None
+
+
+def get_image_cache():
+    """Retorna a instância compartilhada do cache de imagens."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ImageCache()
+    return _default_cache
@@ -0,0 +1,151 @@
+import io
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.utils.helpers import file_lock, write_json_atomic
+from src.utils.tracing import span
+from src.config import IMAGE_HASH_INDEX_FILE, IMAGE_HASH_MAX_DISTANCE, IMAGE_HASH_HISTORY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(image, hash_size=8):
+    """
+    Hash perceptual por diferença (dHash) de uma imagem PIL: reduz para (hash_size+1) x hash_size em tons
+    de cinza e compara cada pixel com o vizinho da direita. Imagens quase iguais (outro tamanho,
+    recompressão, pequenos ajustes de cor) ficam a poucos bits de distância.
+    Retorna um int de hash_size² bits (64 por padrão, o tamanho usado no índice).
+    """
+    from PIL import Image
+    pixels = np.asarray(image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distances(hashes, value):
+    """Distância de Hamming entre `value` e cada hash do array uint64 `hashes` (vetorizado)."""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def thumbnail_hash(thumbnail_url):
+    """Baixa a miniatura (alguns KB) e retorna seu dHash, ou None se ela não puder ser obtida."""
+    if not thumbnail_url:
+        return None
+    from PIL import Image
+    from src.apis.http_client import http_get
+    try:
+        with span("thumbnail"):
+            response = http_get("images", thumbnail_url)
+            response.raise_for_status()
+            with Image.open(io.BytesIO(response.content)) as image:
+                return dhash(image)
+    except Exception as e:
+        logger.warning(f"Não foi possível calcular o hash da miniatura {thumbnail_url}: {e}")
+        return None
+
+
+def hash_candidates(candidates):
+    """
+    Triagem pelas miniaturas: preenche o `dhash` de cada `image_search.ImageCandidate`.
+    Candidatos cuja miniatura existe mas não pôde ser baixada ou decodificada são descartados,
+    antes de gastar banda com a imagem em resolução cheia. Candidatos sem miniatura passam sem hash.
+    """
+    screened = []
+    for candidate in candidates:
+        if candidate.dhash is None and candidate.thumbnail_url:
+            candidate = candidate._replace(dhash=thumbnail_hash(candidate.thumbnail_url))
+            if candidate.dhash is None:
+                continue
+        screened.append(candidate)
+    return screened
+
+
+class PerceptualHashIndex:
+    """
+    Índice persistente dos hashes perceptuais das imagens usadas nos vídeos recentes.
+    Uma imagem é considerada repetida se estiver a até `max_distance` bits de alguma imagem
+    já usada nos últimos `history_seconds` (em qualquer provedor, com qualquer URL).
+    Várias instâncias (workers de renderização, lotes em outros processos) podem registrar ao mesmo
+    tempo: `record` relê o arquivo e mescla as entradas sob uma trava entre processos.
+    Com `ignore_video`, as imagens registradas para esse mesmo vídeo não contam como repetidas: uma nova
+    renderização da mesma notícia pode reaproveitar as suas imagens.
+    """
+
+    def __init__(self, index_file=IMAGE_HASH_INDEX_FILE, max_distance=IMAGE_HASH_MAX_DISTANCE,
+                 history_seconds=IMAGE_HASH_HISTORY_SECONDS, ignore_video=None):
+        self.index_file = index_file
+        self.max_distance = max_distance
+        self.history_seconds = history_seconds
+        self.ignore_video = ignore_video
+        self.entries = []
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self.load()
+
+    def _read(self):
+        """Entradas do arquivo ainda dentro da janela de histórico."""
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            cutoff = time.time() - self.history_seconds
+            return [entry for entry in data.get("entries", []) if entry["used_at"] > cutoff]
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Índice de hashes de imagens ilegível ({self.index_file}): {e}. Começando do zero.")
+            return []
+
+    def _set_entries(self, entries):
+        self.entries = entries
+        self._hashes = np.array([int(entry["hash"], 16) for entry in entries
+                                 if self.ignore_video is None or entry.get("video") != self.ignore_video],
+                                dtype=np.uint64)
+
+    def load(self):
+        entries = self._read()
+        with self._lock:
+            self._set_entries(entries)
+
+    def save(self, new_entries=()):
+        """
+        Mescla `new_entries` com as entradas gravadas por outras instâncias e persiste o índice.
+        As entradas em memória são atualizadas com o resultado (inclusive as de outros processos).
+        """
+        with file_lock(self.index_file):
+            with self._lock:
+                entries = self._read()
+                known = {(entry["hash"], entry["url"], entry["used_at"]) for entry in entries}
+                entries.extend(entry for entry in [*self.entries, *new_entries]
+                               if (entry["hash"], entry["url"], entry["used_at"]) not in known)
+                cutoff = time.time() - self.history_seconds
+                self._set_entries([entry for entry in entries if entry["used_at"] > cutoff])
+                write_json_atomic(self.index_file, {"entries": self.entries})
+
+    def is_duplicate(self, value, extra_hashes=()):
+        """
+        True se o hash `value` estiver próximo de alguma imagem já usada ou de algum de `extra_hashes`
+        (hashes ainda não registrados, ex: os já escolhidos para o vídeo atual).
+        """
+        if value is None:
+            return False
+        with self._lock:
+            hashes = self._hashes
+        if extra_hashes:
+            hashes = np.concatenate([hashes, np.array(list(extra_hashes), dtype=np.uint64)])
+        return bool(len(hashes)) and int(hamming_distances(hashes, value).min()) <= self.max_distance
+
+    def record(self, candidates, video=None):
+        """Registra como usadas no vídeo `video` as imagens (ImageCandidate com `dhash`) e persiste o índice."""
+        now = time.time()
+        new_entries = [
+            {"hash": f"{candidate.dhash:016x}", "url": candidate.url, "used_at": now, "video": video}
+            for candidate in candidates if candidate is not None and candidate.dhash is not None
+        ]
+        if new_entries:
+            self.save(new_entries)
@@ -0,0 +1,41 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import IMAGE_PREFETCH_WORKERS
+from src.utils.image_cache import get_image_cache
+from src.utils.tracing import in_current_span
+
+logger = logging.getLogger(__name__)
+
+
+def prefetch_image_map(image_urls, transform, cache=None, max_workers=IMAGE_PREFETCH_WORKERS, variant="1920x1080"):
+    """
+    Baixa e processa (via `transform`) todas as imagens de `image_urls` em um pool de threads limitado.
+    Retorna {url: caminho local}, com None para as URLs que falharam. URLs repetidas são baixadas uma vez.
+    `variant` separa no cache as versões de uma mesma URL geradas por transforms diferentes.
+    """
+    cache = cache or get_image_cache()
+    unique_urls = list(dict.fromkeys(image_urls))
+    if not unique_urls:
+        return {}
+
+    workers = max(1, min(max_workers, len(unique_urls)))
+    logger.info(f"Pré-carregando {len(unique_urls)} imagens com {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetch = in_current_span(lambda url: cache.get(url, transform, variant))
+        paths = dict(zip(unique_urls, executor.map(fetch, unique_urls)))
+
+    failed = [url for url, path in paths.items() if path is None]
+    if failed:
+        logger.warning(f"{len(failed)} imagens descartadas no pré-carregamento: {failed}")
+    return paths
+
+
+def prefetch_images(image_urls, transform, cache=None, max_workers=IMAGE_PREFETCH_WORKERS):
+    """
+    Como `prefetch_image_map`, mas retorna só os caminhos locais, na mesma ordem da lista de entrada.
+    URLs que falharam são descartadas aqui, uma única vez, em vez de serem tentadas de novo
+    a cada volta da linha do tempo.
+    """
+    paths = prefetch_image_map(image_urls, transform, cache=cache, max_workers=max_workers)
+    return [paths[url] for url in image_urls if paths.get(url)]
@@ -1,34 +1,80 @@
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 from PIL import Image, ImageOps
 import numpy as np
 import os
 import re # Para expressões regulares na extração de keywords
 import logging
-from src.config import IMAGES_DIR
+from src.config import KEN_BURNS_QUALITY
 
-# Certifique-se de que o diretório de imagens existe
-os.makedirs(IMAGES_DIR, exist_ok=True)
+# Nomes próprios compostos capitalizados (ex: "Donald Trump", "Bitcoin Cash")
+PROPER_NOUN_RE = re.compile(r"([A-Z][a-z]+(?:\s[A-Z][a-z]+)+)")
 
-# Carregar stopwords uma vez
-try:
-    stop_words_lang = stopwords.words('english') # Mude para 'portuguese' se o texto for em PT
-except LookupError:
-    import nltk
-    logging.info("Baixando recurso 'stopwords' do NLTK...")
-    nltk.download('stopwords', quiet=True)
-    stop_words_lang = stopwords.words('english')
+# Termos genéricos demais para servirem sozinhos de busca
+GENERIC_TERMS = frozenset(["image", "photo", "picture", "graph", "chart", "data", "report", "news"])
 
+_stop_words_cache = {}
+_word_tokenizer = None
+_sentence_tokenizer = None
 
-def extract_entities_and_keywords_for_search(text_chunk: str, original_news_title: str = "") -> str:
+
+def word_tokenize(text):
+    """`nltk.word_tokenize`, com o NLTK importado só no primeiro uso."""
+    from nltk.tokenize import word_tokenize as nltk_word_tokenize
+    return nltk_word_tokenize(text)
+
+
+def _get_word_tokenizer():
+    global _word_tokenizer
+    if _word_tokenizer is None:
+        from nltk.tokenize import NLTKWordTokenizer
+        _word_tokenizer = NLTKWordTokenizer()
+    return _word_tokenizer
+
+
+def _get_sentence_tokenizer():
+    # O mesmo segmentador em frases (punkt) que o `word_tokenize` usa
+    global _sentence_tokenizer
+    if _sentence_tokenizer is None:
+        from nltk.tokenize import PunktTokenizer
+        _sentence_tokenizer = PunktTokenizer("english")
+    return _sentence_tokenizer
+
+
+def get_stop_words(lang='english'):
+    """Stopwords do NLTK como frozenset (busca O(1)), carregadas na primeira chamada e reaproveitadas."""
+    if lang not in _stop_words_cache:
+        from nltk.corpus import stopwords
+        try:
+            words = stopwords.words(lang)
+        except LookupError:
+            import nltk
+            logging.info("Baixando recurso 'stopwords' do NLTK...")
+            nltk.download('stopwords', quiet=True)
+            words = stopwords.words(lang)
+        _stop_words_cache[lang] = frozenset(words)
+    return _stop_words_cache[lang]
+
+
+def _title_main_subject(original_news_title, stop_words):
+    """Assunto principal do título: o nome próprio mais longo ou, sem ele, a primeira palavra-chave."""
+    title_proper_nouns = PROPER_NOUN_RE.findall(original_news_title)
+    if title_proper_nouns:
+        return max(title_proper_nouns, key=len).lower()
+    # Se não achou nome próprio, pega keywords do título
+    title_keywords = [
+        word for word in word_tokenize(original_news_title.lower())
+        if word.isalnum() and word not in stop_words and len(word) >= 4
+    ]
+    return title_keywords[0] if title_keywords else ""
+
+
+def _query_from_tokens(text_chunk, word_tokens, stop_words, title_main_subject):
     """
-    Extrai entidades e palavras-chave de um trecho de texto para busca de imagens.
-    Prioriza termos mais longos e tenta manter frases curtas.
-    Adiciona contexto do título da notícia se o chunk for muito genérico.
+    Monta a query de busca de um trecho a partir dos seus tokens (já em minúsculas).
+    `title_main_subject` é uma função sem argumentos, chamada só se o trecho precisar do contexto do título.
     """
     # Tenta identificar nomes próprios capitalizados primeiro (ex: "Donald Trump", "Bitcoin Cash")
     # Esta é uma heurística e pode ser melhorada com NER completo
-    proper_nouns_matches = re.findall(r"([A-Z][a-z]+(?:\s[A-Z][a-z]+)+)", text_chunk)
+    proper_nouns_matches = PROPER_NOUN_RE.findall(text_chunk)
     if proper_nouns_matches:
         # Pega o nome próprio mais longo encontrado no chunk
         longest_proper_noun = max(proper_nouns_matches, key=len)
@@ -37,11 +83,9 @@ def extract_entities_and_keywords_for_search(text_chunk: str, original_news_titl
             logging.info(f"Priorizando nome próprio: '{longest_proper_noun}' do chunk: '{text_chunk}'")
             return longest_proper_noun.strip()
 
-    word_tokens = word_tokenize(text_chunk.lower())
-    
     keywords = [
         word for word in word_tokens 
-        if word.isalnum() and word not in stop_words_lang and len(word) >= 3
+        if word.isalnum() and word not in stop_words and len(word) >= 3
     ]
 
     if not keywords and len(word_tokens) <= 4 : # Se poucas palavras e todas stopwords
@@ -58,23 +102,10 @@ def extract_entities_and_keywords_for_search(text_chunk: str, original_news_titl
         search_query = " ".join(keywords[:3])
 
     # Contextualização com o título da notícia
-    if len(search_query.split()) < 2 and original_news_title:
-        title_main_subject = ""
-        # Tenta pegar um nome próprio do título
-        title_proper_nouns = re.findall(r"([A-Z][a-z]+(?:\s[A-Z][a-z]+)+)", original_news_title)
-        if title_proper_nouns:
-            title_main_subject = max(title_proper_nouns, key=len).lower()
-        
-        if not title_main_subject: # Se não achou nome próprio, pega keywords do título
-            title_keywords = [
-                word for word in word_tokenize(original_news_title.lower())
-                if word.isalnum() and word not in stop_words_lang and len(word) >= 4
-            ]
-            if title_keywords:
-                title_main_subject = title_keywords[0]
-        
-        if title_main_subject and title_main_subject not in search_query.lower():
-            search_query = title_main_subject + " " + search_query
+    if len(search_query.split()) < 2:
+        subject = title_main_subject()
+        if subject and subject not in search_query.lower():
+            search_query = subject + " " + search_query
             search_query = " ".join(search_query.split()[:4]) # Limita o tamanho da query combinada
 
     # Fallback final e limpeza
@@ -87,15 +118,76 @@ def extract_entities_and_keywords_for_search(text_chunk: str, original_news_titl
             search_query = "Bitcoin cryptocurrency" # Fallback genérico sobre o tema
 
     # Evitar termos muito genéricos sozinhos
-    generic_terms = ["image", "photo", "picture", "graph", "chart", "data", "report", "news"]
     query_words = search_query.lower().split()
-    if len(query_words) == 1 and query_words[0] in generic_terms:
+    if len(query_words) == 1 and query_words[0] in GENERIC_TERMS:
         search_query = "Bitcoin " + search_query # Adiciona contexto
 
+    return search_query
+
+
+def extract_entities_and_keywords_for_search(text_chunk: str, original_news_title: str = "") -> str:
+    """
+    Extrai entidades e palavras-chave de um trecho de texto para busca de imagens.
+    Prioriza termos mais longos e tenta manter frases curtas.
+    Adiciona contexto do título da notícia se o chunk for muito genérico.
+    Para um artigo inteiro, prefira `extract_search_queries_for_article`.
+    """
+    stop_words = get_stop_words()
+    search_query = _query_from_tokens(
+        text_chunk, word_tokenize(text_chunk.lower()), stop_words,
+        lambda: _title_main_subject(original_news_title, stop_words) if original_news_title else "",
+    )
     logging.info(f"Texto chunk: '{text_chunk}' | Título: '{original_news_title}' -> Query para imagem: '{search_query}'")
     return search_query
 
 
+def extract_search_queries_for_article(full_text: str, original_news_title: str = "", words_per_image: int = 8) -> list:
+    """
+    Versão em lote de `extract_entities_and_keywords_for_search`: divide o artigo em trechos de
+    `words_per_image` palavras e retorna uma query por trecho, na ordem, igual à da versão por trecho.
+    A segmentação em frases do punkt (a parte cara do `word_tokenize`) roda uma única vez sobre o texto
+    inteiro; cada trecho é então cortado nas fronteiras de frase que caem dentro dele e seus pedaços passam
+    pelo mesmo tokenizador de palavras (pedaços repetidos, uma vez só). O assunto do título é calculado
+    no máximo uma vez.
+    """
+    stop_words = get_stop_words()
+    words = full_text.split()
+    chunks = [" ".join(words[i:i + words_per_image]) for i in range(0, len(words), words_per_image)]
+    # O texto que a versão por trecho tokeniza: cada trecho em minúsculas, unidos por um espaço
+    lowered_chunks = [chunk.lower() for chunk in chunks]
+    text = " ".join(lowered_chunks)
+    sentence_spans = list(_get_sentence_tokenizer().span_tokenize(text))
+    tokenizer = _get_word_tokenizer()
+    tokens_by_piece = {}
+
+    title_subject = []
+
+    def title_main_subject():
+        if not title_subject:
+            title_subject.append(_title_main_subject(original_news_title, stop_words) if original_news_title else "")
+        return title_subject[0]
+
+    queries = []
+    chunk_start = 0
+    first_span = 0
+    for chunk, lowered in zip(chunks, lowered_chunks):
+        chunk_end = chunk_start + len(lowered)
+        while first_span < len(sentence_spans) and sentence_spans[first_span][1] <= chunk_start:
+            first_span += 1
+        word_tokens = []
+        for sentence_start, sentence_end in sentence_spans[first_span:]:
+            if sentence_start >= chunk_end:
+                break
+            piece = text[max(sentence_start, chunk_start):min(sentence_end, chunk_end)]
+            if piece not in tokens_by_piece:
+                tokens_by_piece[piece] = tokenizer.tokenize(piece)
+            word_tokens.extend(tokens_by_piece[piece])
+        queries.append(_query_from_tokens(chunk, word_tokens, stop_words, title_main_subject))
+        chunk_start = chunk_end + 1
+    logging.info(f"{len(queries)} queries de imagem extraídas para '{original_news_title}'.")
+    return queries
+
+
 def resize_and_crop_image(image_path, output_size=(1920, 1080)):
     """
     Redimensiona e corta a imagem para o aspect ratio 16:9 (output_size),
@@ -140,46 +232,116 @@ def resize_and_crop_image(image_path, output_size=(1920, 1080)):
         return None
 
 
-def ken_burns_effect(clip, R_start=1.0, R_end=1.2, pos_start=('center', 'center'), pos_end=('center', 'center'), speed_factor=0.2):
+def _ken_burns_anchor(pos_str, dim_size, zoomed_dim_size):
+    if pos_str == 'center': return (dim_size - zoomed_dim_size) / 2
+    if pos_str in ('left', 'top'): return 0
+    if pos_str in ('right', 'bottom'): return dim_size - zoomed_dim_size
+    return (dim_size - zoomed_dim_size) / 2
+
+
+def compute_ken_burns_rects(frame_size, duration, fps=24, R_start=1.0, R_end=1.2,
+                            pos_start=('center', 'center'), pos_end=('center', 'center')):
     """
-    Aplica um efeito Ken Burns (zoom e pan suaves) a um clipe de imagem.
-    R_start, R_end: Fatores de zoom inicial e final.
-    pos_start, pos_end: Posições iniciais e finais ('center', 'left', 'right', 'top', 'bottom').
-    speed_factor: (não usado diretamente aqui, o efeito é sobre a duração do clipe)
+    Pré-calcula os retângulos de corte (x, y, largura, altura) do efeito Ken Burns para todos os
+    quadros do clipe. Retorna um array float64 de formato (n_quadros, 4).
     """
-    def effect(get_frame, t):
-        frame = get_frame(t)
-        h, w = frame.shape[:2]
-        
-        progress_time = t / clip.duration
-        progress = progress_time**2 * (3 - 2 * progress_time) # Ease-in-out
+    w, h = frame_size
+    n_frames = max(1, int(np.ceil(duration * fps)))
+    progress_time = np.clip(np.arange(n_frames) / fps / duration, 0.0, 1.0) if duration else np.zeros(n_frames)
+    progress = progress_time**2 * (3 - 2 * progress_time) # Ease-in-out
 
-        R = R_start + (R_end - R_start) * progress
-        
-        def get_coords(pos_str, dim_size, zoomed_dim_size):
-            if pos_str == 'center': return (dim_size - zoomed_dim_size) / 2
-            if pos_str in ('left', 'top'): return 0
-            if pos_str in ('right', 'bottom'): return dim_size - zoomed_dim_size
-            return (dim_size - zoomed_dim_size) / 2 
+    R = R_start + (R_end - R_start) * progress
+    crop_w = w / R
+    crop_h = h / R
 
-        new_w, new_h = int(w / R), int(h / R)
+    x_start = _ken_burns_anchor(pos_start[0], w, crop_w)
+    x_end = _ken_burns_anchor(pos_end[0], w, crop_w)
+    y_start = _ken_burns_anchor(pos_start[1], h, crop_h)
+    y_end = _ken_burns_anchor(pos_end[1], h, crop_h)
 
-        x_start_coord = get_coords(pos_start[0], w, new_w)
-        x_end_coord = get_coords(pos_end[0], w, new_w)
-        x = int(x_start_coord + (x_end_coord - x_start_coord) * progress)
+    # Garantir que as coordenadas de corte não saiam dos limites
+    x = np.clip(x_start + (x_end - x_start) * progress, 0, w - crop_w)
+    y = np.clip(y_start + (y_end - y_start) * progress, 0, h - crop_h)
+    return np.stack([x, y, crop_w, crop_h], axis=1)
 
-        y_start_coord = get_coords(pos_start[1], h, new_h)
-        y_end_coord = get_coords(pos_end[1], h, new_h)
-        y = int(y_start_coord + (y_end_coord - y_start_coord) * progress)
 
-        # Garantir que as coordenadas de corte não saiam dos limites
-        x = max(0, min(x, w - new_w))
-        y = max(0, min(y, h - new_h))
-        
+def center_crop_rect(source_size, output_size):
+    """
+    Maior retângulo centralizado (x, y, largura, altura) de `source_size` com a proporção de `output_size`
+    (ex: a faixa central 9:16 de um quadro 16:9). Usado para gerar vários formatos do mesmo quadro.
+    """
+    src_w, src_h = source_size
+    out_w, out_h = output_size
+    if out_w / out_h < src_w / src_h:
+        crop_w, crop_h = src_h * out_w / out_h, src_h
+    else:
+        crop_w, crop_h = src_w, src_w * out_h / out_w
+    return ((src_w - crop_w) / 2, (src_h - crop_h) / 2, crop_w, crop_h)
+
+
+def resample_region(frame, rect, output_size, quality='bilinear'):
+    """
+    Recorta `rect` = (x, y, largura, altura) de `frame` (array HxWxC) e o redimensiona para `output_size`.
+
+    quality:
+      - 'fast': vizinho mais próximo, só com indexação NumPy (a opção mais rápida);
+      - 'bilinear': bilinear com retângulo fracionário (pan/zoom sem "tremido"), sem copiar o recorte;
+      - 'lanczos': recorte inteiro + LANCZOS (implementação original, mais lenta).
+    """
+    out_w, out_h = output_size
+    src_h, src_w = frame.shape[:2]
+    x, y, crop_w, crop_h = rect
+
+    # Máscaras do MoviePy (float entre 0 e 1) usam sempre o caminho NumPy
+    if quality == 'fast' or frame.dtype != np.uint8:
+        xs = np.clip((x + (np.arange(out_w) + 0.5) * (crop_w / out_w)).astype(np.intp), 0, src_w - 1)
+        ys = np.clip((y + (np.arange(out_h) + 0.5) * (crop_h / out_h)).astype(np.intp), 0, src_h - 1)
+        return np.take(np.take(frame, ys, axis=0), xs, axis=1)
+
+    if quality == 'bilinear':
+        box = (x, y, x + crop_w, y + crop_h)
+        return np.asarray(Image.fromarray(frame).resize((out_w, out_h), Image.BILINEAR, box=box))
+
+    if quality == 'lanczos':
+        new_w, new_h = int(crop_w), int(crop_h)
+        x = max(0, min(int(x), src_w - new_w))
+        y = max(0, min(int(y), src_h - new_h))
         sub_frame = frame[y:y+new_h, x:x+new_w]
-        
-        pil_img = Image.fromarray(sub_frame)
-        pil_img_resized = pil_img.resize((w, h), Image.LANCZOS)
-        return np.array(pil_img_resized)
+        return np.array(Image.fromarray(sub_frame).resize((out_w, out_h), Image.LANCZOS))
+
+    raise ValueError(f"Qualidade de reamostragem desconhecida: {quality}")
+
+
+def ken_burns_frame_renderer(frame_size, duration, fps=24, R_start=1.0, R_end=1.2,
+                             pos_start=('center', 'center'), pos_end=('center', 'center'),
+                             quality=KEN_BURNS_QUALITY):
+    """
+    Retorna `render(frame, t)`, que aplica o quadro do efeito Ken Burns correspondente ao instante `t`
+    usando os retângulos pré-calculados para o clipe inteiro.
+    """
+    rects = compute_ken_burns_rects(frame_size, duration, fps, R_start, R_end, pos_start, pos_end)
+
+    def render(frame, t):
+        index = min(len(rects) - 1, max(0, int(round(t * fps))))
+        h, w = frame.shape[:2]
+        return resample_region(frame, rects[index], (w, h), quality)
+
+    return render
+
+
+def ken_burns_effect(clip, R_start=1.0, R_end=1.2, pos_start=('center', 'center'), pos_end=('center', 'center'),
+                     speed_factor=0.2, fps=24, quality=KEN_BURNS_QUALITY):
+    """
+    Aplica um efeito Ken Burns (zoom e pan suaves) a um clipe de imagem.
+    R_start, R_end: Fatores de zoom inicial e final.
+    pos_start, pos_end: Posições iniciais e finais ('center', 'left', 'right', 'top', 'bottom').
+    speed_factor: (não usado diretamente aqui, o efeito é sobre a duração do clipe)
+    fps: taxa usada para pré-calcular os retângulos de corte de cada quadro.
+    quality: 'fast', 'bilinear' ou 'lanczos' (veja `resample_region`).
+    """
+    render = ken_burns_frame_renderer(clip.size, clip.duration, fps, R_start, R_end, pos_start, pos_end, quality)
+
+    def effect(get_frame, t):
+        return render(get_frame(t), t)
 
-    return clip.fl(effect, apply_to=['mask'] if clip.mask else [])
\ No newline at end of file
+    return clip.fl(effect, apply_to=['mask'] if clip.mask else [])
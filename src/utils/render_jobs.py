@@ -0,0 +1,342 @@
+"""
+Fila de renderizações em disco para o app: a interface enfileira os trabalhos e um pool de workers
+os executa fora da execução do script do Streamlit.
+
+Cada trabalho é um arquivo JSON em RENDER_JOBS_DIR (status, progresso, mensagem, resultado). Um worker
+reserva um trabalho criando `<id>.lock` com O_EXCL, então vários processos podem consumir a mesma fila.
+O worker renova o mtime do lock enquanto executa; um lock de processo morto ou sem renovação há
+RENDER_JOB_STALE_SECONDS é descartado e o trabalho volta para a fila. Trabalhos terminados saem da fila
+ativa (vão para `finished/`, apagados após RENDER_JOB_RETENTION_SECONDS):
+
+    python -m src.utils.render_jobs --workers 4
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+import psutil
+
+from src.config import (
+    RENDER_JOBS_DIR, RENDER_JOB_WORKERS, RENDER_JOB_POLL_SECONDS, RENDER_JOB_STALE_SECONDS,
+    RENDER_JOB_RETENTION_SECONDS,
+)
+from src.utils.helpers import file_lock
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class RenderJobQueue:
+    """Fila de trabalhos baseada em arquivos: um JSON por trabalho, gravado de forma atômica."""
+
+    def __init__(self, jobs_dir=RENDER_JOBS_DIR, stale_seconds=RENDER_JOB_STALE_SECONDS,
+                 retention_seconds=RENDER_JOB_RETENTION_SECONDS):
+        self.jobs_dir = jobs_dir
+        self.finished_dir = os.path.join(jobs_dir, "finished")
+        self.mutex_dir = os.path.join(jobs_dir, "mutex")
+        self.stale_seconds = stale_seconds
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        os.makedirs(self.finished_dir, exist_ok=True)
+
+    def _path(self, job_id, extension=".json"):
+        return os.path.join(self.jobs_dir, f"{job_id}{extension}")
+
+    def _finished_path(self, job_id):
+        return os.path.join(self.finished_dir, f"{job_id}.json")
+
+    def _job_mutex(self, job_id):
+        # Serializa entre processos as leituras-gravações de um mesmo trabalho (ex: o progresso gravado pelo
+        # worker e o reenfileiramento feito por outro processo). Não é o `<id>.lock` de reserva do trabalho.
+        return file_lock(os.path.join(self.mutex_dir, job_id))
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, job):
+        """Grava o trabalho; retorna False (sem gravar) se a gravação traria de volta à fila um trabalho terminado."""
+        finished = job["status"] in (DONE, FAILED)
+        if not finished and os.path.exists(self._finished_path(job["id"])):
+            logger.warning(f"Trabalho {job['id']} já terminou; mudança para '{job['status']}' ignorada.")
+            return False
+        job["updated_at"] = time.time()
+        path = self._finished_path(job["id"]) if finished else self._path(job["id"])
+        tmp_path = f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        if finished:
+            # Sai da fila ativa: os workers não releem mais este trabalho a cada polling
+            for stale_path in (self._path(job["id"]), self._path(job["id"], ".lock")):
+                try:
+                    os.remove(stale_path)
+                except FileNotFoundError:
+                    pass
+        return True
+
+    def submit(self, kind, params):
+        """Enfileira um trabalho (`kind` em JOB_HANDLERS) e retorna o seu ID."""
+        job = {
+            "id": f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}",
+            "kind": kind,
+            "params": params,
+            "status": QUEUED,
+            "progress": 0,
+            "message": "Na fila...",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+        }
+        self._write(job)
+        logger.info(f"Trabalho {job['id']} ({kind}) enfileirado.")
+        return job["id"]
+
+    def get(self, job_id):
+        return self._read(self._path(job_id)) or self._read(self._finished_path(job_id))
+
+    def update(self, job_id, **fields):
+        """Atualiza os campos do trabalho e retorna-o, ou None se ele não existir ou já tiver terminado."""
+        with self._lock, self._job_mutex(job_id):
+            job = self.get(job_id)
+            if job is None:
+                return None
+            job.update(fields)
+            return job if self._write(job) else None
+
+    def jobs(self, status=None):
+        """Trabalhos da fila ativa (opcionalmente só os de um status), do mais antigo para o mais novo."""
+        jobs = []
+        for name in os.listdir(self.jobs_dir):
+            if name.endswith(".json"):
+                job = self.get(name[:-len(".json")])
+                if job and (status is None or job["status"] == status):
+                    jobs.append(job)
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+    def _lock_is_stale(self, lock_path):
+        try:
+            if time.time() - os.path.getmtime(lock_path) > self.stale_seconds:
+                return True
+            with open(lock_path, "r", encoding="utf-8") as f:
+                owner = json.load(f)
+        except (OSError, ValueError):
+            return False # Removido ou ainda sendo gravado: a idade decide nas próximas verificações
+        # O PID só diz algo sobre processos desta máquina
+        return owner.get("host") == socket.gethostname() and not psutil.pid_exists(owner.get("pid", -1))
+
+    def requeue_stale(self):
+        """Devolve à fila os trabalhos cujo worker parou e remove locks órfãos. Retorna os IDs reenfileirados."""
+        requeued = []
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(".lock"):
+                continue
+            lock_path = os.path.join(self.jobs_dir, name)
+            if not self._lock_is_stale(lock_path):
+                continue
+            job_id = name[:-len(".lock")]
+            job = self.get(job_id)
+            if job is not None and job["status"] in (QUEUED, RUNNING):
+                self.update(job_id, status=QUEUED, progress=0, message="Reenfileirado (o worker anterior parou).")
+                requeued.append(job_id)
+                logger.warning(f"Trabalho {job_id} reenfileirado: o worker {job.get('worker_pid')} parou.")
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+        return requeued
+
+    def prune_finished(self):
+        """Apaga os trabalhos terminados há mais de `retention_seconds`."""
+        cutoff = time.time() - self.retention_seconds
+        for name in os.listdir(self.finished_dir):
+            path = os.path.join(self.finished_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    os.remove(os.path.join(self.mutex_dir, f"{name[:-len('.json')]}.lock"))
+            except OSError:
+                pass
+
+    def heartbeat(self, job_id):
+        """Renova o lock do trabalho em execução, para que ele não seja considerado abandonado."""
+        try:
+            os.utime(self._path(job_id, ".lock"), None)
+        except FileNotFoundError:
+            pass
+
+    def claim(self):
+        """Reserva o trabalho enfileirado mais antigo para este worker e o marca como em execução, ou None."""
+        self.requeue_stale()
+        names = os.listdir(self.jobs_dir)
+        locked = {name[:-len(".lock")] for name in names if name.endswith(".lock")}
+        # Só os trabalhos sem lock são lidos: os em execução não precisam ser reabertos a cada polling
+        candidates = [self.get(name[:-len(".json")]) for name in names
+                      if name.endswith(".json") and name[:-len(".json")] not in locked]
+        for job in sorted((job for job in candidates if job and job["status"] == QUEUED),
+                          key=lambda job: job["created_at"]):
+            try:
+                fd = os.open(self._path(job["id"], ".lock"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue # Outro worker chegou antes
+            with os.fdopen(fd, "w") as f:
+                json.dump({"pid": os.getpid(), "host": socket.gethostname()}, f)
+            # Entre a listagem e o lock o trabalho pode ter sido executado e terminado por outro worker
+            current = self._read(self._path(job["id"]))
+            claimed = None
+            if current is not None and current["status"] == QUEUED:
+                claimed = self.update(job["id"], status=RUNNING, message="Iniciando...", worker_pid=os.getpid())
+            if claimed is not None:
+                return claimed
+            try:
+                os.remove(self._path(job["id"], ".lock"))
+            except FileNotFoundError:
+                pass
+        return None
+
+
+def _run_render(params, report):
+    from src.pipeline import render_news_item
+    profile = params.get("profile", "final")
+    result = render_news_item(params["item"], lang=params.get("lang", "en"),
+                              words_per_image=params.get("words_per_image", 8),
+                              profile=profile, progress_callback=report)
+    if result["status"] == "failed":
+        raise RuntimeError(result["error"])
+    return {"video_file": result["video_file"], "outputs": result.get("outputs"), "timings": result["timings"],
+            "trace_file": result.get("trace_file")}
+
+
+def _run_promote(params, report):
+    from src.pipeline import get_output_paths
+    from src.utils.video_creator import render_from_plan, render_plan_path
+    _, _, preview_file = get_output_paths(params["item"], "preview")
+    _, _, video_file = get_output_paths(params["item"], "final")
+    report(10, "Renderizando a prévia em qualidade final...")
+    outputs = render_from_plan(render_plan_path(preview_file), video_file, profile="final")
+    return {"video_file": video_file, "outputs": outputs}
+
+
+def _mark_seen(params):
+    from src.apis.news_api import NewsIndex
+    NewsIndex().mark_seen([params["item"]])
+
+
+def _mark_seen_if_final(params):
+    # Uma prévia não deve tirar a notícia do próximo polling
+    if params.get("profile", "final") == "final":
+        _mark_seen(params)
+
+
+# Tipo de trabalho -> função (params, report(percentual, mensagem)) -> resultado (JSON)
+JOB_HANDLERS = {
+    "render": _run_render,
+    "promote": _run_promote,
+}
+
+# Tipo de trabalho -> contabilidade feita depois que o resultado foi gravado (params) -> None
+JOB_FOLLOWUPS = {
+    "render": _mark_seen_if_final,
+    "promote": _mark_seen,
+}
+
+
+def run_job(queue, job):
+    """Executa um trabalho já reservado, gravando progresso, resultado ou erro no arquivo do trabalho."""
+    def report(percent, message):
+        queue.update(job["id"], progress=max(0, min(100, int(percent))), message=message)
+
+    stop_heartbeat = threading.Event()
+
+    def heartbeat():
+        while not stop_heartbeat.wait(max(1.0, queue.stale_seconds / 5)):
+            queue.heartbeat(job["id"])
+
+    threading.Thread(target=heartbeat, name=f"render_job_heartbeat_{job['id']}", daemon=True).start()
+    started_at = time.perf_counter()
+    try:
+        result = JOB_HANDLERS[job["kind"]](job["params"], report)
+    except Exception as e:
+        logger.error(f"Trabalho {job['id']} falhou: {e}", exc_info=True)
+        queue.update(job["id"], status=FAILED, error=str(e), message="Falhou.",
+                     seconds=time.perf_counter() - started_at)
+        return
+    finally:
+        stop_heartbeat.set()
+    queue.update(job["id"], status=DONE, progress=100, result=result, message="Concluído.",
+                 seconds=time.perf_counter() - started_at)
+    followup = JOB_FOLLOWUPS.get(job["kind"])
+    if followup is not None:
+        try:
+            followup(job["params"])
+        except Exception as e:
+            # O vídeo já está pronto e registrado: uma falha aqui não deve marcar o trabalho como falho
+            logger.warning(f"Trabalho {job['id']} concluído, mas a contabilidade posterior falhou: {e}")
+    queue.prune_finished()
+
+
+class RenderWorkerPool:
+    """`workers` threads que consomem a fila enquanto o pool estiver ativo."""
+
+    def __init__(self, queue=None, workers=RENDER_JOB_WORKERS, poll_interval=RENDER_JOB_POLL_SECONDS):
+        self.queue = queue or get_render_queue()
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"render_worker_{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Pool de renderização iniciado com {self.workers} workers.")
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            run_job(self.queue, job)
+
+
+_default_queue = None
+
+
+def get_render_queue():
+    """Retorna a instância compartilhada da fila de renderizações."""
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = RenderJobQueue()
+    return _default_queue
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Workers da fila de renderizações do app")
+    parser.add_argument("--workers", type=int, default=max(1, RENDER_JOB_WORKERS))
+    args = parser.parse_args()
+    pool = RenderWorkerPool(workers=args.workers).start()
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,121 @@
+import logging
+import os
+import tempfile
+
+from src.config import STILL_ENCODER_PRESET, STILL_ENCODER_CRF
+from src.utils.helpers import get_ffmpeg_binary
+from src.utils.tracing import add_frames, run_process
+
+logger = logging.getLogger(__name__)
+
+
+def _write_concat_list(segments, list_path):
+    def quote(path):
+        return "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        for segment in segments:
+            f.write(f"file {quote(segment.image_path)}\n")
+            f.write(f"duration {segment.duration:.3f}\n")
+        # O demuxer concat ignora a duração da última entrada se ela não for repetida
+        f.write(f"file {quote(segments[-1].image_path)}\n")
+
+
+def _video_filter(segments, fps, size, zoom_factor, pixel_format="yuv420p"):
+    width, height = size
+    zoom = zoom_factor or 1
+    # Maior região central da imagem com a proporção de `size`, reduzida pelo mesmo zoom central fixo do caminho
+    # do MoviePy (`timeline.load_zoomed_frames`); em imagens já na proporção de `size`, é só o zoom
+    filters = [
+        f"crop='trunc(min(iw,ih*{width}/{height})/{zoom}/2)*2':'trunc(min(ih,iw*{height}/{width})/{zoom}/2)*2'",
+        f"scale={width}:{height}", "setsar=1", f"fps={fps}",
+    ]
+    for segment in segments:
+        if segment.fade_in:
+            end = segment.start + segment.fade_in
+            filters.append(
+                f"fade=t=in:st={segment.start:.3f}:d={segment.fade_in:.3f}:enable='between(t,{segment.start:.3f},{end:.3f})'"
+            )
+    if pixel_format:
+        filters.append(f"format={pixel_format}")
+    return ",".join(filters)
+
+
+def encode_still_segments_multi(segments, audio_file, outputs, fps=24, zoom_factor=1.1,
+                                preset=STILL_ENCODER_PRESET, crf=STILL_ENCODER_CRF, thumbnails=()):
+    """
+    Como `encode_still_segments`, mas gera vários formatos em um único processo do FFmpeg: cada imagem é
+    decodificada uma vez e dividida pelo filtro `split` entre as saídas. Cada saída recorta a sua proporção
+    da imagem decodificada (antes de qualquer redução), aplica zoom e fades no seu tamanho e tem a sua
+    instância do x264, então cada formato sai na resolução que a imagem permite.
+    `outputs` é uma lista de (arquivo de vídeo, (largura, altura)); `thumbnails`, de
+    (arquivo JPEG, (largura, altura), índice do quadro), imagens tiradas do mesmo fluxo de quadros.
+    """
+    if not segments:
+        raise ValueError("Nenhum trecho estático para codificar.")
+    branches = list(outputs) + list(thumbnails)
+    graph = [f"[0:v]split={len(branches)}{''.join(f'[s{i}]' for i in range(len(branches)))}"]
+    for i, (_, output_size) in enumerate(outputs):
+        graph.append(f"[s{i}]{_video_filter(segments, fps, output_size, zoom_factor)}[v{i}]")
+    for i, (_, thumb_size, frame_index) in enumerate(thumbnails):
+        # O quadro é escolhido antes do recorte: só ele é redimensionado
+        graph.append(f"[s{len(outputs) + i}]fps={fps},trim=start_frame={frame_index}:end_frame={frame_index + 1},"
+                     f"{_video_filter(segments, fps, thumb_size, zoom_factor, pixel_format=None)}[t{i}]")
+
+    with tempfile.TemporaryDirectory(prefix="vidgen_still_") as tmp_dir:
+        list_path = os.path.join(tmp_dir, "segments.txt")
+        _write_concat_list(segments, list_path)
+        cmd = [
+            get_ffmpeg_binary(), "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", audio_file,
+            "-filter_complex", ";".join(graph),
+        ]
+        for i, (output_file, _) in enumerate(outputs):
+            cmd += [
+                "-map", f"[v{i}]", "-map", "1:a:0",
+                "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-tune", "stillimage",
+                "-c:a", "aac", "-b:a", "192k",
+                "-shortest", "-movflags", "+faststart",
+                output_file,
+            ]
+        for i, (thumb_file, _, _) in enumerate(thumbnails):
+            cmd += ["-map", f"[t{i}]", "-frames:v", "1", "-q:v", "2", thumb_file]
+        logger.info(f"Codificando {len(segments)} trechos estáticos em {len(branches)} formatos com FFmpeg: "
+                    f"{', '.join(branch[0] for branch in branches)}")
+        run_process(cmd)
+    add_frames(int(round(sum(segment.duration for segment in segments) * fps)) * len(outputs))
+    logger.info(f"Formatos gerados pelo caminho rápido de imagens estáticas: {len(branches)}")
+
+
+def encode_still_segments(segments, audio_file, output_file, fps=24, size=(1920, 1080), zoom_factor=1.1,
+                          preset=STILL_ENCODER_PRESET, crf=STILL_ENCODER_CRF):
+    """
+    Codifica trechos estáticos (`timeline.StillSegment`) diretamente com o FFmpeg (demuxer concat), sem compor quadros em Python:
+    cada imagem é decodificada uma única vez e repetida pelo filtro `fps`, e o x264 roda com
+    `-tune stillimage`. O vídeo é cortado na duração do áudio.
+    Levanta subprocess.CalledProcessError se o FFmpeg falhar.
+    """
+    if not segments:
+        raise ValueError("Nenhum trecho estático para codificar.")
+
+    with tempfile.TemporaryDirectory(prefix="vidgen_still_") as tmp_dir:
+        list_path = os.path.join(tmp_dir, "segments.txt")
+        _write_concat_list(segments, list_path)
+        cmd = [
+            get_ffmpeg_binary(), "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", audio_file,
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-vf", _video_filter(segments, fps, size, zoom_factor),
+            "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-tune", "stillimage",
+            "-c:a", "aac", "-b:a", "192k",
+            "-shortest", "-movflags", "+faststart",
+            output_file,
+        ]
+        logger.info(f"Codificando {len(segments)} trechos estáticos com FFmpeg: {output_file}")
+        run_process(cmd)
+    # O FFmpeg repete os quadros sozinho: conta os quadros que ele gravou (vídeo cortado no áudio com -shortest)
+    add_frames(int(round(sum(segment.duration for segment in segments) * fps)))
+    logger.info(f"Vídeo gerado pelo caminho rápido de imagens estáticas: {output_file}")
@@ -1,5 +1,17 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from gtts import gTTS
 # from src.config import AUDIO_DIR # AUDIO_DIR não é usado aqui, o path completo é passado
+from src.config import TTS_ENGINE, TTS_CHUNKED, TTS_WORKERS
+from src.utils.helpers import get_ffmpeg_binary
+from src.utils.tts_cache import TTSCache, get_tts_cache
+from src.utils.audio_alignment import build_word_index, save_word_index
+from src.utils.tracing import span, in_current_span, run_process
 import logging
 
 # Se o logging já está configurado no app.py ou main.py, esta linha pode não ser necessária
@@ -7,17 +19,204 @@ import logging
 # logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__) # Boa prática usar logger específico do módulo
 
-def text_to_speech(text, output_file, lang='en'): # Adicionado 'lang' como parâmetro
+# Trecho de texto sintetizado e a duração (em segundos) do áudio correspondente
+TTSChunk = namedtuple("TTSChunk", ["text", "duration"])
+
+# Limite de caracteres por trecho; frases mais longas são quebradas em vírgulas/espaços
+MAX_CHUNK_CHARS = 400
+
+
+class GTTSEngine:
+    """Google Text-to-Speech (online). Gera MP3 e suporta chamadas concorrentes."""
+
+    name = "gtts"
+    extension = ".mp3"
+    concurrent = True
+
+    def __init__(self, slow=False):
+        self.slow = slow
+
+    def settings(self):
+        return {"engine": self.name, "slow": self.slow}
+
+    def synthesize(self, text, output_file, lang='en'):
+        tts = gTTS(text=text, lang=lang, slow=self.slow)
+        tts.save(output_file)
+
+
+class Pyttsx3Engine:
+    """
+    Motor offline via pyttsx3 (espeak no Linux, SAPI5 no Windows). Gera WAV; as chamadas são
+    serializadas porque o pyttsx3 não é seguro para uso entre threads.
+    """
+
+    name = "pyttsx3"
+    extension = ".wav"
+    concurrent = False
+    _lock = threading.Lock()
+
+    def __init__(self, rate=None, voice=None):
+        self.rate = rate
+        self.voice = voice
+
+    def settings(self):
+        return {"engine": self.name, "rate": self.rate, "voice": self.voice}
+
+    def synthesize(self, text, output_file, lang='en'):
+        import pyttsx3
+        with self._lock:
+            engine = pyttsx3.init()
+            if self.rate:
+                engine.setProperty('rate', self.rate)
+            voice = self.voice or next(
+                (v.id for v in engine.getProperty('voices') if lang in (v.id or '').lower()), None
+            )
+            if voice:
+                engine.setProperty('voice', voice)
+            engine.save_to_file(text, output_file)
+            engine.runAndWait()
+            engine.stop()
+
+
+TTS_ENGINES = {
+    GTTSEngine.name: GTTSEngine,
+    Pyttsx3Engine.name: Pyttsx3Engine,
+}
+
+
+def get_tts_engine(name=TTS_ENGINE, **settings):
+    """Instancia o motor de TTS pelo nome ('gtts' ou 'pyttsx3')."""
+    try:
+        return TTS_ENGINES[name](**settings)
+    except KeyError:
+        raise ValueError(f"Motor de TTS desconhecido: {name}. Opções: {', '.join(TTS_ENGINES)}") from None
+
+
+def split_sentences(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Divide o texto em frases (., ! ou ? seguidos de espaço). Frases maiores que `max_chars`
+    são quebradas em vírgulas e, se ainda for preciso, entre palavras.
+    """
+    chunks = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(', ', 0, max_chars)
+            if cut <= 0:
+                cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
+
+
+def get_audio_duration(audio_file):
+    """Duração em segundos de um arquivo de áudio, lida dos cabeçalhos (sem decodificar o áudio)."""
+    import mutagen
+    audio = mutagen.File(audio_file)
+    if audio is None or not getattr(audio, "info", None):
+        raise ValueError(f"Formato de áudio não reconhecido: {audio_file}")
+    return audio.info.length
+
+
+def concat_audio(input_files, output_file):
+    """Junta os arquivos de áudio, na ordem, em um único MP3."""
+    if len(input_files) == 1 and os.path.splitext(input_files[0])[1] == os.path.splitext(output_file)[1]:
+        shutil.copyfile(input_files[0], output_file)
+        return
+    cmd = [get_ffmpeg_binary(), "-y", "-loglevel", "error"]
+    for input_file in input_files:
+        cmd += ["-i", input_file]
+    inputs = "".join(f"[{i}:a:0]" for i in range(len(input_files)))
+    cmd += [
+        "-filter_complex", f"{inputs}concat=n={len(input_files)}:v=0:a=1[out]",
+        "-map", "[out]", "-c:a", "libmp3lame", "-q:a", "4",
+        output_file,
+    ]
+    run_process(cmd)
+
+
+def synthesize_chunks(chunks, output_file, lang='en', engine=None, max_workers=TTS_WORKERS, use_cache=True):
+    """
+    Sintetiza cada trecho separadamente (em paralelo, se o motor permitir) e junta tudo em `output_file`.
+    Com `use_cache`, o áudio final e cada trecho são reaproveitados do cache de TTS: ao editar o texto,
+    só as frases alteradas são sintetizadas de novo.
+    Retorna a lista de TTSChunk, na ordem do texto.
+    """
+    engine = engine or get_tts_engine()
+    cache = get_tts_cache() if use_cache else None
+    settings = engine.settings()
+    output_ext = os.path.splitext(output_file)[1]
+    chunk_keys = [TTSCache.make_key(chunk, lang, settings) for chunk in chunks]
+    full_key = TTSCache.make_key("\n".join(chunk_keys), lang, {"output": output_ext})
+
+    if cache:
+        meta = cache.get(full_key, output_ext, output_file)
+        if meta:
+            logger.info(f"Áudio completo encontrado no cache de TTS: {output_file}")
+            return [TTSChunk(chunk["text"], chunk["duration"]) for chunk in meta["chunks"]]
+
+    with tempfile.TemporaryDirectory(prefix="vidgen_tts_") as tmp_dir:
+        chunk_files = [os.path.join(tmp_dir, f"chunk_{i:04d}{engine.extension}") for i in range(len(chunks))]
+        durations = [None] * len(chunks)
+        if cache:
+            for i, key in enumerate(chunk_keys):
+                meta = cache.get(key, engine.extension, chunk_files[i])
+                if meta:
+                    durations[i] = meta["duration"]
+        missing = [i for i, duration in enumerate(durations) if duration is None]
+
+        def synthesize(index):
+            with span("tts.chunk", chars=len(chunks[index])):
+                engine.synthesize(chunks[index], chunk_files[index], lang=lang)
+            duration = get_audio_duration(chunk_files[index])
+            if cache:
+                cache.put(chunk_keys[index], engine.extension, chunk_files[index],
+                          {"text": chunks[index], "lang": lang, "duration": duration})
+            return duration
+
+        if missing:
+            workers = max(1, min(max_workers, len(missing))) if engine.concurrent else 1
+            logger.info(f"Sintetizando {len(missing)} de {len(chunks)} trechos com '{engine.name}' "
+                        f"({workers} workers; {len(chunks) - len(missing)} do cache)...")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for index, duration in zip(missing, executor.map(in_current_span(synthesize), missing)):
+                    durations[index] = duration
+        else:
+            logger.info(f"Todos os {len(chunks)} trechos encontrados no cache de TTS.")
+
+        with span("tts.concat", chunks=len(chunk_files)):
+            concat_audio(chunk_files, output_file)
+
+    result = [TTSChunk(text, duration) for text, duration in zip(chunks, durations)]
+    if cache:
+        cache.put(full_key, output_ext, output_file,
+                  {"lang": lang, "chunks": [{"text": c.text, "duration": c.duration} for c in result]})
+    return result
+
+
+def text_to_speech(text, output_file, lang='en', chunked=TTS_CHUNKED, engine=None, use_cache=True): # Adicionado 'lang' como parâmetro
+    """
+    Gera o áudio de `text` em `output_file` e retorna a lista de TTSChunk (texto e duração de cada trecho).
+    Com `chunked=True` o texto é dividido em frases, sintetizadas em paralelo e depois unidas;
+    as durações por frase podem ser usadas para sincronizar as imagens.
+    Áudios (e frases) já sintetizados com o mesmo texto, idioma e motor vêm do cache de TTS.
+    """
     logger.info(f"Iniciando a geração do áudio para: {output_file}")
+    engine = engine or get_tts_engine()
     try:
-        # Criar áudio usando gTTS
-        # logger.debug(f"Texto a ser convertido: {text[:100]}...") # Logar apenas uma parte
-        tts = gTTS(text=text, lang=lang, slow=False)
-        # logger.info("Objeto gTTS criado com sucesso.")
-        tts.save(output_file)
+        # Sem `chunked`, o texto inteiro é sintetizado de uma vez (comportamento original)
+        chunks = (split_sentences(text) or [text]) if chunked else [text]
+        result = synthesize_chunks(chunks, output_file, lang=lang, engine=engine, use_cache=use_cache)
+        # Índice de tempos por palavra ao lado do áudio, usado para sincronizar as imagens
+        save_word_index(output_file, build_word_index(result))
         logger.info(f"Áudio gerado com sucesso: {output_file}")
-        # print(f"Áudio gerado com sucesso: {output_file}") # 'print' é mais para CLI, logging é melhor
+        return result
     except Exception as e:
-        logger.error(f"Erro ao gerar áudio com gTTS: {e}", exc_info=True)
-        # print(f"Erro ao gerar áudio: {e}")
-        raise # Relançar a exceção para que o chamador possa lidar com ela
\ No newline at end of file
+        logger.error(f"Erro ao gerar áudio com '{engine.name}': {e}", exc_info=True)
+        raise # Relançar a exceção para que o chamador possa lidar com ela
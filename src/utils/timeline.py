@@ -0,0 +1,122 @@
+import bisect
+import logging
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Trecho estático da linha do tempo: uma imagem parada por `duration` segundos a partir de `start`,
+# opcionalmente entrando com um fade a partir do preto de `fade_in` segundos.
+StillSegment = namedtuple("StillSegment", ["image_path", "start", "duration", "fade_in"])
+
+
+def build_still_segments(image_paths, total_duration, slot_duration=4, fade_in=1.0):
+    """
+    Distribui as imagens em rodízio, `slot_duration` segundos cada, até cobrir `total_duration`.
+    Todos os trechos menos o último entram com fade.
+    """
+    if not image_paths:
+        return []
+    segments = []
+    current_time = 0
+    while current_time < total_duration:
+        for image_path in image_paths:
+            segments.append(StillSegment(image_path, current_time, slot_duration, fade_in))
+            current_time += slot_duration
+            if current_time >= total_duration:
+                break
+    segments[-1] = segments[-1]._replace(fade_in=0)
+    return segments
+
+
+def load_zoomed_frames(image_path, zoom_factor=1.1, sizes=(None,)):
+    """
+    Decodifica a imagem uma única vez e gera um array NumPy para cada tamanho em `sizes` (None = o tamanho da
+    própria imagem): recorta do centro a maior região com a proporção do tamanho, aplica o zoom central fixo
+    e redimensiona. Cada formato sai da resolução da imagem inteira (ex: o 9:16 de uma foto 4:3 não passa
+    antes por um recorte 16:9).
+    """
+    img = Image.open(image_path).convert("RGB")
+    w, h = img.size
+    frames = []
+    for size in sizes:
+        out_w, out_h = size or (w, h)
+        zw = int(min(w, h * out_w / out_h) / zoom_factor)
+        zh = int(min(h, w * out_h / out_w) / zoom_factor)
+        left = (w - zw) // 2
+        top = (h - zh) // 2
+        frames.append(np.array(img.resize((out_w, out_h), box=(left, top, left + zw, top + zh))))
+    return frames
+
+
+def load_zoomed_frame(image_path, zoom_factor=1.1, size=None):
+    """Como `load_zoomed_frames`, para um único tamanho `size` (por padrão, o tamanho da própria imagem)."""
+    return load_zoomed_frames(image_path, zoom_factor, [size])[0]
+
+
+class Timeline:
+    """
+    Linha do tempo "preguiçosa": os trechos guardam apenas o caminho da imagem (em cache no disco)
+    e cada imagem é decodificada só quando um quadro dela é pedido. Apenas os últimos `max_decoded`
+    quadros decodificados ficam em memória, então o pico de memória não cresce com a duração do vídeo.
+    Com `extra_sizes`, cada imagem decodificada gera também um quadro para cada um desses tamanhos (ex: os
+    formatos vertical e miniatura), pedidos com `frame_at(t, índice)`; o índice 0 é `size`.
+    """
+
+    def __init__(self, segments, size=(1920, 1080), zoom_factor=1.1, max_decoded=2, extra_sizes=()):
+        if not segments:
+            raise ValueError("A linha do tempo precisa de pelo menos um trecho.")
+        self.segments = sorted(segments, key=lambda segment: segment.start)
+        self.size = size
+        self.sizes = [size] + list(extra_sizes)
+        self.zoom_factor = zoom_factor
+        self.max_decoded = max_decoded
+        self._starts = [segment.start for segment in self.segments]
+        self._decoded = OrderedDict()
+
+    @property
+    def duration(self):
+        last = self.segments[-1]
+        return last.start + last.duration
+
+    def segment_at(self, t):
+        index = max(0, bisect.bisect_right(self._starts, t) - 1)
+        return self.segments[index]
+
+    def _decode(self, image_path):
+        frames = self._decoded.get(image_path)
+        if frames is not None:
+            self._decoded.move_to_end(image_path)
+            return frames
+        frames = load_zoomed_frames(image_path, self.zoom_factor, self.sizes)
+        self._decoded[image_path] = frames
+        while len(self._decoded) > self.max_decoded:
+            self._decoded.popitem(last=False)
+        return frames
+
+    def make_frame(self, t):
+        """Quadro RGB (uint8) no instante `t`, com o fade a partir do preto aplicado no início do trecho."""
+        return self.frame_at(t)
+
+    def frame_at(self, t, index=0):
+        """Como `make_frame`, no tamanho `self.sizes[index]`."""
+        segment = self.segment_at(t)
+        frame = self._decode(segment.image_path)[index]
+        elapsed = t - segment.start
+        if segment.fade_in and elapsed < segment.fade_in:
+            alpha = max(0.0, elapsed / segment.fade_in)
+            return (frame * np.float32(alpha)).astype(np.uint8)
+        return frame
+
+    def iter_frames(self, fps, duration=None):
+        """Gera os quadros em ordem, um por vez, até `duration` (por padrão, a duração da linha do tempo)."""
+        n_frames = int(np.ceil((duration or self.duration) * fps))
+        for i in range(n_frames):
+            yield self.make_frame(i / fps)
+
+    def to_clip(self, duration=None, index=0):
+        """VideoClip do MoviePy cujos quadros vêm de `frame_at(t, index)` (sem materializar clipes por imagem)."""
+        from moviepy.editor import VideoClip
+        return VideoClip(make_frame=lambda t: self.frame_at(t, index), duration=duration or self.duration)
@@ -0,0 +1,376 @@
+"""
+Rastreamento por etapas da renderização: spans aninhados com tempo de parede, bytes baixados,
+quadros gravados e pico de memória (RSS) enquanto cada span esteve ativo. O RSS do processo é amostrado
+por uma thread enquanto houver spans abertos; o pico dos subprocessos (FFmpeg) fica à parte, em
+`child_peak_rss_mb` (medido pelo `wait4` em `run_process`, ou amostrado em `watch_process`).
+
+    with trace("render", trace_file=...):          # raiz: grava o JSON do vídeo e uma linha em METRICS_FILE
+        with span("tts"):
+            ...
+        with span("download.image", url=url):
+            add_bytes(len(chunk))
+
+Fora de um `trace`, `span`/`add_bytes`/`add_frames` não registram nada. Funções executadas em pools de
+threads devem ser embrulhadas com `in_current_span` para que seus spans fiquem dentro do span de quem as enfileirou.
+"""
+import contextvars
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import psutil
+
+from src.config import TRACING_ENABLED, METRICS_FILE, TRACE_RSS_SAMPLE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+_MB = 1024 * 1024
+_processes = {}
+
+
+def rss_mb(pid=None):
+    """Memória residente atual do processo `pid` (padrão: este processo), em MB, ou None se ele não existir mais."""
+    pid = pid or os.getpid()
+    try:
+        process = _processes.get(pid)
+        if process is None:
+            process = _processes[pid] = psutil.Process(pid)
+        return process.memory_info().rss / _MB
+    except (psutil.Error, OSError):
+        _processes.pop(pid, None)
+        return None
+
+
+class _RssSampler:
+    """
+    Thread única que, a cada `interval` segundos, mede o RSS do processo (e dos subprocessos observados)
+    e atualiza o pico de todos os spans abertos. Só roda enquanto houver spans registrados.
+    """
+
+    def __init__(self, interval=TRACE_RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self._spans = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, span):
+        with self._lock:
+            self._spans.add(span)
+            # Depois de um fork a thread do processo pai não existe no filho
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trace_rss_sampler", daemon=True)
+                self._thread.start()
+
+    def unregister(self, span):
+        with self._lock:
+            self._spans.discard(span)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                spans = list(self._spans)
+                if not spans:
+                    self._thread = None
+                    return
+            rss = rss_mb()
+            for span in spans:
+                span.sample(rss)
+            time.sleep(self.interval)
+
+
+_sampler = _RssSampler()
+
+
+class Span:
+    def __init__(self, name, attrs=None, parent=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.parent = parent
+        self.children = []
+        self.bytes = 0
+        self.frames = 0
+        self.error = None
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.seconds = None
+        self.peak_rss_mb = None
+        self.child_peak_rss_mb = None
+        self._watched_pids = set()
+        self._lock = threading.Lock()
+        if parent is not None:
+            with parent._lock:
+                parent.children.append(self)
+        self.sample(rss_mb())
+        _sampler.register(self)
+
+    def sample(self, rss):
+        """Atualiza os picos com o RSS do processo (`rss`, em MB) e o dos subprocessos observados."""
+        with self._lock:
+            if rss is not None:
+                self.peak_rss_mb = max(self.peak_rss_mb or 0.0, rss)
+            for pid in list(self._watched_pids):
+                child_rss = rss_mb(pid)
+                if child_rss is None:
+                    self._watched_pids.discard(pid) # Já terminou
+                else:
+                    self.child_peak_rss_mb = max(self.child_peak_rss_mb or 0.0, child_rss)
+
+    def add_child_rss(self, mb):
+        with self._lock:
+            self.child_peak_rss_mb = max(self.child_peak_rss_mb or 0.0, mb)
+
+    def watch(self, pid):
+        with self._lock:
+            self._watched_pids.add(pid)
+
+    def finish(self, error=None):
+        self.seconds = time.perf_counter() - self._start
+        _sampler.unregister(self)
+        self.sample(rss_mb())
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def add(self, bytes=0, frames=0):
+        with self._lock:
+            self.bytes += bytes
+            self.frames += frames
+
+    def to_dict(self):
+        """Span e filhos como dicionário; `total_bytes`/`total_frames` somam a subárvore."""
+        with self._lock:
+            children = [child.to_dict() for child in self.children]
+        return {
+            "name": self.name,
+            **({"attrs": self.attrs} if self.attrs else {}),
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "bytes": self.bytes,
+            "frames": self.frames,
+            "total_bytes": self.bytes + sum(child["total_bytes"] for child in children),
+            "total_frames": self.frames + sum(child["total_frames"] for child in children),
+            "peak_rss_mb": self.peak_rss_mb,
+            **({"child_peak_rss_mb": self.child_peak_rss_mb} if self.child_peak_rss_mb is not None else {}),
+            **({"error": self.error} if self.error else {}),
+            **({"children": children} if children else {}),
+        }
+
+
+@contextmanager
+def span(name, **attrs):
+    """Span filho do span atual. Sem trace ativo, não faz nada (e retorna None)."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    current = Span(name, attrs, parent)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(error=e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def add_bytes(count):
+    """Soma `count` bytes baixados ao span atual."""
+    current = _current_span.get()
+    if current is not None:
+        current.add(bytes=count)
+
+
+def add_frames(count=1):
+    """Soma `count` quadros gravados ao span atual."""
+    current = _current_span.get()
+    if current is not None:
+        current.add(frames=count)
+
+
+def watch_process(pid):
+    """Passa a amostrar o RSS do subprocesso `pid` (ex: o FFmpeg de um pipe) no span atual, até ele terminar."""
+    current = _current_span.get()
+    if current is not None:
+        current.watch(pid)
+
+
+def run_process(cmd):
+    """
+    Como `subprocess.run(cmd, check=True, capture_output=True)`, registrando no span atual o pico de memória
+    do subprocesso (`ru_maxrss` do `os.wait4`; no Windows, amostrado enquanto ele roda).
+    """
+    current = _current_span.get()
+    if current is None:
+        return subprocess.run(cmd, check=True, capture_output=True)
+    if not hasattr(os, "wait4"): # Windows
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+            current.watch(process.pid)
+            stdout, stderr = process.communicate()
+        returncode = process.returncode
+    else:
+        # O communicate já recolheria o processo (e o seu rusage): as saídas vão para arquivos temporários,
+        # que não enchem como um pipe enquanto esperamos no wait4
+        with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(cmd, stdout=stdout_file, stderr=stderr_file)
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = returncode = os.waitstatus_to_exitcode(status)
+            stdout_file.seek(0)
+            stderr_file.seek(0)
+            stdout, stderr = stdout_file.read(), stderr_file.read()
+        current.add_child_rss(usage.ru_maxrss / 1024) # ru_maxrss vem em KB no Linux
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+
+
+def in_current_span(fn):
+    """
+    Embrulha `fn` para rodar (em outra thread) dentro do span atual de quem chamou `in_current_span`.
+    Threads de pools não herdam o contexto de quem enfileirou a tarefa.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+    return run
+
+
+def stage_totals(trace_dict):
+    """Soma o tempo por nome de span em toda a árvore: {nome: {"seconds", "count", "bytes", "frames"}}."""
+    totals = {}
+
+    def visit(node):
+        entry = totals.setdefault(node["name"], {"seconds": 0.0, "count": 0, "bytes": 0, "frames": 0})
+        entry["seconds"] += node["seconds"] or 0.0
+        entry["count"] += 1
+        entry["bytes"] += node["bytes"]
+        entry["frames"] += node["frames"]
+        for child in node.get("children", []):
+            visit(child)
+    for child in trace_dict.get("children", []):
+        visit(child)
+    return totals
+
+
+def append_metrics(record, metrics_file=METRICS_FILE):
+    """Acrescenta uma linha ao arquivo de métricas agregadas (JSON Lines; seguro entre processos com O_APPEND)."""
+    os.makedirs(os.path.dirname(metrics_file) or ".", exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(metrics_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def trace(name, trace_file=None, metrics_file=METRICS_FILE, **attrs):
+    """
+    Span raiz de uma renderização. Ao sair grava a árvore completa em `trace_file` (se informado) e
+    um resumo por etapa em `metrics_file`. Com TRACING_ENABLED desligado, não faz nada.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+    root = Span(name, attrs)
+    token = _current_span.set(root)
+    error = None
+    try:
+        yield root
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        root.finish(error=error)
+        try:
+            _write_trace(root, trace_file, metrics_file)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o trace de '{name}': {e}")
+
+
+def _max_in_tree(node, field):
+    values = [node.get(field)] + [_max_in_tree(child, field) for child in node.get("children", [])]
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _write_trace(root, trace_file, metrics_file):
+    data = root.to_dict()
+    if trace_file:
+        os.makedirs(os.path.dirname(trace_file) or ".", exist_ok=True)
+        tmp_file = f"{trace_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, trace_file)
+    if metrics_file:
+        append_metrics({
+            "name": root.name,
+            "attrs": root.attrs,
+            "started_at": root.started_at,
+            "seconds": data["seconds"],
+            "status": "failed" if root.error else "ok",
+            "bytes": data["total_bytes"],
+            "frames": data["total_frames"],
+            "peak_rss_mb": data["peak_rss_mb"],
+            "child_peak_rss_mb": _max_in_tree(data, "child_peak_rss_mb"),
+            "stages": stage_totals(data),
+            "trace_file": trace_file,
+        }, metrics_file)
+
+
+def load_metrics(metrics_file=METRICS_FILE, limit=None):
+    """Lê as linhas do arquivo de métricas (as `limit` mais recentes, se informado)."""
+    try:
+        with open(metrics_file, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in lines[-limit:] if limit else lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue # Linha truncada por um processo interrompido
+    return records
+
+
+def summarize_metrics(records):
+    """
+    Estatísticas por etapa sobre vários traces: {etapa: {"runs", "mean_seconds", "p95_seconds",
+    "total_bytes", "total_frames"}}, ordenadas pelo tempo médio (as mais lentas primeiro).
+    """
+    per_stage = {}
+    for record in records:
+        for stage, totals in record.get("stages", {}).items():
+            entry = per_stage.setdefault(stage, {"seconds": [], "bytes": 0, "frames": 0})
+            entry["seconds"].append(totals["seconds"])
+            entry["bytes"] += totals["bytes"]
+            entry["frames"] += totals["frames"]
+    summary = {}
+    for stage, entry in per_stage.items():
+        seconds = sorted(entry["seconds"])
+        summary[stage] = {
+            "runs": len(seconds),
+            "mean_seconds": sum(seconds) / len(seconds),
+            "p95_seconds": seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))],
+            "total_bytes": entry["bytes"],
+            "total_frames": entry["frames"],
+        }
+    return dict(sorted(summary.items(), key=lambda item: item[1]["mean_seconds"], reverse=True))
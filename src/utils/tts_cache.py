@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+
+from src.config import TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES
+from src.utils.helpers import evict_lru
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = (".mp3", ".wav")
+
+
+def normalize_text(text):
+    """Normaliza espaços em branco, para que diferenças só de formatação não invalidem o cache."""
+    return " ".join(text.split())
+
+
+class TTSCache:
+    """
+    Cache em disco de áudios sintetizados, endereçado pelo hash de (texto normalizado, idioma,
+    configurações do motor). Funciona tanto para frases isoladas quanto para o áudio final completo;
+    cada entrada tem um .json ao lado com as durações. O tamanho total é limitado por LRU.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, lang, engine_settings):
+        payload = json.dumps(
+            {"text": normalize_text(text), "lang": lang, "engine": engine_settings},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _paths(self, key, extension):
+        return os.path.join(self.cache_dir, f"{key}{extension}"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key, extension, dest_file):
+        """
+        Copia o áudio da entrada para `dest_file` e retorna seus metadados, ou None se a entrada não existir.
+        A cópia é feita aqui para que uma entrada removida pelo LRU (de outro processo ou thread) entre a
+        consulta e a cópia conte como erro de cache em vez de falhar o chamador.
+        """
+        audio_path, meta_path = self._paths(key, extension)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            shutil.copyfile(audio_path, dest_file)
+            os.utime(audio_path, None)
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def put(self, key, extension, source_file, meta):
+        """Copia `source_file` para o cache com os metadados informados e retorna o caminho da entrada."""
+        audio_path, meta_path = self._paths(key, extension)
+        tmp_suffix = f".{os.getpid()}_{threading.get_ident()}.tmp"
+        shutil.copyfile(source_file, audio_path + tmp_suffix)
+        with open(meta_path + tmp_suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_path + tmp_suffix, meta_path)
+        os.replace(audio_path + tmp_suffix, audio_path)
+        self._evict()
+        return audio_path
+
+    def _evict(self):
+        with self._lock:
+            for path in evict_lru(self.cache_dir, self.max_bytes, AUDIO_EXTENSIONS, sidecar_extensions=(".json",)):
+                logger.info(f"Áudio removido do cache (LRU): {path}")
+
+
+_default_cache = None
+
+
+def get_tts_cache():
+    """Retorna a instância compartilhada do cache de TTS."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TTSCache()
+    return _default_cache
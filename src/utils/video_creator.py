@@ -1,15 +1,25 @@
-from moviepy.editor import *
-from moviepy.video.fx import all as vfx
-import requests
-from PIL import Image
-from io import BytesIO
+from PIL import Image, ImageOps
+import json
 import logging
 import os
-import numpy as np
-from vidgear.gears import CamGear
-from vidgear.gears import WriteGear
+import subprocess
 
-from src.config import IMAGES_DIR, VIDEOS_DIR
+from src.config import (
+    STILL_FAST_PATH, STILL_ENCODER_PRESET, STILL_ENCODER_CRF, VIDEO_ENCODER, VIDEO_PRESET, VIDEO_CRF, VIDEO_TUNE,
+    RENDER_PROFILES, OUTPUT_FORMATS, IMAGES_DIR, IMAGE_SEARCH_PER_QUERY, IMAGE_SEARCH_MAX_PER_PROVIDER,
+)
+from src.apis.image_search import ImageCandidate, configured_providers, search_image_per_query, latency_stats
+from src.apis.pexels_api import is_relevant_image, IRRELEVANT_KEYWORDS
+from src.utils.image_hash import PerceptualHashIndex
+from src.utils.image_prefetch import prefetch_images, prefetch_image_map
+from src.utils.image_processing import extract_search_queries_for_article
+from src.utils.still_encoder import encode_still_segments, encode_still_segments_multi
+from src.utils.timeline import Timeline, StillSegment, build_still_segments
+from src.utils.encoders import encode_clip, encode_clip_multi
+from src.utils.text_to_speech import get_audio_duration
+from src.utils.tracing import span
+from src.utils.audio_alignment import load_word_index, estimate_word_index, image_slots, rescale_word_index
+from src.utils.build_cache import get_build_cache, file_digest
 
 def resize_image_to_16_9(image_path, output_path):
     """
@@ -33,116 +43,401 @@ def resize_image_to_16_9(image_path, output_path):
         bottom = top + new_height
         cropped_img = img.crop((0, top, original_width, bottom))
 
-    # Redimensiona para 1920x1080
-    resized_img = cropped_img.resize((1920, 1080), Image.LANCZOS)
+    # Redimensiona para 1920x1080 (em RGB, para poder ser salva como JPEG)
+    resized_img = cropped_img.convert("RGB").resize((1920, 1080), Image.LANCZOS)
     resized_img.save(output_path)
 
+
+def resize_image_for_formats(image_path, output_path, zoom_factor=1.1):
+    """
+    Prepara a imagem para renderizações com vários formatos (ver `render_segments`): sem o recorte 16:9 de
+    `resize_image_to_16_9`, para que cada formato recorte a sua proporção da imagem inteira, e reduzida só
+    até onde o recorte (já com o zoom) de cada formato em OUTPUT_FORMATS ainda tenha o tamanho do formato.
+    Nunca é ampliada.
+    """
+    img = ImageOps.exif_transpose(Image.open(image_path)).convert("RGB")
+    w, h = img.size
+    scale = max(zoom_factor * fw / min(w, h * fw / fh) for fw, fh in (f["size"] for f in OUTPUT_FORMATS.values()))
+    if scale < 1:
+        img = img.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.LANCZOS)
+    img.save(output_path, quality=95)
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def default_image_path(size=(1920, 1080)):
+    """Imagem padrão (fundo escuro liso) gerada localmente uma única vez, para vídeos sem nenhuma imagem válida."""
+    path = os.path.join(IMAGES_DIR, f"default_{size[0]}x{size[1]}.jpg")
+    if not os.path.exists(path):
+        os.makedirs(IMAGES_DIR, exist_ok=True)
+        tmp_path = f"{path[:-len('.jpg')]}.{os.getpid()}.tmp.jpg"
+        Image.new("RGB", size, (18, 22, 34)).save(tmp_path, quality=90)
+        os.replace(tmp_path, path)
+    return path
+
+
+def get_render_profile(profile):
+    """Configuração do perfil de renderização ('final' ou 'preview', ver RENDER_PROFILES)."""
+    try:
+        return RENDER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Perfil de renderização desconhecido: {profile}. Opções: {', '.join(RENDER_PROFILES)}") from None
+
+
+def get_output_format(name):
+    """Configuração do formato de saída ('landscape', 'vertical' ou 'thumbnail', ver OUTPUT_FORMATS)."""
+    try:
+        return OUTPUT_FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Formato de saída desconhecido: {name}. Opções: {', '.join(OUTPUT_FORMATS)}") from None
+
+
+def profile_formats(profile, formats=None):
+    """`formats`, se informado, ou os formatos de saída do perfil (lista 'formats' em RENDER_PROFILES)."""
+    return list(get_render_profile(profile).get("formats", ["landscape"]) if formats is None else formats)
+
+
+def output_paths(video_file, formats):
+    """Arquivo de cada formato ao lado do vídeo principal: {formato: caminho} ('landscape' é o próprio `video_file`)."""
+    base = os.path.splitext(video_file)[0]
+    return {name: base + get_output_format(name)["suffix"] for name in formats}
+
+
+def format_size(name, frame_size):
+    """
+    Tamanho do formato em um perfil com quadros de `frame_size`: OUTPUT_FORMATS dá o tamanho para 1080 de
+    altura (ex: o 'vertical' sai em 1080x1920 no perfil final). Dimensões pares, para o x264.
+    """
+    width, height = get_output_format(name)["size"]
+    scale = frame_size[1] / 1080
+    return (max(2, int(round(width * scale / 2)) * 2), max(2, int(round(height * scale / 2)) * 2))
+
+
+def thumbnail_time(segments, total_duration, thumbnail_at=None):
+    """Instante da miniatura: `thumbnail_at` segundos ou, por padrão, o meio do primeiro trecho (já sem fade)."""
+    if thumbnail_at is None:
+        first = segments[0]
+        thumbnail_at = first.start + max(first.fade_in, first.duration / 2)
+    return min(max(0.0, thumbnail_at), total_duration)
+
+
+def render_segments(segments, audio_file, output_file, total_duration, profile="final", formats=None, thumbnail_at=None):
+    """
+    Codifica os trechos estáticos da linha do tempo com o áudio: tenta o caminho rápido do FFmpeg e,
+    se ele estiver desativado ou falhar, gera os quadros pela linha do tempo preguiçosa.
+    `profile` define resolução, fps e preset/CRF do encoder (ver RENDER_PROFILES).
+
+    Todos os `formats` (ver OUTPUT_FORMATS e `profile_formats`) saem da mesma passada: cada imagem é
+    decodificada uma vez e cada formato recorta dela a sua proporção antes da redução e do zoom, então sai
+    na sua resolução nativa se a imagem tiver resolução para isso (ver `resize_image_for_formats`; imagens
+    já recortadas em 16:9 dão um vertical ampliado). O vídeo principal ('landscape', `output_file`) é sempre
+    gerado; sem `formats`, é o único. A miniatura é o quadro em `thumbnail_at` segundos (ver `thumbnail_time`).
+    Retorna {formato: caminho}.
+    """
+    settings = get_render_profile(profile)
+    size, fps = tuple(settings["size"]), settings["fps"]
+    encoder_settings = {key: settings[key] for key in ("preset", "crf") if settings.get(key) is not None}
+    formats = list(formats or ["landscape"])
+    if "landscape" not in formats:
+        formats.insert(0, "landscape")
+    paths = output_paths(output_file, formats)
+    videos = [(paths[name], format_size(name, size)) for name in formats if get_output_format(name)["kind"] == "video"]
+    images = [(paths[name], format_size(name, size)) for name in formats if get_output_format(name)["kind"] == "image"]
+    thumbnail_t = thumbnail_time(segments, total_duration, thumbnail_at)
+    single_output = len(videos) == 1 and not images
+
+    # Todos os trechos são imagens paradas: o FFmpeg pode repetir os quadros sozinho,
+    # sem que o MoviePy componha cada quadro em Python.
+    if STILL_FAST_PATH:
+        try:
+            if single_output:
+                encode_still_segments(segments, audio_file, output_file, fps=fps, size=size, zoom_factor=1.1,
+                                      **encoder_settings)
+            else:
+                thumbnails = [(path, image_size, int(thumbnail_t * fps)) for path, image_size in images]
+                encode_still_segments_multi(segments, audio_file, videos, fps=fps, zoom_factor=1.1,
+                                            thumbnails=thumbnails, **encoder_settings)
+            return paths
+        except (subprocess.CalledProcessError, OSError) as e:
+            stderr = getattr(e, "stderr", b"") or b""
+            logging.warning(f"Caminho rápido do FFmpeg falhou ({e}: {stderr.decode(errors='ignore')}). "
+                            "Usando o MoviePy.")
+
+    # Linha do tempo preguiçosa: cada imagem é decodificada só quando seus quadros são gerados,
+    # então a memória não cresce com a duração do vídeo. Cada decodificação gera o quadro de todos os formatos.
+    sizes = [video_size for _, video_size in videos] + [image_size for _, image_size in images]
+    timeline = Timeline(segments, size=sizes[0], zoom_factor=1.1, extra_sizes=sizes[1:])
+
+    # Exportar o vídeo final
+    if single_output:
+        encode_clip(timeline.to_clip(duration=total_duration), output_file, fps=fps, audio_file=audio_file,
+                    **encoder_settings)
+        return paths
+
+    encode_clip_multi([(path, timeline.to_clip(duration=total_duration, index=i)) for i, (path, _) in enumerate(videos)],
+                      fps=fps, audio_file=audio_file, **encoder_settings)
+    for i, (path, _) in enumerate(images, start=len(videos)):
+        frame = timeline.frame_at(min(thumbnail_t, total_duration - 1 / fps), i)
+        Image.fromarray(frame).save(path, quality=90)
+    return paths
+
+
+def encode_inputs(segments, audio_file, total_duration, profile, formats=None, thumbnail_at=None):
+    """
+    Entradas da etapa de codificação para o cache de build: conteúdo do áudio e das imagens, tempos dos
+    trechos, perfil, formatos de saída e configurações do encoder. Se nada disso mudou, os arquivos já
+    gravados são reaproveitados.
+    """
+    digests = {path: file_digest(path) for path in {segment.image_path for segment in segments}}
+    settings = get_render_profile(profile)
+    formats = formats or ["landscape"]
+    return {
+        "audio": file_digest(audio_file),
+        "total_duration": total_duration,
+        "segments": [[digests[s.image_path], s.start, s.duration, s.fade_in] for s in segments],
+        "profile": settings,
+        "formats": {name: get_output_format(name) for name in formats},
+        "thumbnail_at": thumbnail_time(segments, total_duration, thumbnail_at),
+        "encoder": {
+            "still_fast_path": STILL_FAST_PATH, "still_preset": STILL_ENCODER_PRESET, "still_crf": STILL_ENCODER_CRF,
+            "video_encoder": VIDEO_ENCODER, "video_preset": VIDEO_PRESET, "video_crf": VIDEO_CRF, "video_tune": VIDEO_TUNE,
+        },
+    }
+
+
+def render_segments_cached(segments, audio_file, output_file, total_duration, profile="final", formats=None,
+                           thumbnail_at=None):
+    """
+    `render_segments` que pula a codificação se `output_file` (e os demais formatos) já foram gerados
+    com as mesmas entradas. Retorna {formato: caminho}.
+    """
+    build_cache = get_build_cache()
+    inputs = encode_inputs(segments, audio_file, total_duration, profile, formats, thumbnail_at)
+    paths = output_paths(output_file, ["landscape"] + [name for name in inputs["formats"] if name != "landscape"])
+    with span("encode", profile=profile, segments=len(segments), formats=len(paths)) as current:
+        if build_cache.is_built(output_file, "encode", inputs) and all(os.path.exists(path) for path in paths.values()):
+            logging.info(f"Vídeo já gerado com as mesmas imagens, áudio e perfil; reaproveitando: {output_file}")
+            if current is not None:
+                current.attrs["cached"] = True
+            return paths
+        build_cache.invalidate(output_file)
+        paths = render_segments(segments, audio_file, output_file, total_duration, profile=profile,
+                                formats=formats, thumbnail_at=thumbnail_at)
+        build_cache.mark_built(output_file, "encode", inputs)
+        return paths
+
+
+def render_plan_path(video_file):
+    """Plano de renderização guardado ao lado do vídeo (ex: noticia_preview.mp4 -> noticia_preview.plan.json)."""
+    return os.path.splitext(video_file)[0] + ".plan.json"
+
+
+def save_render_plan(video_file, segments, audio_file, total_duration, candidates=(), thumbnail_at=None):
+    """
+    Grava a linha do tempo já resolvida (imagens em cache, tempos e áudio) ao lado do vídeo,
+    para que ele possa ser renderizado de novo em outro perfil sem refazer TTS, buscas e downloads.
+    """
+    plan = {
+        "audio_file": audio_file,
+        "total_duration": total_duration,
+        "thumbnail_at": thumbnail_at,
+        "segments": [segment._asdict() for segment in segments],
+        "images": [{"url": c.url, "thumbnail_url": c.thumbnail_url, "provider": c.provider, "dhash": c.dhash}
+                   for c in candidates],
+    }
+    path = render_plan_path(video_file)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False)
+    return path
+
+
+def hash_index_key(audio_file):
+    """
+    Identifica a notícia no índice de hashes (`PerceptualHashIndex.ignore_video`). Usa o nome do áudio,
+    que a prévia e o vídeo final compartilham.
+    """
+    return os.path.splitext(os.path.basename(audio_file))[0]
+
+
+def record_used_images(hash_index, candidates, video):
+    """
+    Registra as imagens do vídeo `video` (ver `hash_index_key`) no histórico de hashes. É só contabilidade,
+    feita depois do encode: uma falha ao gravar o índice é registrada no log e não invalida o vídeo já gerado.
+    """
+    try:
+        hash_index.record(candidates, video=video)
+    except OSError as e:
+        logging.warning(f"Não foi possível registrar as imagens usadas no índice de hashes: {e}")
+
+
+def render_from_plan(plan_file, output_video_file, profile="final", formats=None):
+    """
+    Renderiza de novo, no perfil `profile`, a linha do tempo salva em `plan_file` (ex: promover uma
+    prévia para a qualidade final, com todos os formatos do perfil). Usa as mesmas imagens em cache e o
+    mesmo áudio da renderização original. Retorna {formato: caminho}.
+    """
+    formats = profile_formats(profile, formats)
+    with open(plan_file, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    segments = [StillSegment(**segment) for segment in plan["segments"]]
+    missing = [path for path in [plan["audio_file"]] + [s.image_path for s in segments] if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"Arquivos da renderização original não encontrados (cache limpo?): {missing}")
+
+    logging.info(f"Renderizando {plan_file} no perfil '{profile}': {output_video_file}")
+    paths = render_segments_cached(segments, plan["audio_file"], output_video_file, plan["total_duration"],
+                                   profile=profile, formats=formats, thumbnail_at=plan.get("thumbnail_at"))
+    if profile == "final":
+        record_used_images(PerceptualHashIndex(), [ImageCandidate(**image) for image in plan.get("images", [])],
+                           hash_index_key(plan["audio_file"]))
+    logging.info(f"Vídeo gerado a partir do plano com sucesso: {output_video_file}")
+    return paths
+
+
 def create_video(audio_file, image_urls, output_file):
     logging.info("Iniciando a criação do vídeo...")
-    clips = []
     try:
-        audio = AudioFileClip(audio_file)
-        total_duration = audio.duration
-        current_time = 0
+        total_duration = get_audio_duration(audio_file)
         logging.info(f"Duração total do áudio: {total_duration} segundos")
     except Exception as e:
         logging.error(f"Erro ao carregar o arquivo de áudio: {e}", exc_info=True)
         raise
 
-    logging.info("Garantindo que haja pelo menos uma imagem válida...")
-    # Garantir que haja pelo menos uma imagem válida
-    if not image_urls:
-        print("Nenhuma imagem válida encontrada. Usando imagem padrão.")
-        default_image = "https://via.placeholder.com/1920x1080"
-        image_urls = [default_image]
     logging.info(f"Lista de imagens: {image_urls}")
+    logging.info("Pré-carregando as imagens em paralelo...")
+    image_paths = prefetch_images(image_urls, resize_image_to_16_9) if image_urls else []
+    # Garantir que haja pelo menos uma imagem válida, sem depender de um serviço externo de placeholder
+    if not image_paths:
+        logging.warning("Nenhuma imagem válida encontrada. Usando imagem padrão gerada localmente.")
+        image_paths = [default_image_path()]
 
-    logging.info("Iniciando o loop de criação de clipes...")
-    # Rotacionar entre as imagens disponíveis
-    while current_time < total_duration:
-        for i, url in enumerate(image_urls):
-            logging.info(f"Processando imagem {i+1}/{len(image_urls)}: {url}")
-            try:
-                # Baixar a imagem
-                logging.info("Baixando a imagem...")
-                response = requests.get(url, timeout=10)
-                if response.status_code != 200:
-                    logging.warning(f"Falha ao baixar a imagem. Status code: {response.status_code}")
-                    continue
-
-                # Salvar a imagem temporariamente
-                logging.info("Salvando a imagem temporariamente...")
-                temp_image_path = f"{IMAGES_DIR}/temp_image_{i}.jpg"
-                with open(temp_image_path, "wb") as img_file:
-                    img_file.write(response.content)
-
-                # Redimensionar para 16:9
-                logging.info("Redimensionando a imagem para 16:9...")
-                resized_image_path = f"{IMAGES_DIR}/resized_image_{i}.jpg"
-                resize_image_to_16_9(temp_image_path, resized_image_path)
-
-                # Criar clipe de imagem com duração de 4 segundos
-                logging.info("Criando clipe de imagem...")
-                #clip = ImageClip(resized_image_path, duration=4)
-
-                # Load image with PIL
-                img = Image.open(resized_image_path)
-                # Convert to numpy array
-                img_array = np.array(img)
-
-                # Add zoom effect
-                zoom_factor = 1.1
-                h, w = img_array.shape[:2]
-                zh = int(h / zoom_factor)
-                zw = int(w / zoom_factor)
-                top = (h - zh) // 2
-                left = (w - zw) // 2
-                img_array = img_array[top:top+zh, left:left+zw]
-                img_array = Image.fromarray(img_array).resize((w, h))
-                img_array = np.array(img_array)
-
-                clip = ImageClip(img_array, duration=4)
-
-                clips.append(clip.set_start(current_time))
-                current_time += 4
-
-                # Limpar arquivos temporários
-                logging.info("Limpando arquivos temporários...")
-                os.remove(temp_image_path)
-
-                # Parar se o tempo total for atingido
-                if current_time >= total_duration:
-                    logging.info("Tempo total atingido. Saindo do loop.")
-                    break
-            except Exception as e:
-                print(f"Erro ao processar imagem {url}: {e}")
-                # Log the error and continue with the next image
-                logging.error(f"Erro ao processar imagem {url}: {e}", exc_info=True)
-                continue
-
-    # Concatenar todos os clipes de imagem
-    if not clips:
-        raise ValueError("Nenhuma imagem válida foi processada.")
+    segments = build_still_segments(image_paths, total_duration, slot_duration=4, fade_in=1.0)
+    render_segments(segments, audio_file, output_file, total_duration)
+    print(f"Vídeo gerado com sucesso: {output_file}")
+    logging.info(f"Vídeo gerado com sucesso: {output_file}")
 
-    # Add fade transition between clips
-    for i in range(len(clips) - 1):
-        clips[i] = clips[i].crossfadein(1.0)
 
-    final_clip = concatenate_videoclips(clips, method="compose")
+def recheck_cached_choices(candidates, queries, hash_index):
+    """
+    Revalida as imagens escolhidas guardadas no cache de build: as que ficaram quase iguais a imagens usadas
+    desde então por outros vídeos (ou a outra já mantida neste) são buscadas de novo, só para as suas queries.
+    Retorna a lista de ImageCandidate alinhada com `queries`.
+    """
+    kept, hashes = [], []
+    for candidate in candidates:
+        if candidate is not None and hash_index.is_duplicate(candidate.dhash, hashes):
+            candidate = None
+        elif candidate is not None and candidate.dhash is not None:
+            hashes.append(candidate.dhash)
+        kept.append(candidate)
+    missing = [i for i, candidate in enumerate(kept) if candidate is None]
+    if not missing:
+        logging.info("Imagens escolhidas reaproveitadas do cache de build.")
+        return kept
+    logging.info(f"{len(missing)} de {len(kept)} imagens do cache de build já usadas em vídeos recentes. Buscando de novo.")
+    found = search_image_per_query([queries[i] for i in missing], accept=is_relevant_image, hash_index=hash_index,
+                                   exclude=[c.url for c in kept if c is not None], exclude_hashes=hashes)
+    for i, candidate in zip(missing, found):
+        kept[i] = candidate
+    return kept
 
-    # Definir o áudio no vídeo
-    final_clip = final_clip.set_audio(audio)
 
-    # Garantir que o vídeo tenha a mesma duração do áudio
-    if final_clip.duration < total_duration:
-        last_clip = clips[-1]
-        remaining_time = total_duration - final_clip.duration
-        repeated_clip = last_clip.fx(vfx.loop, duration=remaining_time).set_start(final_clip.duration)
-        final_clip = concatenate_videoclips([final_clip, repeated_clip])
+def create_video_synced(full_text, audio_file, output_video_file, news_title="", words_per_image=8, profile="final",
+                        progress_callback=None, formats=None, thumbnail_at=None):
+    """
+    Cria o vídeo trocando de imagem a cada `words_per_image` palavras da narração.
 
-    # Exportar o vídeo final
-    final_clip.write_videofile(output_file, fps=24)
-    print(f"Vídeo gerado com sucesso: {output_file}")
-    logging.info(f"Vídeo gerado com sucesso: {output_file}")
+    Os cortes vêm do índice de tempos por palavra gravado pelo TTS ao lado do áudio (<audio>.words.npy),
+    reescalado para a duração real do áudio; sem ele, a duração é distribuída proporcionalmente pelas palavras.
+    Cada janela de palavras gera sua própria consulta de imagem.
+    Com `profile="preview"` o vídeo sai em baixa resolução; o plano salvo ao lado dele
+    (`render_plan_path`) permite promovê-lo depois com `render_from_plan`.
+    `formats` (por padrão, os do perfil) e `thumbnail_at` são repassados a `render_segments`: vídeo vertical
+    e miniatura saem da mesma passada que o vídeo principal.
+    `progress_callback(percentual, mensagem)`, se informado, recebe o progresso de 0 a 100.
+    Retorna {formato: caminho}.
+    """
+    report = progress_callback or (lambda percent, message: None)
+    logging.info("Iniciando a criação do vídeo sincronizado...")
+    words = full_text.split()
+    if not words:
+        raise ValueError("Texto vazio: não há o que sincronizar.")
+
+    with span("alignment"):
+        # A linha do tempo segue a duração real do MP3, não a soma das durações dos trechos do TTS
+        total_duration = get_audio_duration(audio_file)
+        index = load_word_index(audio_file, expected_words=len(words))
+        if index is None:
+            logging.info("Índice de palavras não encontrado. Estimando os tempos pela duração do áudio.")
+            index = estimate_word_index(words, total_duration)
+        else:
+            index = rescale_word_index(index, total_duration)
+        slots = image_slots(index, words_per_image, total_duration)
+
+    # Queries e imagens escolhidas vêm do cache de build quando o texto (e depois as queries) não mudaram
+    build_cache = get_build_cache()
+    # Uma consulta de imagem por janela de palavras
+    report(5, "Buscando imagens...")
+    with span("keywords"):
+        queries = build_cache.memoize(
+            "keywords", {"text": full_text, "title": news_title, "words_per_image": words_per_image},
+            lambda: extract_search_queries_for_article(full_text, news_title, words_per_image=words_per_image))
+    # Todas as queries vão a todos os provedores ao mesmo tempo; vale a primeira imagem relevante de cada uma
+    # que não seja quase igual (hash perceptual da miniatura) a outra do vídeo ou de vídeos recentes
+    # As imagens já registradas para este mesmo vídeo não contam: re-renderizar a notícia pode reaproveitá-las
+    hash_index = PerceptualHashIndex(ignore_video=hash_index_key(audio_file))
+    search_inputs = {
+        "queries": queries, "providers": configured_providers(), "per_query": IMAGE_SEARCH_PER_QUERY,
+        "max_per_provider": IMAGE_SEARCH_MAX_PER_PROVIDER, "irrelevant_keywords": IRRELEVANT_KEYWORDS,
+    }
+    with span("search", queries=len(queries)):
+        cached = build_cache.get("search", search_inputs)
+        if cached is None:
+            candidates = search_image_per_query(queries, accept=is_relevant_image, hash_index=hash_index)
+        else:
+            candidates = recheck_cached_choices([ImageCandidate(**c) if c else None for c in cached], queries, hash_index)
+        # Buscas incompletas (provedor fora do ar, prazo esgotado) não são guardadas: a próxima renderização tenta de novo
+        chosen = [c._asdict() if c else None for c in candidates]
+        if all(chosen) and chosen != cached:
+            build_cache.put("search", search_inputs, chosen)
+    image_urls = [candidate.url if candidate else None for candidate in candidates]
+    logging.info(f"Latência das buscas de imagens por provedor: {latency_stats.summary()}")
+
+    report(30, "Baixando imagens...")
+    logging.info("Pré-carregando as imagens em paralelo...")
+    # Com formatos além do 16:9, as imagens ficam inteiras (cada formato recorta a sua proporção no encode)
+    formats = profile_formats(profile, formats)
+    with span("download"):
+        if set(formats) - {"landscape"}:
+            paths = prefetch_image_map([url for url in image_urls if url], resize_image_for_formats, variant="formats")
+        else:
+            paths = prefetch_image_map([url for url in image_urls if url], resize_image_to_16_9)
+
+    # Janelas sem imagem (busca ou download falhou) estendem a imagem anterior
+    segments = []
+    for (start, duration), url in zip(slots, image_urls):
+        path = paths.get(url) if url else None
+        if path is None and segments:
+            previous = segments[-1]
+            segments[-1] = previous._replace(duration=previous.duration + duration)
+            continue
+        if path is None:
+            continue
+        segments.append(StillSegment(path, start, duration, min(1.0, duration / 2)))
+    if not segments:
+        raise ValueError("Nenhuma imagem válida foi processada.")
+    # O primeiro trecho começa em 0 mesmo que as primeiras janelas não tenham imagem
+    segments[0] = segments[0]._replace(duration=segments[0].duration + segments[0].start, start=0.0)
+    segments[-1] = segments[-1]._replace(fade_in=0)
+
+    report(50, "Passo 3/3: Renderizando vídeo...")
+    outputs = render_segments_cached(segments, audio_file, output_video_file, total_duration, profile=profile,
+                                     formats=formats, thumbnail_at=thumbnail_at)
+    report(100, "Vídeo gerado com sucesso!")
+    used_paths = {segment.image_path for segment in segments}
+    used_candidates = [c for c in candidates if c is not None and paths.get(c.url) in used_paths]
+    save_render_plan(output_video_file, segments, audio_file, total_duration, used_candidates, thumbnail_at)
+    # Prévias não contam como uso: senão uma nova prévia da mesma notícia rejeitaria as próprias imagens
+    if profile == "final":
+        record_used_images(hash_index, used_candidates, hash_index_key(audio_file))
+    logging.info(f"Vídeo sincronizado gerado com sucesso: {', '.join(outputs.values())}")
+    return outputs